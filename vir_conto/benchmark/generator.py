@@ -0,0 +1,236 @@
+import datetime
+import io
+import random
+import struct
+import zipfile
+from collections.abc import Callable, Iterator
+from typing import IO, Any
+
+import frappe
+
+from vir_conto.importer.dbf_reader import DbfField, DbfReader
+
+ENCODING = "cp1250"
+
+# Tables of the fixture packet whose DBase layouts are reused, so the generated packets match C-Conto exports
+TABLES = ["torzs", "raktnev", "tfocsop", "tcsop", "vir_bolt", "vir_csop", "torolt"]
+
+# vir_csop TIPUS values, one record is sent for every group and store per day and type
+CSOP_TYPES = ["ERT", "BESZ_NKP"]
+
+# TIPUS of the generated `torolt` records, they refer to `termek` records
+DELETED_TYPE = "TERM"
+
+GROUP_NAMES = ["Húsok (nyers)", "Tejtermékek", "Pékáru", "Zöldség-gyümölcs", "Italok", "Édesség", "Göngyöleg"]
+
+
+class PacketSpec:
+	"""Scale of a generated Data Packet.
+
+	vir_bolt gets `stores × days` records, vir_csop `stores × days × groups × 2`.
+	"""
+
+	def __init__(
+		self,
+		stores: int = 5,
+		days: int = 30,
+		groups: int = 6,
+		deleted: int = 0,
+		start: datetime.date | None = None,
+		seed: int = 0,
+	):
+		"""
+		Args:
+				stores: Number of stores (raktnev).
+				days: Number of consecutive days of the daily tables.
+				groups: Number of product main groups (tfocsop).
+				deleted: Number of `torolt` records.
+				start: First day of the daily tables. Defaults to January 1st of the previous year.
+				seed: Seed of the random values, the same spec always generates the same packet.
+		"""
+		self.stores = stores
+		self.days = days
+		self.groups = groups
+		self.deleted = deleted
+		self.start = start or datetime.date(datetime.date.today().year - 1, 1, 1)
+		self.seed = seed
+
+	def as_dict(self) -> dict:
+		return {
+			"stores": self.stores,
+			"days": self.days,
+			"groups": self.groups,
+			"deleted": self.deleted,
+			"start": self.start.isoformat(),
+			"seed": self.seed,
+		}
+
+
+def generate_packet(path: str, spec: PacketSpec) -> dict[str, int]:
+	"""Writes a Data Packet archive with synthetic records of every imported Conto table.
+
+	Args:
+			path: Path of the archive to create.
+			spec: Scale of the packet.
+
+	Returns:
+			dict: Number of records by table.
+	"""
+	layouts = load_layouts()
+	rng = random.Random(spec.seed)
+
+	stores = [str(100 + i) for i in range(spec.stores)]
+	groups = [str(100 + i * 10) for i in range(spec.groups)]
+	dates = [(spec.start + datetime.timedelta(days=i)).strftime("%Y.%m.%d") for i in range(spec.days)]
+
+	tables: dict[str, tuple[int, Iterator[dict]]] = {
+		"torzs": (1, iter([{"F_KOD": "100", "F_NEV": "BENCHMARK KFT.", "SZERZIDO": spec.start}])),
+		"raktnev": (
+			len(stores),
+			({"RKOD": rkod, "RNEV": f"Bolt {rkod}", "SORREND": i} for i, rkod in enumerate(stores)),
+		),
+		"tfocsop": (
+			len(groups),
+			({"KOD": kod, "NEV": GROUP_NAMES[i % len(GROUP_NAMES)]} for i, kod in enumerate(groups)),
+		),
+		"tcsop": (
+			len(groups) * 3,
+			({"KOD": f"{kod[:-1]}{i}", "NEV": f"Csoport {kod}/{i}", "FOCSOP": kod} for kod in groups for i in range(3)),
+		),
+		"vir_bolt": (
+			len(stores) * len(dates),
+			(_vir_bolt_record(rng, rkod, datum) for datum in dates for rkod in stores),
+		),
+		"vir_csop": (
+			len(stores) * len(dates) * len(groups) * len(CSOP_TYPES),
+			(
+				_vir_csop_record(rng, rkod, datum, tipus, csop)
+				for datum in dates
+				for rkod in stores
+				for tipus in CSOP_TYPES
+				for csop in groups
+			),
+		),
+		"torolt": (spec.deleted, ({"TIP": DELETED_TYPE, "KOD": f"{10100000 + i}"} for i in range(spec.deleted))),
+	}
+
+	with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zip_ref:
+		for name, (count, records) in tables.items():
+			with zip_ref.open(f"{name}.dbf", "w", force_zip64=True) as stream:
+				write_dbf(stream, layouts[name], count, records, _fill_value(rng))
+
+	return {name: count for name, (count, _records) in tables.items()}
+
+
+def load_layouts() -> dict[str, list[DbfField]]:
+	"""Reads the field layouts of the Conto tables from the fixture packet."""
+	path = frappe.get_app_path("vir_conto", "vir_conto", "doctype", "data_packet", "TEST-0001.LZH")
+	with zipfile.ZipFile(path) as zip_ref:
+		return {name: DbfReader(io.BytesIO(zip_ref.read(f"{name}.dbf")), ENCODING).fields for name in TABLES}
+
+
+def write_dbf(
+	stream: IO[bytes],
+	fields: list[DbfField],
+	count: int,
+	records: Iterator[dict],
+	fill: Callable[[DbfField], Any],
+) -> None:
+	"""Writes a dBase III table.
+
+	Args:
+			stream: Binary stream to write to.
+			fields: Field layout of the table.
+			count: Number of records, it is written to the header before the records.
+			records: Records by DBase field name, missing fields are filled with `fill`.
+			fill: Function which creates the value of a missing field.
+	"""
+	today = datetime.date.today()
+	header_length = 32 + 32 * len(fields) + 1
+	record_length = 1 + sum(field.length for field in fields)
+
+	stream.write(
+		struct.pack("<BBBBIHH20x", 0x03, today.year - 1900, today.month, today.day, count, header_length, record_length)
+	)
+	for field in fields:
+		stream.write(
+			struct.pack(
+				"<11sc4xBB14x",
+				field.name.encode("ascii"),
+				field.type.encode("ascii"),
+				field.length,
+				field.decimals,
+			)
+		)
+	stream.write(b"\r")
+
+	buffer = []
+	for record in records:
+		values = [b" "]
+		for field in fields:
+			value = record[field.name] if field.name in record else fill(field)
+			values.append(_format_value(field, value))
+		buffer.append(b"".join(values))
+		if len(buffer) >= 10000:
+			stream.write(b"".join(buffer))
+			buffer.clear()
+	stream.write(b"".join(buffer))
+	stream.write(b"\x1a")
+
+
+def _format_value(field: DbfField, value: Any) -> bytes:
+	if value is None or value == "":
+		return b" " * field.length
+	if field.type == "C":
+		return str(value).encode(ENCODING)[: field.length].ljust(field.length)
+	if field.type in ("N", "F"):
+		text = f"{value:.{field.decimals}f}" if field.decimals else str(int(value))
+		return text.encode("ascii").rjust(field.length)[-field.length :]
+	if field.type == "D":
+		return value.strftime("%Y%m%d").encode("ascii")
+	if field.type == "L":
+		return b"T" if value else b"F"
+	return b" " * field.length
+
+
+def _fill_value(rng: random.Random) -> Callable[[DbfField], Any]:
+	def fill(field: DbfField) -> Any:
+		# strings are left empty, they may be links to other tables
+		if field.type in ("N", "F"):
+			return round(rng.uniform(0, 1000), field.decimals) if field.decimals else rng.randint(0, 1000)
+		return None
+
+	return fill
+
+
+def _vir_bolt_record(rng: random.Random, rkod: str, datum: str) -> dict:
+	nert = rng.randint(50_000, 500_000)
+	haszon = int(nert * rng.uniform(0.2, 0.35))
+	vevok = rng.randint(20, 200)
+	return {
+		"RKOD": rkod,
+		"RNEV": f"Bolt {rkod}",
+		"DATUM": datum,
+		"HO": datum[5:7],
+		"KESZLET": rng.randint(1_000_000, 5_000_000),
+		"NERT_OSSZ": nert,
+		"BERT_OSSZ": int(nert * 1.17),
+		"VEVOK": vevok,
+		"KOSARA": nert // vevok,
+		"HASZON": haszon,
+		"HKULCS": round(haszon / nert * 100, 2),
+		"NEG_KESZLM": -rng.randint(0, 2000),
+	}
+
+
+def _vir_csop_record(rng: random.Random, rkod: str, datum: str, tipus: str, csop: str) -> dict:
+	nert = rng.randint(1_000, 400_000)
+	return {
+		"RKOD": rkod,
+		"DATUM": datum,
+		"HO": datum[5:7],
+		"TIPUS": tipus,
+		"CSOP": csop,
+		"NERT": nert,
+		"BERT": int(nert * 1.17),
+	}
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import zipfile
+
+import frappe
+from frappe.utils import now
+
+from vir_conto.benchmark.generator import PacketSpec, generate_packet
+from vir_conto.importer.plan import TOMBSTONE_TABLE, DoctypePlan, ImportPlan
+from vir_conto.importer.stats import get_peak_rss_mb
+from vir_conto.vir_conto.doctype.data_packet.data_packet import get_dbf_members, process_dbf
+
+# Doctypes emptied before the benchmark, so every run starts from the same state
+BENCHMARK_DOCTYPES = ["vir_csop", "vir_bolt", "tcsop", "tfocsop", "raktnev", "torzs"]
+
+RUN_FIELDS = [
+	"table_name",
+	"rows",
+	"rows_per_sec",
+	"total_time",
+	"unzip_time",
+	"decode_time",
+	"transform_time",
+	"write_time",
+	"commit_time",
+	"peak_rss_mb",
+]
+
+
+def run_benchmark(spec: PacketSpec, output: str | None = None) -> dict:
+	"""Times the Data Packet import on generated packets.
+
+	The scenarios run one after the other on the current site:
+
+	- `import`: first import into empty tables (full replace and upsert inserts)
+	- `reimport_unchanged`: the same packet again, every upserted row is unchanged
+	- `reimport_changed`: a packet with other values, every upserted row is updated
+	- `torolt`: the deleted records table of the packet
+
+	Warning: the Conto doctypes of the site are emptied.
+
+	Args:
+			spec: Scale of the generated packets.
+			output: JSON file the result is appended to. Defaults to None.
+
+	Returns:
+			dict: The result of the benchmark.
+	"""
+	result = {
+		"created": now(),
+		"site": frappe.local.site,
+		"commit": get_app_commit(),
+		"spec": spec.as_dict(),
+		"scenarios": [],
+	}
+
+	for doctype in BENCHMARK_DOCTYPES:
+		frappe.db.delete(doctype)
+	frappe.db.commit()  # nosemgrep
+
+	changed_spec = PacketSpec(spec.stores, spec.days, spec.groups, spec.deleted, spec.start, spec.seed + 1)
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		first = create_packet(os.path.join(tmp_dir, "BENCH-0001.LZH"), spec)
+		second = create_packet(os.path.join(tmp_dir, "BENCH-0002.LZH"), changed_spec)
+
+		try:
+			result["scenarios"].append(time_import("import", first))
+			result["scenarios"].append(time_import("reimport_unchanged", first))
+			result["scenarios"].append(time_import("reimport_changed", second))
+			result["scenarios"].append(time_tombstones(first))
+		finally:
+			for packet in (first, second):
+				remove_packet(packet)
+
+	if output:
+		append_result(output, result)
+	return result
+
+
+def create_packet(path: str, spec: PacketSpec) -> str:
+	"""Generates a packet into the private files of the site and creates its Data Packet without queueing it."""
+	generate_packet(path, spec)
+	file_name = os.path.basename(path)
+	shutil.copy(path, frappe.get_site_path("private", "files", file_name))
+
+	if frappe.db.exists("Data Packet", file_name):
+		frappe.delete_doc("Data Packet", file_name, force=True)
+	doc = frappe.get_doc({"doctype": "Data Packet", "name": file_name, "file_name": file_name})
+	doc.db_insert()  # skips `after_insert`, the benchmark runs the import itself
+	frappe.db.commit()  # nosemgrep
+	return file_name
+
+
+def remove_packet(packet: str) -> None:
+	doc = frappe.get_doc("Data Packet", packet)
+	if os.path.exists(doc.get_file_path()):
+		os.remove(doc.get_file_path())
+	frappe.delete_doc("Data Packet", packet, force=True)
+	frappe.db.commit()  # nosemgrep
+
+
+def time_import(scenario: str, packet: str) -> dict:
+	"""Runs `import_packet` and collects the Import Runs it created."""
+	started = now()
+	start = time.perf_counter()
+	frappe.get_doc("Data Packet", packet).import_packet()
+	elapsed = time.perf_counter() - start
+
+	tables = frappe.get_all(
+		"Import Run",
+		filters={"data_packet": packet, "started": [">=", started]},
+		fields=RUN_FIELDS,
+		order_by="started asc",
+	)
+	rows = sum(table.rows for table in tables)
+	return {
+		"scenario": scenario,
+		"seconds": elapsed,
+		"rows": rows,
+		"rows_per_sec": rows / elapsed if elapsed else 0,
+		"peak_rss_mb": get_peak_rss_mb(),
+		"tables": tables,
+	}
+
+
+def time_tombstones(packet: str) -> dict:
+	"""Processes the `torolt` table of a packet, the table is imported even if it has no Primary Key."""
+	plan = ImportPlan.load()
+	if TOMBSTONE_TABLE not in plan.doctypes:
+		plan.doctypes[TOMBSTONE_TABLE] = DoctypePlan(
+			{"name": TOMBSTONE_TABLE, "conto_primary_key": "kod", "enabled": 1}
+		)
+
+	file_path = frappe.get_doc("Data Packet", packet).get_file_path()
+	with zipfile.ZipFile(file_path) as zip_ref:
+		member = get_dbf_members(zip_ref)[TOMBSTONE_TABLE]
+		with zip_ref.open(member) as stream:
+			rows = int.from_bytes(stream.read(8)[4:8], "little")
+
+		start = time.perf_counter()
+		with zip_ref.open(member) as stream:
+			process_dbf(stream, plan, TOMBSTONE_TABLE, "cp1250")
+		frappe.db.commit()  # nosemgrep
+		elapsed = time.perf_counter() - start
+	return {
+		"scenario": "torolt",
+		"seconds": elapsed,
+		"rows": rows,
+		"rows_per_sec": rows / elapsed if elapsed else 0,
+		"peak_rss_mb": get_peak_rss_mb(),
+		"tables": [],
+	}
+
+
+def append_result(path: str, result: dict) -> None:
+	"""Appends a result to a JSON file holding the results of earlier benchmarks."""
+	results = []
+	if os.path.exists(path):
+		with open(path, encoding="utf8") as file:
+			results = json.load(file)
+	results.append(result)
+	with open(path, "w", encoding="utf8") as file:
+		json.dump(results, file, indent=1, ensure_ascii=False, default=str)
+
+
+def get_app_commit() -> str | None:
+	"""Git commit of the installed app, results can be compared across commits."""
+	try:
+		return subprocess.check_output(
+			["git", "rev-parse", "HEAD"], cwd=frappe.get_app_path("vir_conto"), text=True, stderr=subprocess.DEVNULL
+		).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
@@ -75,4 +75,196 @@ def export_default_charts(base_path: str) -> int:
 	return len(default_workbooks)
 
 
-commands = [export_insights]
+@click.command("generate-test-packet")
+@click.argument("path")
+@click.option("--stores", default=5, help="Number of stores")
+@click.option("--days", default=30, help="Number of days of the daily tables")
+@click.option("--groups", default=6, help="Number of product main groups")
+@click.option("--deleted", default=0, help="Number of deleted (torolt) records")
+@click.option("--seed", default=0, help="Seed of the generated values")
+@pass_context
+def generate_test_packet(context, path, stores, days, groups, deleted, seed):
+	"""Writes a synthetic C-Conto Data Packet archive to PATH.
+
+	Args:
+	        context (_type_): Frappe site context.
+
+	Raises:
+	        SiteNotSpecifiedError: If site is not provided or can not connect to.
+	"""
+	from vir_conto.benchmark.generator import PacketSpec, generate_packet
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	try:
+		frappe.init(site=context.sites[0])
+		spec = PacketSpec(stores=stores, days=days, groups=groups, deleted=deleted, seed=seed)
+		counts = generate_packet(path, spec)
+		for table, count in counts.items():
+			print(f"{table}: {count:n} records")
+	finally:
+		frappe.destroy()
+
+
+@click.command("benchmark-import")
+@click.option("--stores", default=5, help="Number of stores")
+@click.option("--days", default=30, help="Number of days of the daily tables")
+@click.option("--groups", default=6, help="Number of product main groups")
+@click.option("--deleted", default=1000, help="Number of deleted (torolt) records")
+@click.option("--output", default=None, help="JSON file the result is appended to")
+@click.option("--yes", is_flag=True, help="Don't ask before emptying the Conto tables of the site")
+@pass_context
+def benchmark_import(context, stores, days, groups, deleted, output, yes):
+	"""Times the Data Packet import on generated packets.
+
+	The Conto tables of the site are emptied, only run it on a benchmark site.
+
+	Args:
+	        context (_type_): Frappe site context.
+
+	Raises:
+	        SiteNotSpecifiedError: If site is not provided or can not connect to.
+	"""
+	from vir_conto.benchmark.generator import PacketSpec
+	from vir_conto.benchmark.runner import run_benchmark
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	for site in context.sites:
+		if not yes:
+			click.confirm(f"The Conto tables of {site} will be emptied. Continue?", abort=True)
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+			frappe.set_user("Administrator")
+
+			spec = PacketSpec(stores=stores, days=days, groups=groups, deleted=deleted)
+			result = run_benchmark(spec, output)
+			for scenario in result["scenarios"]:
+				print(
+					f"{scenario['scenario']}: {scenario['rows']:n} rows in {scenario['seconds']:.2f}s "
+					f"({scenario['rows_per_sec']:.0f} rows/s)"
+				)
+		finally:
+			frappe.destroy()
+
+
+@click.command("index-usage")
+@click.argument("doctypes", nargs=-1)
+@pass_context
+def index_usage(context, doctypes):
+	"""Lists the indexes of the Conto doctypes with their size and the rows read through them.
+
+	Without DOCTYPES the doctypes of the `vir_conto_indexes` hooks are listed.
+	Managed indexes are marked with `*`.
+
+	Args:
+	        context (_type_): Frappe site context.
+
+	Raises:
+	        SiteNotSpecifiedError: If site is not provided or can not connect to.
+	"""
+	from vir_conto.importer.indexes import get_declared_indexes, get_index_usage
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+
+			usage = get_index_usage(list(doctypes) or sorted(get_declared_indexes()))
+			for row in usage:
+				size = f"{row.size / 1024 / 1024:.1f} MiB" if row.size is not None else "-"
+				reads = f"{row.reads:n}" if row.reads is not None else "-"
+				print(
+					f"{row.doctype}: {row.index}{'*' if row.managed else ''} ({', '.join(row.columns)}) "
+					f"size {size}, rows read {reads}"
+				)
+			if usage and all(row.size is None for row in usage):
+				print("Index sizes are unavailable, the database user can not read the index statistics")
+			if usage and all(row.reads is None for row in usage):
+				print("Rows read are unavailable, turn on the `userstat` server variable to collect them")
+		finally:
+			frappe.destroy()
+
+
+@click.command("partition-tables")
+@click.argument("doctypes", nargs=-1)
+@click.option("--yes", is_flag=True, help="Don't ask before converting the tables")
+@pass_context
+def partition_tables(context, doctypes, yes):
+	"""Partitions the daily tables (vir_bolt, vir_csop) by the year of their date, MariaDB only.
+
+	Without DOCTYPES both daily tables are converted. Every table is copied once,
+	run it when the site is not used.
+
+	Args:
+	        context (_type_): Frappe site context.
+
+	Raises:
+	        SiteNotSpecifiedError: If site is not provided or can not connect to.
+	"""
+	from vir_conto.importer.bulk import DATE_FIELD_DOCTYPES
+	from vir_conto.importer.partitions import partition_table
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	doctypes = list(doctypes) or sorted(DATE_FIELD_DOCTYPES)
+	for site in context.sites:
+		if not yes:
+			click.confirm(f"{', '.join(doctypes)} of {site} will be rebuilt. Continue?", abort=True)
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+
+			for doctype in doctypes:
+				if partition_table(doctype):
+					print(f"{doctype}: partitioned")
+				else:
+					print(f"{doctype}: already partitioned")
+		finally:
+			frappe.destroy()
+
+
+@click.command("remove-partition")
+@click.argument("doctype")
+@click.argument("year", type=int)
+@click.option("--archive", is_flag=True, help="Move the records to a table of their own instead of dropping them")
+@click.option("--yes", is_flag=True, help="Don't ask before removing the records")
+@pass_context
+def remove_partition(context, doctype, year, archive, yes):
+	"""Removes the records of YEAR from a partitioned daily table, the monthly rollups are kept.
+
+	Args:
+	        context (_type_): Frappe site context.
+
+	Raises:
+	        SiteNotSpecifiedError: If site is not provided or can not connect to.
+	"""
+	from vir_conto.importer import partitions
+
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	for site in context.sites:
+		if not yes:
+			click.confirm(f"The {year} records of {doctype} will be removed from {site}. Continue?", abort=True)
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+
+			archive_table = partitions.remove_partition(doctype, year, archive=archive)
+			if archive_table:
+				print(f"{doctype}: {year} moved to {archive_table}")
+			else:
+				print(f"{doctype}: {year} dropped")
+		finally:
+			frappe.destroy()
+
+
+commands = [export_insights, generate_test_packet, benchmark_import, index_usage, partition_tables, remove_partition]
@@ -112,6 +112,22 @@ after_uninstall = "vir_conto.uninstall.after_uninstall"
 # ------------
 after_migrate = "vir_conto.migrate.after_migrate"
 
+# Composite Indexes
+# -----------------
+# Indexes of the Conto doctypes by doctype and key, created and reconciled after migrate
+# by vir_conto.importer.indexes. The leading columns are the ones the default charts filter on.
+vir_conto_indexes = {
+	"vir_bolt": {
+		"rkod_datum": ["rkod", "datum"],
+		"ev_ho_rkod": ["ev", "ho", "rkod"],
+	},
+	"vir_csop": {
+		"tipus_csop_datum": ["tipus", "csop", "datum"],
+		"rkod_datum": ["rkod", "datum"],
+		"ev_ho_rkod": ["ev", "ho", "rkod"],
+	},
+}
+
 # Integration Setup
 # ------------------
 # To set up dependencies/integrations with other apps
@@ -168,7 +184,8 @@ scheduler_events = {
 	# ],
 	"daily": [
 		# 		"vir_conto.tasks.daily"
-		"vir_conto.vir_conto.doctype.data_packet.data_packet.clear_old_packets"
+		"vir_conto.vir_conto.doctype.data_packet.data_packet.clear_old_packets",
+		"vir_conto.vir_conto.doctype.naptar.naptar.refresh_calendar",
 	],
 	# "hourly": [
 	# 		"vir_conto.tasks.hourly"
@@ -177,9 +194,10 @@ scheduler_events = {
 	# "weekly": [
 	# 		"vir_conto.tasks.weekly"
 	# ],
-	# 	"monthly": [
-	# 		"vir_conto.tasks.monthly"
-	# 	],
+	"monthly": [
+		# 		"vir_conto.tasks.monthly"
+		"vir_conto.importer.partitions.add_next_partitions"
+	],
 }
 
 # Testing
@@ -0,0 +1,126 @@
+import json
+import time
+
+import frappe
+from pypika.terms import Term
+
+# Rows updated by one statement, small enough to keep locks and the undo log short
+BACKFILL_CHUNK_SIZE = 10000
+
+# Pause between chunks in seconds, leaves room for the imports and the dashboards
+BACKFILL_SLEEP = 0.1
+
+
+class Backfill:
+	"""Applies an UPDATE to a large table in bounded chunks, for patches of the Conto tables.
+
+	The table is walked in the order of an indexed column, `name` by default. Every chunk
+	is one UPDATE of a range of that column, built with `frappe.qb` so it runs on MariaDB
+	and Postgres, and is committed on its own, so locks are held
+	for a short time only. The last updated value is saved as a global default after
+	every chunk, an interrupted migrate resumes where it stopped.
+
+	Records whose walked column is NULL are not updated. If the column is not unique,
+	a chunk also updates the records sharing its last value and the row count is a lower bound.
+	"""
+
+	def __init__(
+		self,
+		key: str,
+		doctype: str,
+		assignments: dict[str, Term | str | int | float | None],
+		column: str = "name",
+		chunk_size: int = BACKFILL_CHUNK_SIZE,
+		sleep: float = BACKFILL_SLEEP,
+	):
+		"""
+		Args:
+				key: Unique name of the backfill, the progress is saved under it.
+				doctype: Doctype whose table is updated.
+				assignments: New values of the UPDATE by field, `frappe.qb` terms or constants,
+						e.g. {"ev": Extract(DatePart.year, frappe.qb.DocType("vir_bolt").datum)}.
+				column: Indexed column the table is walked by, e.g. `name` or `datum`.
+				chunk_size: Number of records updated by one statement.
+				sleep: Pause between chunks in seconds.
+		"""
+		self.key = key
+		self.doctype = doctype
+		self.assignments = assignments
+		self.column = column
+		self.chunk_size = chunk_size
+		self.sleep = sleep
+
+		self.last = None
+		self.rows = 0
+		self.done = False
+		self.seconds = 0.0
+		self._load()
+
+	@property
+	def progress_key(self) -> str:
+		return f"vir_conto_backfill:{self.key}"
+
+	def run(self) -> None:
+		"""Updates the remaining chunks and logs the throughput, a finished backfill does nothing."""
+		if self.done:
+			return
+
+		started = time.monotonic()
+		while True:
+			if not self.run_chunk():
+				break
+			self.seconds = time.monotonic() - started
+			frappe.logger("backfill", allow_site=True).info(
+				f"{self.key}: {self.rows:n} rows, last {self.column} {self.last} ({self.rows_per_sec:.0f} rows/s)"
+			)
+			if self.sleep:
+				time.sleep(self.sleep)
+
+		self.seconds = time.monotonic() - started
+		frappe.logger("backfill", allow_site=True).info(
+			f"{self.key}: {self.rows:n} rows in {self.seconds:.1f}s ({self.rows_per_sec:.0f} rows/s), done"
+		)
+
+	def run_chunk(self) -> bool:
+		"""Updates the next chunk and commits it with the progress.
+
+		Returns:
+				bool: False if there were no records left.
+		"""
+		table = frappe.qb.DocType(self.doctype)
+		column = table[self.column]
+		after = column > self.last if self.last is not None else column.isnotnull()
+		values = (
+			frappe.qb.from_(table).select(column).where(after).orderby(column).limit(self.chunk_size).run(pluck=True)
+		)
+		if not values:
+			self.done = True
+			self._save()
+			frappe.db.commit()  # nosemgrep
+			return False
+
+		upper = values[-1]
+		query = frappe.qb.update(table)
+		for field, value in self.assignments.items():
+			query = query.set(table[field], value)
+		query.where(after).where(column <= upper).run()
+		self.last = str(upper)
+		self.rows += len(values)
+		self._save()
+		frappe.db.commit()  # nosemgrep
+		return True
+
+	@property
+	def rows_per_sec(self) -> float:
+		return self.rows / self.seconds if self.seconds else 0.0
+
+	def _load(self) -> None:
+		progress = frappe.db.get_global(self.progress_key)
+		if progress:
+			progress = json.loads(progress)
+			self.last = progress.get("last")
+			self.rows = progress.get("rows", 0)
+			self.done = progress.get("done", False)
+
+	def _save(self) -> None:
+		frappe.db.set_global(self.progress_key, json.dumps({"last": self.last, "rows": self.rows, "done": self.done}))
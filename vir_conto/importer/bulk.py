@@ -0,0 +1,211 @@
+import hashlib
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any
+
+import frappe
+from frappe.utils import cast, now
+from pypika.terms import Values
+
+from vir_conto.importer.dates import get_date_fields
+from vir_conto.importer.stats import ImportStats
+
+BULK_CHUNK_SIZE = 5000
+
+STANDARD_FIELDS = ["name", "owner", "creation", "modified", "modified_by", "docstatus", "idx"]
+
+# Fieldtypes that need to be converted before they are sent to the database,
+# everything else is written as the trimmed DBase string.
+CAST_FIELDTYPES = {"Int", "Check", "Float", "Currency", "Percent", "Date", "Datetime"}
+
+# Doctypes whose `ev`, `ho`, `ho_nap` are derived from `datum` by database triggers (see `date_triggers`),
+# the writer only sends them if the triggers of the table are missing
+DATE_FIELD_DOCTYPES = {"vir_bolt", "vir_csop"}
+DATE_FIELDS = ["ev", "ho", "ho_nap"]
+
+# Fields which are kept from the existing record when upserting
+INSERT_ONLY_FIELDS = {"name", "owner", "creation"}
+
+# Hidden column with the fingerprint of the imported values, see `get_row_hash`
+ROW_HASH_FIELD = "row_hash"
+
+
+class BulkWriter:
+	"""Buffers Conto records of one doctype and writes them with multi-row INSERT statements.
+
+	The writer skips the document lifecycle (validation, hooks, link checks),
+	so it must only be used for doctypes which are fully owned by C-Conto.
+
+	In upsert mode existing records are overwritten with
+	`INSERT ... ON DUPLICATE KEY UPDATE` (MariaDB) or `INSERT ... ON CONFLICT` (Postgres).
+	If the doctype has a `row_hash` column, the fingerprints of a chunk are compared
+	with the stored ones first and only the new or changed records are written.
+	"""
+
+	def __init__(
+		self,
+		doctype: str,
+		columns: list[str],
+		chunk_size: int = BULK_CHUNK_SIZE,
+		upsert: bool = False,
+		stats: ImportStats | None = None,
+		table: str | None = None,
+	):
+		"""
+		Args:
+				doctype: Doctype the records are written to.
+				columns: Lowercase DBase field names, in the order of the record values.
+				chunk_size: Number of records written by one statement.
+				upsert: Overwrite the existing records instead of skipping them.
+				stats: Import statistics, the database statements are measured as the `write` stage.
+				table: Doctype style name of the table written to, e.g. a staging table. Defaults to the doctype.
+		"""
+		self.doctype = doctype
+		self.table = table or doctype
+		self.stats = stats
+		self.chunk_size = chunk_size
+		self.upsert = upsert
+		self.skip_date_fields = doctype in DATE_FIELD_DOCTYPES
+		self.set_dates = self.skip_date_fields and not _has_date_triggers(doctype)
+		self.buffer: dict[str, tuple] = {}
+		self.count = 0
+		self._set_columns(columns)
+
+		self.fingerprint = upsert and frappe.get_meta(doctype).has_field(ROW_HASH_FIELD)
+		self.inserted = 0
+		self.updated = 0
+		self.unchanged = 0
+
+	def add(self, name: str, values: tuple) -> None:
+		"""Adds a record to the buffer, flushes the buffer when it is full.
+
+		Args:
+				name: Precomputed primary key of the record.
+				values: Decoded record values in the order of `columns`.
+		"""
+		# Duplicated keys inside a batch are collapsed, the last record wins
+		self.buffer[name] = values
+		if len(self.buffer) >= self.chunk_size:
+			self.flush()
+
+	def flush(self) -> None:
+		"""Writes the buffered records to the database."""
+		if not self.buffer or not self.columns:
+			return
+
+		records = self.buffer
+		hashes = None
+		if self.fingerprint:
+			records, hashes = self._skip_unchanged(records)
+
+		timestamp = now()
+		user = frappe.session.user
+		casts = self.casts
+		datum_index = self.datum_index
+		values = []
+		for name, record in records.items():
+			row = [name, user, timestamp, timestamp, user, 0, 0]
+			row.extend(record[index] if convert is None else convert(record[index]) for index, convert in casts)
+			if self.set_dates:
+				date_fields = get_date_fields(record[datum_index])
+				row.extend(date_fields[field] for field in self.date_fields)
+			if hashes:
+				row.append(hashes[name])
+			values.append(row)
+
+		if values:
+			fields = STANDARD_FIELDS + self.columns
+			if hashes:
+				fields = [*fields, ROW_HASH_FIELD]
+			with self._measure("write"):
+				if self.upsert:
+					self._upsert(fields, values)
+				else:
+					frappe.db.bulk_insert(
+						self.table, fields, values, ignore_duplicates=True, chunk_size=self.chunk_size
+					)
+			self.count += len(values)
+		self.buffer.clear()
+
+	def _skip_unchanged(self, records: dict[str, tuple]) -> tuple[dict[str, tuple], dict[str, str]]:
+		"""Drops the records whose fingerprint matches the stored one and counts the outcome.
+
+		Returns:
+				tuple: The new or changed records and the fingerprints of the buffered records.
+		"""
+		hashes = {name: get_row_hash(values) for name, values in records.items()}
+
+		table = frappe.qb.DocType(self.table)
+		query = frappe.qb.from_(table).select(table.name, table[ROW_HASH_FIELD]).where(table.name.isin(list(records)))
+		with self._measure("write"):
+			stored = dict(query.run())
+
+		changed = {name: values for name, values in records.items() if stored.get(name) != hashes[name]}
+		inserted = sum(1 for name in changed if name not in stored)
+		self.inserted += inserted
+		self.updated += len(changed) - inserted
+		self.unchanged += len(records) - len(changed)
+		return changed, hashes
+
+	def _measure(self, stage: str) -> AbstractContextManager:
+		return self.stats.measure(stage) if self.stats else nullcontext()
+
+	def _upsert(self, fields: list[str], values: list[list]) -> None:
+		"""Inserts the records and overwrites the ones which already exist."""
+		table = frappe.qb.DocType(self.table)
+		query = frappe.qb.into(table).columns(*fields).insert(*values)
+		update_fields = [field for field in fields if field not in INSERT_ONLY_FIELDS]
+
+		if frappe.db.db_type == "postgres":
+			query = query.on_conflict(table.name)
+			for field in update_fields:
+				query = query.do_update(table[field])
+		else:
+			for field in update_fields:
+				query = query.on_duplicate_key_update(table[field], Values(table[field]))
+
+		query.run()
+
+	def _set_columns(self, columns: list[str]) -> None:
+		"""Selects the DBase fields which have a column in the doctype table and their casts."""
+		meta = frappe.get_meta(self.doctype)
+		valid_columns = set(meta.get_valid_columns()) - set(STANDARD_FIELDS)
+
+		# (record index, cast) pairs of the written columns
+		self.casts: list[tuple[int, Callable[[Any], Any] | None]] = []
+		self.columns: list[str] = []
+		for index, column in enumerate(columns):
+			if column not in valid_columns or (self.skip_date_fields and column in DATE_FIELDS):
+				continue
+			df = meta.get_field(column)
+			self.casts.append((index, _get_cast(df.fieldtype) if df and df.fieldtype in CAST_FIELDTYPES else None))
+			self.columns.append(column)
+
+		# without the triggers the date fields are derived from `datum` like in `set_dates` of the doctypes
+		self.date_fields: list[str] = []
+		self.datum_index = columns.index("datum") if self.set_dates else None
+		if self.set_dates:
+			self.date_fields = [field for field in DATE_FIELDS if field in valid_columns]
+			self.columns += self.date_fields
+
+
+def get_row_hash(values: tuple) -> str:
+	"""Compact fingerprint of the decoded DBase values of a record."""
+	return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+
+def _has_date_triggers(doctype: str) -> bool:
+	# imported here, date_triggers reads the daily doctypes of this module
+	from vir_conto.importer.date_triggers import has_date_triggers
+
+	return has_date_triggers(doctype)
+
+
+def _get_cast(fieldtype: str) -> Callable[[Any], Any]:
+	def convert(value):
+		# Empty DBase values are stored as NULL for dates and as 0 for numbers
+		if value is None or value == "":
+			return None if fieldtype in ("Date", "Datetime") else 0
+		return cast(fieldtype, value)
+
+	return convert
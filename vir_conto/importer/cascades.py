@@ -0,0 +1,46 @@
+import frappe
+
+# Doctype of the stores, the other Conto tables refer to it by `rkod`
+STORE_DOCTYPE = "raktnev"
+
+# Doctypes which keep a copy of the store name (`rnev`) next to their `rkod`
+STORE_NAME_DOCTYPES = ["vir_bolt"]
+
+
+def get_store_names() -> dict[str, str]:
+	"""Name (`rnev`) of every store by `rkod`, the table only has a few dozen records."""
+	return dict(frappe.get_all(STORE_DOCTYPE, fields=["rkod", "rnev"], as_list=True))
+
+
+def get_renamed_stores(before: dict[str, str], after: dict[str, str]) -> list[str]:
+	"""Lists the stores which are new or got another name between two snapshots of raktnev."""
+	return sorted(rkod for rkod, rnev in after.items() if before.get(rkod) != rnev)
+
+
+def cascade_store_names(rkods: list[str]) -> None:
+	"""Copies the current name of the stores into the denormalized `rnev` columns, the caller commits it.
+
+	Every doctype is updated with one UPDATE joined to raktnev, only the records of the
+	stores are touched through the `rkod` index and records which already have the name are skipped.
+	"""
+	if not rkods:
+		return
+
+	for doctype in STORE_NAME_DOCTYPES:
+		if frappe.db.db_type == "postgres":
+			query = f"""
+				UPDATE "tab{doctype}" AS target
+				SET "rnev" = store."rnev"
+				FROM "tab{STORE_DOCTYPE}" AS store
+				WHERE store."rkod" = target."rkod"
+					AND target."rkod" IN %(rkods)s
+					AND target."rnev" IS DISTINCT FROM store."rnev"
+			"""
+		else:
+			query = f"""
+				UPDATE `tab{doctype}` AS target
+				JOIN `tab{STORE_DOCTYPE}` AS store ON store.`rkod` = target.`rkod`
+				SET target.`rnev` = store.`rnev`
+				WHERE target.`rkod` IN %(rkods)s AND NOT target.`rnev` <=> store.`rnev`
+			"""
+		frappe.db.sql(query, {"rkods": tuple(rkods)})
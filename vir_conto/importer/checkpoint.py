@@ -0,0 +1,75 @@
+import frappe
+
+CHECKPOINT_DOCTYPE = "Data Packet Checkpoint"
+
+
+class Checkpoint:
+	"""Import progress of one Conto table of a Data Packet.
+
+	The progress is kept in the `checkpoints` table of the Data Packet and is
+	written with the chunk it belongs to, so a re-run of an interrupted import
+	continues after the last committed chunk.
+	"""
+
+	def __init__(self, packet: str, table_name: str, chunk_size: int):
+		"""
+		Args:
+				packet: Name of the Data Packet.
+				table_name: Name of the Conto table (Primary Key).
+				chunk_size: Number of DBase records committed at once.
+		"""
+		self.packet = packet
+		self.table_name = table_name
+		self.chunk_size = chunk_size
+
+		row = frappe.db.get_value(
+			CHECKPOINT_DOCTYPE,
+			{"parenttype": "Data Packet", "parent": packet, "table_name": table_name},
+			["name", "status", "record_offset"],
+			as_dict=True,
+		)
+		if row:
+			self.name, self.status, self.offset = row.name, row.status, row.record_offset or 0
+		else:
+			self.name, self.status, self.offset = self._insert(), "Pending", 0
+
+	@property
+	def completed(self) -> bool:
+		# superseded tables are replaced by a newer packet, unchanged ones equal the last imported member
+		return self.status in ("Completed", "Superseded", "Unchanged")
+
+	def save(self, offset: int, status: str = "In Progress") -> None:
+		"""Records the committed offset, the caller commits it together with the chunk."""
+		self.offset, self.status = offset, status
+		frappe.db.set_value(
+			CHECKPOINT_DOCTYPE,
+			self.name,
+			{"record_offset": offset, "status": status, "chunk_size": self.chunk_size},
+			update_modified=False,
+		)
+
+	def set_member_hash(self, member_hash: str) -> None:
+		frappe.db.set_value(CHECKPOINT_DOCTYPE, self.name, "member_hash", member_hash, update_modified=False)
+
+	def _insert(self) -> str:
+		idx = frappe.db.count(CHECKPOINT_DOCTYPE, {"parenttype": "Data Packet", "parent": self.packet})
+		doc = frappe.get_doc(
+			{
+				"doctype": CHECKPOINT_DOCTYPE,
+				"parenttype": "Data Packet",
+				"parentfield": "checkpoints",
+				"parent": self.packet,
+				"idx": idx + 1,
+				"table_name": self.table_name,
+				"status": "Pending",
+				"record_offset": 0,
+				"chunk_size": self.chunk_size,
+			}
+		)
+		doc.db_insert()
+		return doc.name
+
+
+def clear_checkpoints(packet: str) -> None:
+	"""Removes the progress of a Data Packet, the next import starts from the beginning."""
+	frappe.db.delete(CHECKPOINT_DOCTYPE, {"parenttype": "Data Packet", "parent": packet})
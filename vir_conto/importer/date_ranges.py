@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+import frappe
+
+from vir_conto.importer.bulk import BULK_CHUNK_SIZE
+from vir_conto.importer.dates import to_date
+from vir_conto.importer.dbf_reader import DbfReader
+
+# `write_mode` options of the Primary Key
+WRITE_MODE_UPSERT = "Upsert"
+WRITE_MODE_DATE_RANGE = "Date Range Replace"
+
+# Fields which identify the window of a store in the daily tables
+STORE_FIELD = "rkod"
+DATE_FIELD = "datum"
+
+
+def supports_date_ranges(field_names: list[str]) -> bool:
+	"""Tells if a DBase table has the store and date fields of the date range replace mode."""
+	columns = {field.lower() for field in field_names}
+	return STORE_FIELD in columns and DATE_FIELD in columns
+
+
+def get_date_ranges(
+	table: DbfReader, batch_size: int = BULK_CHUNK_SIZE, stop: int | None = None
+) -> dict[str, tuple[date, date]]:
+	"""Reads the first and last `datum` of every store (`rkod`) in a daily DBase table.
+
+	Only the two fields are decoded, the other fields of the records are skipped.
+
+	Args:
+			table: Opened DBase table, it is read from its current position.
+			batch_size: Number of records decoded at once.
+			stop: Number of records read from the start of the table. Defaults to every record.
+
+	Returns:
+			dict: First and last date by store.
+	"""
+	fields = {field.lower(): field for field in table.field_names}
+	ranges: dict[str, tuple] = {}
+	for batch in table.iter_batches([fields[STORE_FIELD], fields[DATE_FIELD]], batch_size=batch_size, stop=stop):
+		for rkod, datum in batch:
+			extend_date_range(ranges, rkod, datum)
+	return ranges
+
+
+def extend_date_range(ranges: dict[str, tuple[date, date]], rkod: str, datum: str | date | None) -> None:
+	"""Widens the date range of a store to include a date, empty dates are ignored."""
+	if not datum:
+		return
+	datum = to_date(datum)
+	first, last = ranges.get(rkod, (datum, datum))
+	ranges[rkod] = (min(first, datum), max(last, datum))
+
+
+def merge_date_ranges(ranges: dict[str, tuple[date, date]], other: dict[str, tuple[date, date]]) -> None:
+	"""Widens the date ranges of the stores to include the ranges of `other`."""
+	for rkod, (first, last) in other.items():
+		extend_date_range(ranges, rkod, first)
+		extend_date_range(ranges, rkod, last)
+
+
+class DateRangeDeleter:
+	"""Deletes the date ranges of the stores chunk by chunk, while a daily table is written.
+
+	The ranges of a chunk are deleted before its records are inserted. Only the dates outside
+	the range deleted so far are removed, so the records of the earlier chunks are kept.
+	"""
+
+	def __init__(self, doctype: str, deleted: dict[str, tuple[date, date]] | None = None):
+		"""
+		Args:
+				doctype: Daily doctype whose records are replaced.
+				deleted: Ranges deleted before, e.g. by the chunks before a checkpoint. Defaults to None.
+		"""
+		self.doctype = doctype
+		self.deleted: dict[str, tuple[date, date]] = dict(deleted or {})
+
+	def delete(self, ranges: dict[str, tuple[date, date]]) -> None:
+		"""Deletes the dates of the ranges which are not deleted yet, the caller commits it with the chunk."""
+		for rkod, (first, last) in ranges.items():
+			if rkod not in self.deleted:
+				_delete_range(self.doctype, rkod, first, last)
+				self.deleted[rkod] = (first, last)
+				continue
+
+			deleted_first, deleted_last = self.deleted[rkod]
+			if first < deleted_first:
+				_delete_range(self.doctype, rkod, first, deleted_first - timedelta(days=1))
+			if last > deleted_last:
+				_delete_range(self.doctype, rkod, deleted_last + timedelta(days=1), last)
+			self.deleted[rkod] = (min(first, deleted_first), max(last, deleted_last))
+
+
+def _delete_range(doctype: str, rkod: str, first: date, last: date) -> None:
+	# one range delete on the indexed `rkod` and `datum` columns
+	frappe.db.delete(doctype, {STORE_FIELD: rkod, DATE_FIELD: ("between", [first, last])})
@@ -0,0 +1,112 @@
+import frappe
+
+from vir_conto.importer.bulk import DATE_FIELD_DOCTYPES
+
+# The columns are set before every insert and update, whoever writes the record
+TRIGGER_EVENTS = ("INSERT", "UPDATE")
+
+# Savepoint of the trigger creation, a failed one does not abort the migrate
+TRIGGER_SAVEPOINT = "vc_date_triggers"
+
+# Postgres trigger function shared by the daily tables
+TRIGGER_FUNCTION = "vc_set_date_fields"
+
+MARIADB_TRIGGER_BODY = (
+	"SET NEW.`ev` = YEAR(NEW.`datum`), NEW.`ho` = MONTH(NEW.`datum`), "
+	"NEW.`ho_nap` = MONTH(NEW.`datum`) * 100 + DAYOFMONTH(NEW.`datum`)"
+)
+
+POSTGRES_TRIGGER_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION {TRIGGER_FUNCTION}() RETURNS trigger AS $$
+BEGIN
+	NEW.ev := EXTRACT(YEAR FROM NEW.datum);
+	NEW.ho := EXTRACT(MONTH FROM NEW.datum);
+	NEW.ho_nap := EXTRACT(MONTH FROM NEW.datum) * 100 + EXTRACT(DAY FROM NEW.datum);
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def get_trigger_name(doctype: str, event: str) -> str:
+	return f"vc_{doctype}_dates_{event.lower()}"
+
+
+def sync_date_triggers() -> list[str]:
+	"""Creates the triggers which derive `ev`, `ho` and `ho_nap` from `datum` in the daily tables.
+
+	Missing or outdated triggers are (re)created, up-to-date ones are left alone. On MariaDB
+	with binary logging the database user needs the SUPER privilege or
+	`log_bin_trust_function_creators` to create triggers. A failure is logged and the
+	table is left without triggers, the BulkWriter and `set_dates` of the doctypes fill
+	the fields instead.
+
+	Returns:
+			list: Doctypes whose triggers were created.
+	"""
+	changed = []
+	for doctype in sorted(DATE_FIELD_DOCTYPES):
+		if not frappe.db.table_exists(doctype) or has_date_triggers(doctype):
+			continue
+		try:
+			if frappe.db.db_type == "postgres":
+				frappe.db.savepoint(TRIGGER_SAVEPOINT)
+			create_date_triggers(doctype)
+			changed.append(doctype)
+		except Exception as e:
+			# Postgres aborts the transaction on a failed DDL, MariaDB commits before running it
+			if frappe.db.db_type == "postgres":
+				frappe.db.rollback(save_point=TRIGGER_SAVEPOINT)
+			logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+			logger.error(f"Date triggers of {doctype} could not be created, the fields are set by the app: {e}")
+	return changed
+
+
+def has_date_triggers(doctype: str) -> bool:
+	"""Tells if the date triggers of a daily table exist with the current definition."""
+	if frappe.db.db_type == "postgres":
+		triggers = frappe.db.sql(
+			"""
+			SELECT trigger.tgname
+			FROM pg_trigger AS trigger
+			JOIN pg_class AS table_class ON table_class.oid = trigger.tgrelid
+			WHERE table_class.relname = %(table)s AND trigger.tgname = %(name)s
+			""",
+			{"table": f"tab{doctype}", "name": get_trigger_name(doctype, "write")},
+		)
+		return bool(triggers)
+
+	triggers = dict(
+		frappe.db.sql(
+			"""
+			SELECT TRIGGER_NAME, ACTION_STATEMENT
+			FROM information_schema.TRIGGERS
+			WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %(table)s
+			""",
+			{"table": f"tab{doctype}"},
+		)
+	)
+	return all(triggers.get(get_trigger_name(doctype, event)) == MARIADB_TRIGGER_BODY for event in TRIGGER_EVENTS)
+
+
+def create_date_triggers(doctype: str) -> None:
+	"""Replaces the date triggers of a daily table.
+
+	On MariaDB the DDL commits the open transaction. Postgres DDL is transactional, it runs
+	in the open transaction so a failure can be rolled back to the savepoint of `sync_date_triggers`.
+	"""
+	table = f"tab{doctype}"
+	if frappe.db.db_type == "postgres":
+		name = get_trigger_name(doctype, "write")
+		frappe.db.sql(POSTGRES_TRIGGER_FUNCTION)
+		frappe.db.sql(f'DROP TRIGGER IF EXISTS "{name}" ON "{table}"')
+		frappe.db.sql(
+			f'CREATE TRIGGER "{name}" BEFORE INSERT OR UPDATE ON "{table}" '
+			f"FOR EACH ROW EXECUTE FUNCTION {TRIGGER_FUNCTION}()"
+		)
+		return
+
+	for event in TRIGGER_EVENTS:
+		name = get_trigger_name(doctype, event)
+		frappe.db.sql_ddl(f"DROP TRIGGER IF EXISTS `{name}`")
+		frappe.db.sql_ddl(f"CREATE TRIGGER `{name}` BEFORE {event} ON `{table}` FOR EACH ROW {MARIADB_TRIGGER_BODY}")
@@ -0,0 +1,26 @@
+from datetime import date
+
+from frappe.utils import cast
+
+
+def get_date_fields(datum: str | date) -> dict[str, int]:
+	"""Splits a C-Conto date into the `ev`, `ho` and `ho_nap` fields.
+
+	Args:
+			datum: Date as a `date` or as a string like '2025.03.22'.
+
+	Returns:
+			dict: Year, month and month-day (e.g. 322) of the date.
+	"""
+	value = to_date(datum)
+	return {"ev": value.year, "ho": value.month, "ho_nap": value.month * 100 + value.day}
+
+
+def to_date(datum: str | date) -> date:
+	"""Converts a C-Conto date, the 'YYYY.MM.DD' form of the DBase tables is parsed without `cast`."""
+	if isinstance(datum, str) and len(datum) == 10 and datum[4] == datum[7] == ".":
+		try:
+			return date(int(datum[:4]), int(datum[5:7]), int(datum[8:]))
+		except ValueError:
+			pass
+	return cast("Date", datum)
@@ -0,0 +1,211 @@
+import datetime
+import struct
+from collections.abc import Callable, Iterator
+from typing import IO, Any, NamedTuple
+
+HEADER_SIZE = 32
+DESCRIPTOR_SIZE = 32
+HEADER_TERMINATOR = 0x0D
+DELETED = b"*"
+
+BOOLEANS = {b"T": True, b"Y": True, b"F": False, b"N": False}
+
+# Number of records decoded from one read of the stream
+BATCH_SIZE = 2000
+
+
+class DbfError(Exception):
+	"""Raised when a stream is not a readable DBase table."""
+
+
+class DbfField(NamedTuple):
+	name: str
+	type: str
+	length: int
+	decimals: int
+	offset: int
+
+
+class DbfReader:
+	"""Sequential reader for the fixed-width DBase tables exported by C-Conto.
+
+	The table is read front to back from a binary stream, so it can be read
+	directly from a member of the packet archive without extracting it.
+	The header is parsed once and every field gets a column converter,
+	records are then decoded column by column in batches read from the stream.
+
+	String values are trimmed, memo fields are not supported and their value
+	is always an empty string.
+	"""
+
+	def __init__(self, stream: IO[bytes], encoding: str):
+		self.stream = stream
+		self.encoding = encoding
+
+		header = self._read(HEADER_SIZE)
+		self.record_count, header_length, self.record_length = struct.unpack("<IHH", header[4:12])
+
+		descriptors = self._read(header_length - HEADER_SIZE)
+		self.fields: list[DbfField] = []
+		offset = 1  # the first byte of every record is the deletion flag
+		for start in range(0, len(descriptors), DESCRIPTOR_SIZE):
+			if descriptors[start] == HEADER_TERMINATOR:
+				break
+			descriptor = descriptors[start : start + DESCRIPTOR_SIZE]
+			name = descriptor[:11].split(b"\0", 1)[0].decode("ascii").strip()
+			length, decimals = descriptor[16], descriptor[17]
+			self.fields.append(DbfField(name, chr(descriptor[11]), length, decimals, offset))
+			offset += length
+
+		if offset != self.record_length:
+			raise DbfError(f"Corrupt DBase header, fields take {offset} bytes of {self.record_length}")
+
+		self.converters = {field.name: self._get_converter(field) for field in self.fields}
+		# Number of records read from the stream, deleted ones included
+		self.position = 0
+
+	@property
+	def field_names(self) -> list[str]:
+		return [field.name for field in self.fields]
+
+	def __len__(self) -> int:
+		return self.record_count
+
+	def __iter__(self) -> Iterator[dict]:
+		"""Yields the active records as dictionaries keyed by the DBase field names."""
+		names = self.field_names
+		for batch in self.iter_batches():
+			for values in batch:
+				yield dict(zip(names, values, strict=True))
+
+	def iter_batches(
+		self,
+		field_names: list[str] | None = None,
+		batch_size: int = BATCH_SIZE,
+		start: int = 0,
+		stop: int | None = None,
+	) -> Iterator[list[tuple]]:
+		"""Yields the active records in batches of tuples.
+
+		The records of a batch are split into columns with a single compiled struct,
+		unselected fields are skipped as padding. Every column is then decoded at once.
+		Every batch is read from `batch_size` records of the table, deleted ones included.
+		The stream is only read forward, a later call continues after the records read so far.
+
+		Args:
+				field_names: DBase fields to decode, in the order of the tuple values. Defaults to every field.
+				batch_size: Number of records read from the stream at once.
+				start: Number of records skipped without decoding them, e.g. the ones already imported.
+				stop: Number of records read from the start of the table. Defaults to every record.
+		"""
+		by_name = {field.name: field for field in self.fields}
+		selected = [by_name[name] for name in field_names] if field_names is not None else self.fields
+		positions = {field.name: position for position, field in enumerate(selected)}
+
+		# Fields are unpacked in the order of the record, then reordered to the requested order
+		layout = ["c"]
+		unpacked = []
+		for field in self.fields:
+			if field.name in positions:
+				layout.append(f"{field.length}s")
+				unpacked.append(field)
+			else:
+				layout.append(f"{field.length}x")
+		record_struct = struct.Struct("<" + "".join(layout))
+		order = sorted(range(len(unpacked)), key=lambda index: positions[unpacked[index].name])
+		converters = [self.converters[unpacked[index].name] for index in order]
+
+		self._skip(start, batch_size)
+		stop = self.record_count if stop is None else min(stop, self.record_count)
+		while self.position < stop:
+			count = min(batch_size, stop - self.position)
+			data = self._read(count * self.record_length)
+			self.position += count
+
+			records = [record for record in record_struct.iter_unpack(data) if record[0] != DELETED]
+			if not records:
+				yield []
+				continue
+			if not selected:
+				yield [()] * len(records)
+				continue
+
+			raw_columns = list(zip(*records, strict=True))
+			columns = [convert(raw_columns[index + 1]) for index, convert in zip(order, converters, strict=True)]
+			yield list(zip(*columns, strict=True))
+
+	def _skip(self, start: int, batch_size: int) -> None:
+		"""Reads past the records before `start` which were not read yet."""
+		start = min(start, self.record_count)
+		while self.position < start:
+			block = min(batch_size, start - self.position)
+			self._read(block * self.record_length)
+			self.position += block
+
+	def _read(self, size: int) -> bytes:
+		data = self.stream.read(size)
+		if len(data) != size:
+			raise DbfError(f"Unexpected end of DBase table, expected {size} bytes got {len(data)}")
+		return data
+
+	def _get_converter(self, field: DbfField) -> Callable[[tuple[bytes, ...]], list]:
+		"""Creates the function which decodes the raw values of a column."""
+		encoding = self.encoding
+
+		if field.type == "C":
+
+			def convert_str(column):
+				# The blank padding is stripped from the raw bytes, then the whole column is decoded in one call,
+				# the separator can't be part of a C-Conto string
+				column = [value.strip() for value in column]
+				values = b"\0".join(column).decode(encoding).split("\0")
+				if len(values) != len(column):
+					values = [value.decode(encoding) for value in column]
+				return values
+
+			return convert_str
+
+		if field.type in ("N", "F"):
+			number = int if field.decimals == 0 and field.type == "N" else float
+
+			def convert_number(column):
+				try:
+					return list(map(number, column))
+				except ValueError:
+					pass
+
+				values = []
+				for value in column:
+					try:
+						values.append(number(value))
+					except ValueError:
+						# empty or overflowed ('****') values
+						values.append(None)
+				return values
+
+			return convert_number
+
+		if field.type == "D":
+
+			def convert_date(column):
+				values = []
+				for value in column:
+					try:
+						values.append(datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8])))
+					except ValueError:
+						# empty or invalid ('00000000') dates
+						values.append(None)
+				return values
+
+			return convert_date
+
+		if field.type == "L":
+			return lambda column: [BOOLEANS.get(value.strip().upper()) for value in column]
+
+		if field.type == "I":
+			return lambda column: [int.from_bytes(value, "little", signed=True) for value in column]
+
+		if field.type == "M":
+			return lambda column: [""] * len(column)
+
+		raise DbfError(f"Unsupported DBase field type '{field.type}' in field {field.name}")
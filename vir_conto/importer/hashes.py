@@ -0,0 +1,84 @@
+import hashlib
+from typing import IO
+
+import frappe
+
+# Bytes read at once while hashing, archives and members are never loaded into memory as a whole
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# Bytes 1-3 of a DBase header hold the date of the last update, C-Conto writes it on every export
+DBF_DATE_START = 1
+DBF_DATE_END = 4
+
+
+def get_stream_hash(stream: IO[bytes]) -> str:
+	"""SHA-256 of a binary stream, read in chunks."""
+	digest = hashlib.sha256()
+	_update_digest(digest, stream)
+	return digest.hexdigest()
+
+
+def get_dbf_hash(stream: IO[bytes]) -> str:
+	"""SHA-256 of a DBase table without the date of its last update, read in chunks.
+
+	The same records exported on different days have the same hash.
+	"""
+	return DbfHashStream(stream).hexdigest()
+
+
+class DbfHashStream:
+	"""Binary stream wrapper which hashes a DBase table while it is read, like `get_dbf_hash`.
+
+	The import hashes a member during its single read, it is not decompressed again for the hash.
+	"""
+
+	def __init__(self, stream: IO[bytes]):
+		self.stream = stream
+		self.digest = hashlib.sha256()
+		self.position = 0
+
+	def read(self, size: int = -1) -> bytes:
+		data = self.stream.read(size)
+		start = self.position
+		self.position += len(data)
+		if start >= DBF_DATE_END:
+			self.digest.update(data)
+		else:
+			# the date of the last update is left out
+			self.digest.update(data[: max(DBF_DATE_START - start, 0)])
+			self.digest.update(data[DBF_DATE_END - start :])
+		return data
+
+	def hexdigest(self) -> str:
+		"""Reads the rest of the table, e.g. its end of file marker, and returns the hash."""
+		while self.read(HASH_CHUNK_SIZE):
+			pass
+		return self.digest.hexdigest()
+
+
+def _update_digest(digest: "hashlib._Hash", stream: IO[bytes]) -> None:
+	while chunk := stream.read(HASH_CHUNK_SIZE):
+		digest.update(chunk)
+
+
+def get_file_hash(path: str) -> str:
+	with open(path, "rb") as file:
+		return get_stream_hash(file)
+
+
+def set_last_import_hash(table_name: str, member_hash: str | None) -> None:
+	"""Records the content hash of the DBase member last imported into a Conto table, the caller commits it."""
+	frappe.db.set_value("Primary Key", table_name, "last_import_hash", member_hash, update_modified=False)
+
+
+def reset_import_hashes(doctypes: list[str] | set[str]) -> None:
+	"""Forgets the imported content of doctypes changed by other means, their next member is imported again."""
+	if doctypes:
+		frappe.db.set_value(
+			"Primary Key",
+			{"frappe_name": ("in", list(doctypes))},
+			"last_import_hash",
+			None,
+			update_modified=False,
+		)
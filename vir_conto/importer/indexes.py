@@ -0,0 +1,211 @@
+import frappe
+
+# Hook with the composite indexes of the Conto doctypes, see `vir_conto_indexes` in hooks.py
+INDEX_HOOK = "vir_conto_indexes"
+
+# Indexes created by vir_conto are recognized by their name, other indexes are never touched
+INDEX_PREFIX = "vc_"
+
+
+def get_declared_indexes() -> dict[str, dict[str, list[str]]]:
+	"""Composite indexes of the `vir_conto_indexes` hooks by doctype and key, the column order is kept."""
+	return {
+		doctype: {key: list(columns) for key, columns in indexes.items()}
+		for doctype, indexes in (frappe.get_hooks(INDEX_HOOK) or {}).items()
+	}
+
+
+def sync_indexes(declared: dict[str, dict[str, list[str]]] | None = None) -> dict[str, list[str]]:
+	"""Creates the declared indexes and drops the managed indexes which are changed or no longer declared.
+
+	Every doctype of the Vir Conto module is checked, so removing a doctype from the
+	hook also removes its indexes. Only indexes named with `INDEX_PREFIX` are dropped.
+
+	Args:
+			declared: Indexes by doctype and key, defaults to the `vir_conto_indexes` hooks.
+
+	Returns:
+			dict: Changes of the doctypes as `+name` and `-name` items, unchanged doctypes are left out.
+	"""
+	if declared is None:
+		declared = get_declared_indexes()
+
+	doctypes = set(declared) | set(
+		frappe.get_all("DocType", filters={"module": "Vir Conto", "issingle": 0, "istable": 0}, pluck="name")
+	)
+	changes = {}
+	for doctype in sorted(doctypes):
+		if changed := sync_table_indexes(doctype, declared.get(doctype, {})):
+			changes[doctype] = changed
+	return changes
+
+
+def sync_table_indexes(doctype: str, indexes: dict[str, list[str]]) -> list[str]:
+	"""Reconciles the managed indexes of a doctype table with its declared indexes.
+
+	On MariaDB all changes are made by one online `ALTER TABLE` (`ALGORITHM=INPLACE, LOCK=NONE`),
+	reads and writes of the table go on while the indexes are built. Postgres builds
+	them with `CREATE INDEX`, which blocks writes until it is finished.
+
+	Args:
+			doctype: Doctype whose table is changed.
+			indexes: Columns of the declared indexes by key.
+
+	Returns:
+			list: Dropped (`-name`) and added (`+name`) indexes.
+	"""
+	if not frappe.db.table_exists(doctype):
+		return []
+
+	wanted = {}
+	for key, columns in indexes.items():
+		missing = [column for column in columns if not frappe.db.has_column(doctype, column)]
+		if missing:
+			logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+			logger.warning(f"Index {key} of {doctype} is skipped, unknown columns: {', '.join(missing)}")
+			continue
+		wanted[get_index_name(doctype, key)] = columns
+
+	existing = {name: columns for name, columns in get_table_indexes(doctype).items() if name.startswith(INDEX_PREFIX)}
+	drops = [name for name, columns in existing.items() if wanted.get(name) != columns]
+	adds = [name for name, columns in wanted.items() if existing.get(name) != columns]
+	if not drops and not adds:
+		return []
+
+	table = f"tab{doctype}"
+	if frappe.db.db_type == "postgres":
+		for name in drops:
+			frappe.db.sql_ddl(f'DROP INDEX IF EXISTS "{name}"')
+		for name in adds:
+			columns = ", ".join(f'"{column}"' for column in wanted[name])
+			frappe.db.sql_ddl(f'CREATE INDEX "{name}" ON "{table}" ({columns})')
+	else:
+		clauses = [f"DROP INDEX `{name}`" for name in drops]
+		clauses += [f"ADD INDEX `{name}` ({', '.join(f'`{column}`' for column in wanted[name])})" for name in adds]
+		frappe.db.sql_ddl(f"ALTER TABLE `{table}` {', '.join(clauses)}, ALGORITHM=INPLACE, LOCK=NONE")
+
+	return [f"-{name}" for name in drops] + [f"+{name}" for name in adds]
+
+
+def get_index_name(doctype: str, key: str) -> str:
+	"""Name of a managed index, Postgres index names are unique in the whole schema so they include the doctype."""
+	if frappe.db.db_type == "postgres":
+		return f"{INDEX_PREFIX}{doctype}_{key}"
+	return f"{INDEX_PREFIX}{key}"
+
+
+def get_table_indexes(doctype: str) -> dict[str, list[str]]:
+	"""Columns of every index of a doctype table by index name, in index order."""
+	if frappe.db.db_type == "postgres":
+		rows = frappe.db.sql(
+			"""
+			SELECT index_class.relname AS key_name, attribute.attname AS column_name
+			FROM pg_index AS idx
+			JOIN pg_class AS table_class ON table_class.oid = idx.indrelid
+			JOIN pg_class AS index_class ON index_class.oid = idx.indexrelid
+			JOIN LATERAL unnest(idx.indkey) WITH ORDINALITY AS keys(attnum, position) ON TRUE
+			JOIN pg_attribute AS attribute
+				ON attribute.attrelid = table_class.oid AND attribute.attnum = keys.attnum
+			WHERE table_class.relname = %(table)s
+			ORDER BY index_class.relname, keys.position
+			""",
+			{"table": f"tab{doctype}"},
+			as_dict=True,
+		)
+	else:
+		rows = frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True)
+		rows = [frappe._dict(key_name=row.Key_name, column_name=row.Column_name) for row in rows]
+
+	indexes: dict[str, list[str]] = {}
+	for row in rows:
+		indexes.setdefault(row.key_name, []).append(row.column_name)
+	return indexes
+
+
+def get_index_usage(doctypes: list[str]) -> list[dict]:
+	"""Lists the indexes of doctype tables with their size and the number of rows read through them.
+
+	On MariaDB the sizes come from `mysql.innodb_index_stats`, they are None if the database
+	user has no privileges on the `mysql` schema, as on a standard bench. The reads come from
+	`information_schema.INDEX_STATISTICS`, which is only collected while the `userstat`
+	server variable is on, otherwise they are None.
+	The counters start again when the database server restarts.
+
+	Args:
+			doctypes: Doctypes whose indexes are listed.
+
+	Returns:
+			list: Doctype, index name, columns, whether it is managed by vir_conto,
+			size in bytes and rows read for every index.
+	"""
+	usage = []
+	for doctype in doctypes:
+		if not frappe.db.table_exists(doctype):
+			continue
+		statistics = _get_index_statistics(doctype)
+		for name, columns in get_table_indexes(doctype).items():
+			size, reads = statistics.get(name, (None, None))
+			usage.append(
+				frappe._dict(
+					doctype=doctype,
+					index=name,
+					columns=columns,
+					managed=name.startswith(INDEX_PREFIX),
+					size=size,
+					reads=reads,
+				)
+			)
+	return usage
+
+
+def _get_index_statistics(doctype: str) -> dict[str, tuple[int | None, int | None]]:
+	table = f"tab{doctype}"
+	if frappe.db.db_type == "postgres":
+		rows = frappe.db.sql(
+			"""
+			SELECT indexrelname, pg_relation_size(indexrelid), idx_tup_read
+			FROM pg_stat_user_indexes
+			WHERE relname = %(table)s
+			""",
+			{"table": table},
+		)
+		return {name: (size, reads) for name, size, reads in rows}
+
+	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+	try:
+		sizes = frappe.db.sql(
+			"""
+			SELECT index_name, stat_value * @@innodb_page_size
+			FROM mysql.innodb_index_stats
+			WHERE database_name = DATABASE() AND table_name = %(table)s AND stat_name = 'size'
+			""",
+			{"table": table},
+		)
+	except Exception as e:
+		# the database user of a site usually has no privileges on the `mysql` schema
+		logger.warning(f"Index sizes of {doctype} are unavailable: {e}")
+		sizes = []
+
+	reads = None
+	if frappe.db.sql("SELECT @@userstat")[0][0]:
+		try:
+			reads = frappe.db.sql(
+				"""
+				SELECT INDEX_NAME, ROWS_READ
+				FROM information_schema.INDEX_STATISTICS
+				WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %(table)s
+				""",
+				{"table": table},
+			)
+		except Exception as e:
+			logger.warning(f"Index reads of {doctype} are unavailable: {e}")
+
+	statistics = {name: (int(size), None) for name, size in sizes}
+	if reads is None:
+		return statistics
+
+	# unused indexes have no row in INDEX_STATISTICS
+	statistics = {name: (statistics.get(name, (None, None))[0], 0) for name in get_table_indexes(doctype)}
+	for name, rows_read in reads:
+		statistics[name] = (statistics.get(name, (None, 0))[0], rows_read)
+	return statistics
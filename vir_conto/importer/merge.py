@@ -0,0 +1,56 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+from collections.abc import Iterator
+
+from vir_conto.importer.bulk import BULK_CHUNK_SIZE
+
+
+class MergeStore:
+	"""Latest record of every primary key across several Data Packets, kept in a temporary SQLite file.
+
+	A record overwrites the earlier one with the same key, so adding the packets
+	oldest first gives last-packet-wins semantics. Memory use does not depend on
+	the number of records, use the store as a context manager to remove the file.
+	"""
+
+	def __init__(self, directory: str | None = None):
+		"""
+		Args:
+				directory: Directory of the temporary file. Defaults to the system temp directory.
+		"""
+		handle, self.path = tempfile.mkstemp(prefix="vir_conto_merge_", suffix=".sqlite", dir=directory)
+		os.close(handle)
+		self.connection = sqlite3.connect(self.path)
+		# the file is thrown away after the import, it doesn't have to survive a crash
+		self.connection.execute("PRAGMA journal_mode = OFF")
+		self.connection.execute("PRAGMA synchronous = OFF")
+		self.connection.execute("CREATE TABLE records (name TEXT PRIMARY KEY, data BLOB)")
+
+	def __enter__(self) -> "MergeStore":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def __len__(self) -> int:
+		return self.connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+	def add(self, records: list[tuple[str, dict]]) -> None:
+		"""Stores a batch of (name, row) pairs, replacing the stored rows with the same name."""
+		self.connection.executemany(
+			"INSERT OR REPLACE INTO records (name, data) VALUES (?, ?)",
+			((name, pickle.dumps(row, pickle.HIGHEST_PROTOCOL)) for name, row in records),
+		)
+
+	def iter_batches(self, batch_size: int = BULK_CHUNK_SIZE) -> Iterator[list[tuple[str, dict]]]:
+		"""Yields the merged (name, row) pairs in batches."""
+		cursor = self.connection.execute("SELECT name, data FROM records")
+		while rows := cursor.fetchmany(batch_size):
+			yield [(name, pickle.loads(data)) for name, data in rows]
+
+	def close(self) -> None:
+		self.connection.close()
+		if os.path.exists(self.path):
+			os.remove(self.path)
@@ -0,0 +1,130 @@
+import frappe
+from frappe.utils import getdate
+
+from vir_conto.importer.bulk import DATE_FIELD_DOCTYPES
+
+# Every year of `datum` has a partition, later dates fall into the catch-all partition
+PARTITION_EXPRESSION = "YEAR(`datum`)"
+FUTURE_PARTITION = "pfuture"
+
+# Tables of archived partitions are named like `tabvir_bolt__2019`
+ARCHIVE_SUFFIX = "__{year}"
+
+
+def get_partitions(doctype: str) -> list[frappe._dict]:
+	"""Lists the partitions of a doctype table in order, empty if the table is not partitioned.
+
+	Returns:
+			list: Name, year (None for the catch-all partition) and estimated number of records of the partitions.
+	"""
+	rows = frappe.db.sql(
+		"""
+		SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS upper_bound, TABLE_ROWS AS records
+		FROM information_schema.PARTITIONS
+		WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %(table)s AND PARTITION_NAME IS NOT NULL
+		ORDER BY PARTITION_ORDINAL_POSITION
+		""",
+		{"table": f"tab{doctype}"},
+		as_dict=True,
+	)
+	for row in rows:
+		row.year = None if row.upper_bound == "MAXVALUE" else int(row.upper_bound) - 1
+	return rows
+
+
+def partition_table(doctype: str) -> bool:
+	"""Converts a daily table to one partition per year of `datum`, up to the next year.
+
+	MariaDB requires the partitioning column in the primary key, so it becomes
+	(`name`, `datum`). The name of a daily record contains its date, names stay unique.
+	The table is copied once, run it when the site is not used.
+
+	Args:
+			doctype: Daily doctype, one of `DATE_FIELD_DOCTYPES`.
+
+	Returns:
+			bool: False if the table was already partitioned.
+	"""
+	_validate(doctype)
+	if get_partitions(doctype):
+		return False
+
+	first = frappe.db.sql(f"SELECT MIN(`datum`) FROM `tab{doctype}`")[0][0]
+	next_year = getdate().year + 1
+	first_year = min(getdate(first).year, next_year) if first else next_year - 1
+
+	partitions = [_get_partition_definition(year) for year in range(first_year, next_year + 1)]
+	partitions.append(f"PARTITION `{FUTURE_PARTITION}` VALUES LESS THAN MAXVALUE")
+	frappe.db.sql_ddl(
+		f"ALTER TABLE `tab{doctype}` DROP PRIMARY KEY, ADD PRIMARY KEY (`name`, `datum`) "
+		f"PARTITION BY RANGE ({PARTITION_EXPRESSION}) ({', '.join(partitions)})"
+	)
+	return True
+
+
+def add_next_partitions() -> None:
+	"""Creates the partitions of the daily tables up to the next year ahead of time.
+
+	The catch-all partition is split, which is cheap while it is empty. Tables which
+	are not partitioned are skipped. Monthly scheduler event.
+	"""
+	if frappe.db.db_type == "postgres":
+		return
+
+	next_year = getdate().year + 1
+	for doctype in sorted(DATE_FIELD_DOCTYPES):
+		partitions = get_partitions(doctype)
+		years = [partition.year for partition in partitions if partition.year is not None]
+		if not years or max(years) >= next_year:
+			continue
+
+		new_partitions = [_get_partition_definition(year) for year in range(max(years) + 1, next_year + 1)]
+		new_partitions.append(f"PARTITION `{FUTURE_PARTITION}` VALUES LESS THAN MAXVALUE")
+		frappe.db.sql_ddl(
+			f"ALTER TABLE `tab{doctype}` REORGANIZE PARTITION `{FUTURE_PARTITION}` INTO ({', '.join(new_partitions)})"
+		)
+
+
+def remove_partition(doctype: str, year: int, archive: bool = False) -> str | None:
+	"""Removes the records of a year from a partitioned daily table without deleting them one by one.
+
+	The monthly rollups of the year are kept.
+
+	Args:
+			doctype: Partitioned daily doctype.
+			year: Year of the partition, the current and the previous year can't be removed.
+			archive: Move the records to a table of their own instead of dropping them.
+
+	Returns:
+			str | None: Name of the archive table.
+	"""
+	_validate(doctype)
+	if year >= getdate().year - 1:
+		frappe.throw(frappe._("The records of {0} are still used by the default charts").format(year))
+
+	partition = f"p{year}"
+	if partition not in {partition.name for partition in get_partitions(doctype)}:
+		frappe.throw(frappe._("{0} has no partition for {1}").format(doctype, year))
+
+	table = f"tab{doctype}"
+	archive_table = None
+	if archive:
+		archive_table = f"{table}{ARCHIVE_SUFFIX.format(year=year)}"
+		frappe.db.sql_ddl(f"CREATE TABLE `{archive_table}` LIKE `{table}`")
+		frappe.db.sql_ddl(f"ALTER TABLE `{archive_table}` REMOVE PARTITIONING")
+		# swaps the tablespaces, no record is copied
+		frappe.db.sql_ddl(f"ALTER TABLE `{table}` EXCHANGE PARTITION `{partition}` WITH TABLE `{archive_table}`")
+
+	frappe.db.sql_ddl(f"ALTER TABLE `{table}` DROP PARTITION `{partition}`")
+	return archive_table
+
+
+def _get_partition_definition(year: int) -> str:
+	return f"PARTITION `p{year}` VALUES LESS THAN ({year + 1})"
+
+
+def _validate(doctype: str) -> None:
+	if frappe.db.db_type == "postgres":
+		frappe.throw(frappe._("Partitioning is only supported on MariaDB"))
+	if doctype not in DATE_FIELD_DOCTYPES:
+		frappe.throw(frappe._("{0} is not a daily table").format(doctype))
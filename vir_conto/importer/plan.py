@@ -0,0 +1,111 @@
+import operator
+from collections.abc import Callable
+from typing import Any
+
+import frappe
+
+from vir_conto.importer.bulk import STANDARD_FIELDS
+from vir_conto.importer.date_ranges import WRITE_MODE_UPSERT
+
+PRIMARY_KEY_FIELDS = [
+	"name",
+	"frappe_name",
+	"conto_primary_key",
+	"type",
+	"enabled",
+	"updateable",
+	"import_order",
+	"archive_deleted",
+	"last_import_hash",
+	"write_mode",
+]
+
+# Conto table which lists the deleted records of other tables
+TOMBSTONE_TABLE = "torolt"
+
+
+class DoctypePlan:
+	"""Import rules of a Conto table, compiled once from its Primary Key record."""
+
+	def __init__(self, primary_key: dict):
+		self.name: str = primary_key["name"]
+		self.doctype: str = primary_key.get("frappe_name") or self.name
+		self.updateable = bool(primary_key.get("updateable"))
+		self.write_mode: str = primary_key.get("write_mode") or WRITE_MODE_UPSERT
+		self.import_order: int = primary_key.get("import_order") or 0
+		# content hash of the DBase member imported last, see `vir_conto.importer.hashes`
+		self.last_import_hash: str | None = primary_key.get("last_import_hash")
+		self.key_fields = tuple(key.strip() for key in primary_key["conto_primary_key"].split(","))
+		self.get_name = _compile_key_builder(self.key_fields)
+
+		# Selected DBase fields and their doctype columns, filled by `bind`
+		self.fields: list[str] = []
+		self.columns: list[str] = []
+		self.get_record_name: Callable[[tuple], str] = self.get_name
+
+	def bind(self, field_names: list[str]) -> None:
+		"""Maps the fields of an opened DBase file to the columns of the doctype.
+
+		Args:
+				field_names: Field names in the DBase header.
+		"""
+		if self.name == TOMBSTONE_TABLE:
+			valid_columns = None
+		else:
+			valid_columns = set(frappe.get_meta(self.doctype).get_valid_columns()) - set(STANDARD_FIELDS)
+			valid_columns.update(self.key_fields)
+
+		self.fields = []
+		self.columns = []
+		for field in field_names:
+			column = field.lower()
+			if valid_columns is None or column in valid_columns:
+				self.fields.append(field)
+				self.columns.append(column)
+
+		self.get_record_name = _compile_key_builder(tuple(self.columns.index(key) for key in self.key_fields))
+
+	def make_row(self, values: tuple) -> dict:
+		"""Converts a decoded record of the bound fields to a data row."""
+		return dict(zip(self.columns, values, strict=True))
+
+
+class ImportPlan:
+	"""Import rules of every Conto table, built once per Data Packet import."""
+
+	def __init__(self, primary_keys: list[dict]):
+		enabled = [pk for pk in primary_keys if pk.get("enabled")]
+		self.doctypes = {pk["name"]: DoctypePlan(pk) for pk in enabled}
+		# C-Conto TIPUS (TERM, PARTN, ...) of deleted records mapped to the doctype, disabled tables are left alone
+		self.type_map: dict[str, str] = {pk["type"]: pk["frappe_name"] for pk in enabled if pk.get("type")}
+		# Doctypes whose deleted records are kept as Deleted Documents
+		self.archived_doctypes = {
+			pk["frappe_name"] for pk in enabled if pk.get("type") and pk.get("archive_deleted", 1)
+		}
+
+	@classmethod
+	def load(cls) -> "ImportPlan":
+		primary_keys = frappe.get_all("Primary Key", fields=PRIMARY_KEY_FIELDS, order_by="import_order asc, name asc")
+		return cls(primary_keys)
+
+	def get(self, name: str) -> DoctypePlan:
+		return self.doctypes[name]
+
+	def get_enabled(self) -> list[DoctypePlan]:
+		"""Returns the enabled Conto tables in import order."""
+		return list(self.doctypes.values())
+
+
+def _compile_key_builder(key_fields: tuple) -> Callable[[Any], str]:
+	"""Creates a function which builds the primary key of a data row or a record tuple.
+
+	Composite keys are joined with '/' like the autoname format of the doctypes.
+
+	Args:
+			key_fields: Field names of a data row or indexes of a record tuple.
+	"""
+	if len(key_fields) == 1:
+		return operator.itemgetter(key_fields[0])
+
+	getter = operator.itemgetter(*key_fields)
+	return lambda row: "/".join(map(str, getter(row)))
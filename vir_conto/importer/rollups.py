@@ -0,0 +1,221 @@
+import calendar
+from collections import defaultdict
+from datetime import date
+
+import frappe
+from frappe.utils import now
+
+from vir_conto.importer.bulk import STANDARD_FIELDS
+
+
+class Rollup:
+	"""Monthly totals of a daily Conto table, kept in a doctype of its own.
+
+	A bucket is a store (`rkod`) in a month, it holds the sums of the measures and
+	the number of daily records of the store by the other `keys`. Buckets are
+	recomputed from the daily table with one `INSERT ... SELECT ... GROUP BY`,
+	so a refresh is idempotent and also drops the records deleted since.
+
+	Attributes are denormalized columns of dimension tables (names of groups and
+	stores) joined to the keys, so the dashboards of the rollup need no joins.
+	They are written with the buckets and refreshed when a dimension table changes.
+	"""
+
+	def __init__(
+		self,
+		doctype: str,
+		source: str,
+		keys: list[str],
+		measures: list[str],
+		joins: list[tuple[str, str, str]] | None = None,
+		attributes: dict[str, str] | None = None,
+	):
+		"""
+		Args:
+				doctype: Doctype of the monthly totals.
+				source: Daily doctype the totals are computed from.
+				keys: Grouping fields besides the month, `rkod` must be one of them.
+				measures: Summed fields, they have the same name in both doctypes.
+				joins: (dimension doctype, alias, join condition) of the left joined dimension tables,
+						the daily or the rollup table is aliased as `source`.
+				attributes: SQL expressions over the joined tables by rollup field.
+		"""
+		self.doctype = doctype
+		self.source = source
+		self.keys = keys
+		self.measures = measures
+		self.joins = joins or []
+		self.attributes = attributes or {}
+		self.dimensions = {dimension for dimension, _alias, _condition in self.joins}
+
+	def refresh(self, buckets: set[tuple[str, int, int]]) -> None:
+		"""Recomputes the (rkod, year, month) buckets from the daily table, the caller commits it."""
+		stores_by_month: dict[tuple[int, int], set[str]] = defaultdict(set)
+		for rkod, ev, ho in buckets:
+			stores_by_month[(ev, ho)].add(rkod)
+
+		for (ev, ho), rkods in sorted(stores_by_month.items()):
+			first = date(ev, ho, 1)
+			last = date(ev, ho, calendar.monthrange(ev, ho)[1])
+			frappe.db.delete(self.doctype, {"ev": ev, "ho": ho, "rkod": ("in", list(rkods))})
+			frappe.db.sql(
+				self._get_insert_query(
+					"%(ev)s",
+					"%(ho)s",
+					"%(first)s",
+					"WHERE `source`.`rkod` IN %(rkods)s AND `source`.`datum` BETWEEN %(first)s AND %(last)s",
+					"",
+				),
+				{
+					"ev": ev,
+					"ho": ho,
+					"rkods": tuple(rkods),
+					"first": first,
+					"last": last,
+					"user": frappe.session.user,
+					"timestamp": now(),
+				},
+			)
+
+	def rebuild(self) -> None:
+		"""Recomputes every bucket, the caller commits it."""
+		if frappe.db.db_type == "postgres":
+			month_start = "MAKE_DATE(`source`.`ev`, `source`.`ho`, 1)"
+		else:
+			month_start = "MAKEDATE(`source`.`ev`, 1) + INTERVAL (`source`.`ho` - 1) MONTH"
+		frappe.db.delete(self.doctype)
+		frappe.db.sql(
+			self._get_insert_query(
+				"`source`.`ev`",
+				"`source`.`ho`",
+				f"MIN({month_start})",
+				"WHERE `source`.`ev` IS NOT NULL AND `source`.`ho` IS NOT NULL",
+				", `source`.`ev`, `source`.`ho`",
+			),
+			{"user": frappe.session.user, "timestamp": now()},
+		)
+
+	def refresh_attributes(self) -> None:
+		"""Copies the current values of the dimension tables into the attributes, the caller commits it.
+
+		The rollup is a small table, every bucket is checked and only the changed ones are written.
+		"""
+		if not self.attributes:
+			return
+
+		table = f"`tab{self.doctype}`"
+		if frappe.db.db_type == "postgres":
+			dimensions = ", ".join(f"{expression} AS `{field}`" for field, expression in self.attributes.items())
+			assignments = ", ".join(f"`{field}` = `dimension`.`{field}`" for field in self.attributes)
+			changed = " OR ".join(
+				f"`target`.`{field}` IS DISTINCT FROM `dimension`.`{field}`" for field in self.attributes
+			)
+			query = f"""
+				UPDATE {table} AS `target` SET {assignments}
+				FROM (SELECT `source`.`name`, {dimensions} FROM {table} AS `source` {self._get_joins()}) AS `dimension`
+				WHERE `dimension`.`name` = `target`.`name` AND ({changed})
+			"""
+		else:
+			# the rollup is aliased as `source`, it has the key columns of the join conditions
+			assignments = ", ".join(
+				f"`source`.`{field}` = {expression}" for field, expression in self.attributes.items()
+			)
+			changed = " OR ".join(
+				f"NOT `source`.`{field}` <=> {expression}" for field, expression in self.attributes.items()
+			)
+			query = f"UPDATE {table} AS `source` {self._get_joins()} SET {assignments} WHERE {changed}"
+		frappe.db.sql(query)
+
+	def _get_joins(self) -> str:
+		return " ".join(
+			f"LEFT JOIN `tab{dimension}` AS `{alias}` ON {condition}" for dimension, alias, condition in self.joins
+		)
+
+	def _get_insert_query(self, ev: str, ho: str, month_start: str, where: str, group_by: str) -> str:
+		keys = ", ".join(f"`source`.`{key}`" for key in self.keys)
+		name = ", ".join([*(f"COALESCE(`source`.`{key}`, '')" for key in self.keys), ev, ho])
+		sums = ", ".join(f"SUM(COALESCE(`source`.`{measure}`, 0))" for measure in self.measures)
+		# the attributes depend on the keys only, MAX() picks their single value
+		attributes = "".join(f", MAX({expression})" for expression in self.attributes.values())
+		columns = ", ".join(
+			f"`{column}`"
+			for column in [*STANDARD_FIELDS, *self.keys, "ev", "ho", "datum", *self.measures, *self.attributes]
+		)
+		return f"""
+			INSERT INTO `tab{self.doctype}` ({columns}, `record_count`)
+			SELECT CONCAT_WS('/', {name}), %(user)s, %(timestamp)s, %(timestamp)s, %(user)s, 0, 0,
+				{keys}, {ev}, {ho}, {month_start}, {sums}{attributes}, COUNT(*)
+			FROM `tab{self.source}` AS `source` {self._get_joins()}
+			{where}
+			GROUP BY {keys}{group_by}
+		"""
+
+
+# Rollups by the daily doctype they summarize, stock levels and averages (keszlet, kosara, hkulcs) are not additive
+ROLLUPS = {
+	"vir_bolt": Rollup(
+		"vir_bolt_havi",
+		"vir_bolt",
+		keys=["rkod"],
+		measures=[
+			"nbesz_kp",
+			"bbesz_kp",
+			"nbesz_nkp",
+			"bbesz_nkp",
+			"nert_ossz",
+			"bert_ossz",
+			"vevok",
+			"nszallrend",
+			"bszallrend",
+			"haszon",
+			"bert_eng",
+			"bsaj_felh",
+			"bselejt",
+		],
+	),
+	# `csop` is a main group of tfocsop, the codes also used in tcsop are resolved to the main group,
+	# tcsop is only a fallback for the codes missing from tfocsop
+	"vir_csop": Rollup(
+		"vir_csop_havi",
+		"vir_csop",
+		keys=["tipus", "csop", "rkod"],
+		measures=["nert", "bert"],
+		joins=[
+			("tfocsop", "focsop_dim", "`focsop_dim`.`kod` = `source`.`csop`"),
+			("tcsop", "csop_dim", "`csop_dim`.`kod` = `source`.`csop` AND `focsop_dim`.`kod` IS NULL"),
+			("tfocsop", "parent_dim", "`parent_dim`.`kod` = `csop_dim`.`focsop`"),
+			("raktnev", "store_dim", "`store_dim`.`rkod` = `source`.`rkod`"),
+		],
+		attributes={
+			"csop_nev": "COALESCE(`focsop_dim`.`nev`, `csop_dim`.`nev`)",
+			"focsop": "COALESCE(`focsop_dim`.`kod`, `parent_dim`.`kod`)",
+			"focsop_nev": "COALESCE(`focsop_dim`.`nev`, `parent_dim`.`nev`)",
+			"rnev": "`store_dim`.`rnev`",
+		},
+	),
+}
+
+
+def get_month_buckets(ranges: dict[str, tuple[date, date]]) -> set[tuple[str, int, int]]:
+	"""Lists the (rkod, year, month) buckets covered by the date ranges of the stores."""
+	buckets = set()
+	for rkod, (first, last) in ranges.items():
+		year, month = first.year, first.month
+		while (year, month) <= (last.year, last.month):
+			buckets.add((rkod, year, month))
+			year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+	return buckets
+
+
+def refresh_rollup_attributes(dimension: str) -> None:
+	"""Refreshes the attributes of the rollups which join a dimension doctype, the caller commits it."""
+	for rollup in ROLLUPS.values():
+		if dimension in rollup.dimensions:
+			rollup.refresh_attributes()
+
+
+def rebuild_rollups() -> None:
+	"""Recomputes every monthly rollup from the daily tables and commits them."""
+	for rollup in ROLLUPS.values():
+		rollup.rebuild()
+		frappe.db.commit()  # nosemgrep
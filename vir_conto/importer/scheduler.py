@@ -0,0 +1,109 @@
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+import frappe
+from frappe.utils import cint
+
+from vir_conto.importer.plan import DoctypePlan
+
+# Default number of worker processes, can be overridden with `vir_conto_import_workers` in site_config.json
+IMPORT_WORKERS = 2
+
+
+def group_by_level(doctypes: list[DoctypePlan]) -> list[list[DoctypePlan]]:
+	"""Groups the Conto tables by `import_order`, in import order.
+
+	Tables of the same level don't depend on each other, so they can be imported concurrently.
+	"""
+	levels: dict[int, list[DoctypePlan]] = {}
+	for doctype in doctypes:
+		levels.setdefault(doctype.import_order, []).append(doctype)
+	return [levels[order] for order in sorted(levels)]
+
+
+def get_worker_count() -> int:
+	return max(1, cint(frappe.conf.get("vir_conto_import_workers") or IMPORT_WORKERS))
+
+
+def in_web_request() -> bool:
+	"""True while a web worker serves a request, the pool is only started by jobs and bench commands."""
+	return getattr(frappe.local, "request", None) is not None
+
+
+class ImportScheduler:
+	"""Imports the Conto tables of a Data Packet level by level.
+
+	The tables of a level run concurrently in a process pool, every worker has
+	its own site context and database connection. A level is finished before
+	the next one starts, so the Link targets of the next level already exist.
+	Levels with a single table run in the current process, so does every level
+	during a web request, a gunicorn worker must not spawn a pool of processes
+	with their own database connections.
+
+	The pool is started on the first level which needs it and is reused for
+	the following levels, use the scheduler as a context manager to shut it down.
+	"""
+
+	def __init__(self, method: str, workers: int | None = None):
+		"""
+		Args:
+				method: Dotted path of the function which imports and commits one table,
+						it is called with the table name and the `args` of `run_level`.
+				workers: Number of worker processes. Defaults to the site config.
+		"""
+		self.method = method
+		self.workers = workers or get_worker_count()
+		self.pool: ProcessPoolExecutor | None = None
+
+	def __enter__(self) -> "ImportScheduler":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		if self.pool:
+			self.pool.shutdown()
+			self.pool = None
+
+	def run_level(self, names: list[str], *args) -> None:
+		"""Imports the tables of a level and waits for all of them.
+
+		Args:
+				names: Conto table names of the level.
+				args: Extra arguments of the import method, they must be picklable.
+		"""
+		import_table: Callable = frappe.get_attr(self.method)
+
+		if len(names) == 1 or self.workers == 1 or in_web_request():
+			for name in names:
+				import_table(name, *args)
+			return
+
+		pool = self._get_pool()
+		futures = [pool.submit(_run_in_worker, self.method, name, *args) for name in names]
+		for future in futures:
+			# re-raises the exception of a failed worker
+			future.result()
+
+	def _get_pool(self) -> ProcessPoolExecutor:
+		if not self.pool:
+			# Forked workers would share the database connection of the parent
+			self.pool = ProcessPoolExecutor(
+				max_workers=self.workers,
+				mp_context=multiprocessing.get_context("spawn"),
+				initializer=_init_worker,
+				initargs=(frappe.local.site, frappe.local.sites_path, frappe.session.user),
+			)
+		return self.pool
+
+
+def _init_worker(site: str, sites_path: str, user: str) -> None:
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	frappe.set_user(user)
+
+
+def _run_in_worker(method: str, *args) -> None:
+	try:
+		frappe.get_attr(method)(*args)
+	finally:
+		frappe.db.rollback()
@@ -0,0 +1,111 @@
+import frappe
+
+STAGING_SUFFIX = "__staging"
+OLD_SUFFIX = "__old"
+
+
+class StagingTable:
+	"""Shadow table of a full-replace doctype, filled in the background and swapped in at once.
+
+	The shadow table is a copy of the doctype table without its secondary indexes,
+	they are built once after the table is filled. The swap renames both tables in
+	one statement, so readers either see the old or the new records, never an empty
+	or half-filled table.
+
+	DDL statements commit the open transaction, the caller must not have uncommitted writes
+	that belong to another table.
+	"""
+
+	def __init__(self, doctype: str):
+		"""
+		Args:
+				doctype: Doctype whose records are replaced.
+		"""
+		self.doctype = doctype
+		# Doctype style name of the shadow table, `frappe.db.bulk_insert` prefixes it with `tab`
+		self.name = f"{doctype}{STAGING_SUFFIX}"
+
+		self.table = f"tab{doctype}"
+		self.staging_table = f"tab{self.name}"
+		self.old_table = f"tab{doctype}{OLD_SUFFIX}"
+
+	def exists(self) -> bool:
+		# the cached table list does not know about shadow tables created by other workers
+		return frappe.db.table_exists(self.name, cached=False)
+
+	def prepare(self, resume: bool = False) -> bool:
+		"""Creates an empty shadow table, or keeps the one of an interrupted import.
+
+		Args:
+				resume: Keep the records of an existing shadow table.
+
+		Returns:
+				bool: True if the records of an existing shadow table are kept.
+		"""
+		if resume and self.exists():
+			return True
+
+		frappe.db.sql_ddl(f"DROP TABLE IF EXISTS {self._quote(self.staging_table)}")
+		if frappe.db.db_type == "postgres":
+			frappe.db.sql_ddl(
+				f"CREATE TABLE {self._quote(self.staging_table)} (LIKE {self._quote(self.table)} INCLUDING ALL)"
+			)
+		else:
+			frappe.db.sql_ddl(f"CREATE TABLE `{self.staging_table}` LIKE `{self.table}`")
+			indexes = self._get_secondary_indexes(self.staging_table)
+			if indexes:
+				drops = ", ".join(f"DROP INDEX `{key_name}`" for key_name in indexes)
+				frappe.db.sql_ddl(f"ALTER TABLE `{self.staging_table}` {drops}")
+		return False
+
+	def drop(self) -> None:
+		"""Drops the shadow table, e.g. when it holds the same records as the doctype table."""
+		frappe.db.sql_ddl(f"DROP TABLE IF EXISTS {self._quote(self.staging_table)}")
+
+	def swap(self) -> None:
+		"""Builds the indexes of the filled shadow table, swaps it in and drops the old table."""
+		if frappe.db.db_type == "postgres":
+			# DDL is transactional, both renames are committed together
+			frappe.db.sql_ddl(
+				f"ALTER TABLE {self._quote(self.table)} RENAME TO {self._quote(self.old_table)}; "
+				f"ALTER TABLE {self._quote(self.staging_table)} RENAME TO {self._quote(self.table)}"
+			)
+		else:
+			existing = self._get_secondary_indexes(self.staging_table)
+			adds = [
+				definition
+				for key_name, definition in self._get_secondary_indexes(self.table).items()
+				if key_name not in existing
+			]
+			if adds:
+				# one statement, the table is only rebuilt once
+				frappe.db.sql_ddl(f"ALTER TABLE `{self.staging_table}` {', '.join(adds)}")
+			frappe.db.sql_ddl(
+				f"RENAME TABLE `{self.table}` TO `{self.old_table}`, `{self.staging_table}` TO `{self.table}`"
+			)
+
+		frappe.db.sql_ddl(f"DROP TABLE IF EXISTS {self._quote(self.old_table)}")
+		frappe.db.commit()  # nosemgrep
+
+	def _get_secondary_indexes(self, table: str) -> dict[str, str]:
+		"""Returns the `ADD INDEX` clauses of the non-unique indexes of a MariaDB table by key name."""
+		columns: dict[str, list[str]] = {}
+		fulltext: set[str] = set()
+		for index in frappe.db.sql(f"SHOW INDEX FROM `{table}`", as_dict=True):
+			if index.Key_name == "PRIMARY" or not int(index.Non_unique):
+				continue
+			column = f"`{index.Column_name}`"
+			if index.Sub_part:
+				column += f"({index.Sub_part})"
+			columns.setdefault(index.Key_name, []).append(column)
+			if index.Index_type == "FULLTEXT":
+				fulltext.add(index.Key_name)
+
+		return {
+			key_name: f"ADD {'FULLTEXT ' if key_name in fulltext else ''}INDEX `{key_name}` ({', '.join(key_columns)})"
+			for key_name, key_columns in columns.items()
+		}
+
+	@staticmethod
+	def _quote(table: str) -> str:
+		return f'"{table}"' if frappe.db.db_type == "postgres" else f"`{table}`"
@@ -0,0 +1,86 @@
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import IO
+
+import frappe
+from frappe.utils import now
+
+STAGES = ["unzip", "decode", "transform", "write", "commit"]
+
+
+class ImportStats:
+	"""Timings and row counts of importing one Conto table, saved as an Import Run.
+
+	Stages can be nested, the time of an inner stage is not counted in the
+	outer one. E.g. reading the archive (`unzip`) happens while decoding.
+	"""
+
+	def __init__(self, packet: str, table_name: str):
+		self.packet = packet
+		self.table_name = table_name
+		self.started = now()
+		self.start_time = time.perf_counter()
+		self.timings = dict.fromkeys(STAGES, 0.0)
+		self.rows = 0
+		self._nested: list[float] = []
+
+	@contextmanager
+	def measure(self, stage: str) -> Iterator[None]:
+		start = time.perf_counter()
+		self._nested.append(0.0)
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - start
+			self.timings[stage] += elapsed - self._nested.pop()
+			if self._nested:
+				self._nested[-1] += elapsed
+
+	def wrap_stream(self, stream: IO[bytes]) -> "TimedStream":
+		"""Wraps an archive member, so the time of decompressing it is measured as `unzip`."""
+		return TimedStream(stream, self)
+
+	def save(self) -> None:
+		"""Inserts the Import Run record, the caller commits it."""
+		total_time = time.perf_counter() - self.start_time
+		doc = frappe.get_doc(
+			{
+				"doctype": "Import Run",
+				"data_packet": self.packet,
+				"table_name": self.table_name,
+				"started": self.started,
+				"rows": self.rows,
+				"rows_per_sec": self.rows / total_time if total_time else 0,
+				"peak_rss_mb": get_peak_rss_mb(),
+				"total_time": total_time,
+				**{f"{stage}_time": elapsed for stage, elapsed in self.timings.items()},
+			}
+		)
+		doc.insert(ignore_permissions=True)
+
+
+class TimedStream:
+	"""Binary stream wrapper which measures its reads as the `unzip` stage."""
+
+	def __init__(self, stream: IO[bytes], stats: ImportStats):
+		self.stream = stream
+		self.stats = stats
+
+	def read(self, size: int = -1) -> bytes:
+		with self.stats.measure("unzip"):
+			return self.stream.read(size)
+
+	def seek(self, offset: int, whence: int = 0) -> int:
+		# seeking back in an archive member decompresses it again
+		with self.stats.measure("unzip"):
+			return self.stream.seek(offset, whence)
+
+
+def get_peak_rss_mb() -> float:
+	"""Peak resident memory of the current process in MB."""
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# kilobytes on Linux, bytes on macOS
+	return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
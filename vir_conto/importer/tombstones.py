@@ -0,0 +1,140 @@
+from collections import defaultdict
+from contextlib import AbstractContextManager, nullcontext
+
+import frappe
+from frappe.utils import now
+
+from vir_conto.importer.bulk import BULK_CHUNK_SIZE, STANDARD_FIELDS
+from vir_conto.importer.plan import TOMBSTONE_TABLE, ImportPlan
+from vir_conto.importer.stats import ImportStats
+
+DELETED_DOCUMENT_FIELDS = [*STANDARD_FIELDS, "deleted_name", "deleted_doctype", "data", "restored"]
+
+
+class TombstoneWriter:
+	"""Collects the records of the `torolt` table and deletes them in chunks.
+
+	The records are grouped by their C-Conto TIPUS (TERM, PARTN, TELEP, GVKOD, ...)
+	and every chunk of a doctype is removed with one DELETE statement. Like the
+	`BulkWriter` it skips the document lifecycle (link checks, hooks), so it must
+	only be used for doctypes which are fully owned by C-Conto.
+
+	Deleted records are archived as Deleted Documents unless `archive_deleted`
+	is disabled on the Primary Key of the doctype.
+	"""
+
+	def __init__(self, plan: ImportPlan, chunk_size: int = BULK_CHUNK_SIZE, stats: ImportStats | None = None):
+		"""
+		Args:
+				plan: Import plan of the Data Packet, the `torolt` table must be bound.
+				chunk_size: Number of records deleted by one statement.
+				stats: Import statistics, the database statements are measured as the `write` stage.
+		"""
+		self.plan = plan
+		self.chunk_size = chunk_size
+		self.stats = stats
+		self.buffer: dict[str, set[str]] = defaultdict(set)
+		self.deleted = 0
+		# doctypes which lost records, reset by the caller
+		self.changed_doctypes: set[str] = set()
+		self.missing_doctypes: set[str] = set()
+
+		tombstone_plan = plan.get(TOMBSTONE_TABLE)
+		columns = tombstone_plan.columns
+		# older exports name the field TIPUS, newer ones TIP
+		self.type_index = columns.index("tipus") if "tipus" in columns else columns.index("tip")
+		self.get_name = tombstone_plan.get_record_name
+
+	def add(self, values: tuple) -> None:
+		"""Adds a decoded `torolt` record, flushes its doctype when the chunk is full.
+
+		Records of a TIPUS without an enabled doctype are ignored.
+		"""
+		doctype = self.plan.type_map.get(values[self.type_index])
+		if not doctype:
+			return
+
+		names = self.buffer[doctype]
+		names.add(self.get_name(values))
+		if len(names) >= self.chunk_size:
+			self._delete(doctype, list(names))
+			names.clear()
+
+	def flush(self) -> None:
+		"""Deletes the buffered records of every doctype."""
+		for doctype, names in self.buffer.items():
+			if names:
+				self._delete(doctype, list(names))
+		self.buffer.clear()
+
+	def _delete(self, doctype: str, names: list[str]) -> None:
+		if doctype in self.missing_doctypes:
+			return
+		if not frappe.db.table_exists(doctype):
+			self.missing_doctypes.add(doctype)
+			logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+			logger.warning(f"Deleted records of {doctype} are skipped, the doctype does not exist")
+			return
+
+		table_fields = frappe.get_meta(doctype).get_table_fields()
+		with self._measure("write"):
+			if doctype in self.plan.archived_doctypes:
+				names = self._archive(doctype, names, table_fields)
+			else:
+				names = frappe.get_all(doctype, filters={"name": ("in", names)}, pluck="name")
+			if not names:
+				return
+
+			for df in table_fields:
+				frappe.db.delete(df.options, {"parenttype": doctype, "parent": ("in", names)})
+			frappe.db.delete(doctype, {"name": ("in", names)})
+		self.deleted += len(names)
+		self.changed_doctypes.add(doctype)
+
+	def _archive(self, doctype: str, names: list[str], table_fields: list) -> list[str]:
+		"""Inserts a Deleted Document for every existing record.
+
+		Returns:
+				list: Names of the existing records.
+		"""
+		docs = frappe.get_all(doctype, filters={"name": ("in", names)}, fields=["*"])
+		by_name = {doc.name: doc for doc in docs}
+		for doc in docs:
+			doc.doctype = doctype
+		for df in table_fields:
+			for doc in docs:
+				doc[df.fieldname] = []
+			rows = frappe.get_all(
+				df.options,
+				filters={"parenttype": doctype, "parentfield": df.fieldname, "parent": ("in", list(by_name))},
+				fields=["*"],
+				order_by="idx asc",
+			)
+			for row in rows:
+				row.doctype = df.options
+				by_name[row.parent][df.fieldname].append(row)
+
+		timestamp = now()
+		user = frappe.session.user
+		values = [
+			[frappe.generate_hash(), user, timestamp, timestamp, user, 0, 0, doc.name, doctype, frappe.as_json(doc), 0]
+			for doc in docs
+		]
+		if values:
+			frappe.db.bulk_insert("Deleted Document", DELETED_DOCUMENT_FIELDS, values, chunk_size=self.chunk_size)
+		return list(by_name)
+
+	def _measure(self, stage: str) -> AbstractContextManager:
+		return self.stats.measure(stage) if self.stats else nullcontext()
+
+
+# Deleting records in C-Conto:
+# 	 if tip='TERM' then
+#     if findkij(dmf.tblTermek,kod) then abl_term.termek_torol(True);
+#    if tip='PARTN' then
+#     if findkij(dmf.tblPartner,kod) then db_muv('D',dmf.tblPartner);
+#    if tip='TELEP' then
+#     if findkij(dmf.tblTelep,kod) then db_muv('D',dmf.tblTelep);
+#    if tip='GVKOD' then
+#     if findkij(dmf.tblGyujtvk,kod) then db_muv('D',dmf.tblGyujtvk);
+#    if tip='ARAK' then
@@ -8,8 +8,14 @@ from frappe.core.doctype.user.user import User
 from frappe.desk.page.setup_wizard.setup_wizard import setup_complete
 from frappe.utils.password import update_password
 
-from vir_conto.patches import add_workbook_custom_fields
+from vir_conto.importer.date_triggers import sync_date_triggers
+from vir_conto.importer.rollups import ROLLUPS
+from vir_conto.patches import add_chart_hash_fields, add_workbook_custom_fields
 from vir_conto.util import sync_default_charts
+from vir_conto.vir_conto.doctype.naptar.naptar import refresh_calendar
+
+# Doctypes of Vir Conto without a Primary Key which are queried from Insights
+DERIVED_DOCTYPES = [*(rollup.doctype for rollup in ROLLUPS.values()), "naptar"]
 
 
 def load_environment():
@@ -43,9 +49,16 @@ def after_install() -> None:
 	settings.first_day_of_the_week = "Monday"
 	settings.save()
 
-	# Patch does not run after app install, so we need to manually call it instead,
-	# if a site is already installed the patch will run normally
+	# Patches do not run after app install, so we need to manually call them instead,
+	# if a site is already installed the patches will run normally
 	add_workbook_custom_fields.execute()
+	add_chart_hash_fields.execute()
+
+	print("Creating date triggers")
+	sync_date_triggers()
+
+	print("Building the calendar")
+	refresh_calendar()
 
 
 def run_setup_wizard():
@@ -158,6 +171,7 @@ def create_insights_teams():
 
 		# add Doctypes to permission
 		doctypes = frappe.db.get_list("Primary Key", pluck="name")
+		doctypes += DERIVED_DOCTYPES
 		doctypes = ["tab" + dt for dt in doctypes]
 		resource_names = frappe.db.get_list(
 			"Insights Table v3", filters={"data_source": "Site DB", "label": ["in", doctypes]}
@@ -169,3 +183,28 @@ def create_insights_teams():
 		team_tulaj.insert()
 	except ImportError as error:
 		print(error)
+
+
+def register_derived_tables() -> None:
+	"""Adds the monthly rollup and calendar tables to the Site DB data source of Insights and to the Tulajdonos team.
+
+	Sites installed before these doctypes existed don't list their tables otherwise.
+	"""
+	try:
+		labels = ["tab" + doctype for doctype in DERIVED_DOCTYPES]
+		if frappe.db.count("Insights Table v3", {"data_source": "Site DB", "label": ["in", labels]}) < len(labels):
+			frappe.get_doc("Insights Data Source v3", "Site DB").update_table_list()
+
+		team_name = frappe.db.get_value("Insights Team", {"team_name": "Tulajdonos"})
+		if not team_name:
+			return
+		team = frappe.get_doc("Insights Team", team_name)
+		permitted = {row.resource_name for row in team.team_permissions}
+		for name in frappe.db.get_list(
+			"Insights Table v3", filters={"data_source": "Site DB", "label": ["in", labels]}, pluck="name"
+		):
+			if name not in permitted:
+				team.append("team_permissions", {"resource_type": "Insights Table v3", "resource_name": name})
+		team.save()
+	except ImportError as error:
+		print(error)
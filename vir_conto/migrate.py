@@ -1,5 +1,23 @@
 def after_migrate():
+	from vir_conto.importer.date_triggers import sync_date_triggers
+	from vir_conto.importer.indexes import sync_indexes
+	from vir_conto.install import register_derived_tables
 	from vir_conto.util import sync_default_charts
+	from vir_conto.vir_conto.doctype.naptar.naptar import refresh_calendar
+
+	print("Creating date triggers")
+	for doctype in sync_date_triggers():
+		print(f"{doctype}: ev, ho, ho_nap are derived from datum")
 
 	print("Updating default Charts")
 	sync_default_charts()
+
+	print("Refreshing the calendar")
+	refresh_calendar()
+
+	print("Registering rollup and calendar tables")
+	register_derived_tables()
+
+	print("Reconciling composite indexes")
+	for doctype, changes in sync_indexes().items():
+		print(f"{doctype}: {', '.join(changes)}")
@@ -0,0 +1,26 @@
+import frappe
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+from vir_conto.util import CHART_DOCTYPES
+
+
+def execute():
+	custom_fields = {
+		doctype: [
+			{
+				"fieldname": "vir_hash",
+				"fieldtype": "Data",
+				"label": "Vir Hash",
+				"read_only": 1,
+				"hidden": 1,
+				"no_copy": 1,
+				"print_hide": 1,
+				"description": "Hash of the imported content of a default vir_conto document",
+			}
+		]
+		for doctype in CHART_DOCTYPES
+	}
+
+	create_custom_fields(custom_fields)
+	frappe.db.commit()
+	print("Successfully added 'vir_hash' custom field to the Insights documents")
@@ -0,0 +1,8 @@
+from vir_conto.importer.rollups import rebuild_rollups
+
+
+def execute():
+	"""Fill the monthly rollups (vir_bolt_havi, vir_csop_havi) from the already imported daily records,
+	later imports keep them up to date.
+	"""
+	rebuild_rollups()
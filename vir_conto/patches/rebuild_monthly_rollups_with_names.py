@@ -0,0 +1,8 @@
+from vir_conto.importer.rollups import rebuild_rollups
+
+
+def execute():
+	"""Refill the monthly rollups with their new columns: the first day of the month (datum) and,
+	in vir_csop_havi, the names of the group, main group and store.
+	"""
+	rebuild_rollups()
@@ -0,0 +1,17 @@
+import frappe
+from pypika.functions import Coalesce
+
+from vir_conto.importer.backfill import Backfill
+
+
+def execute():
+	"""Copy the current store names of raktnev into vir_bolt, later imports keep them up to date.
+
+	UPDATE `tabvir_bolt`
+	SET rnev = (SELECT rnev FROM `tabraktnev` WHERE rkod = `tabvir_bolt`.rkod);
+	"""
+
+	table = frappe.qb.DocType("vir_bolt")
+	store = frappe.qb.DocType("raktnev")
+	store_name = frappe.qb.from_(store).select(store.rnev).where(store.rkod == table.rkod)
+	Backfill("repair_vir_bolt_rnev", "vir_bolt", {"rnev": Coalesce(store_name, table.rnev)}).run()
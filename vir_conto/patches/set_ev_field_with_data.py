@@ -1,5 +1,8 @@
 import frappe
-from pypika import CustomFunction
+from pypika.enums import DatePart
+from pypika.functions import Extract
+
+from vir_conto.importer.backfill import Backfill
 
 
 def execute():
@@ -9,14 +12,6 @@ def execute():
 	SET ev = YEAR(datum);
 	"""
 
-	toYear = CustomFunction("YEAR", ["date"])
-
-	# vir_bolt
-	table = frappe.qb.DocType("vir_bolt")
-	query = frappe.qb.update(table).set(table.ev, toYear(table.datum))
-	query.run()
-
-	# vir_csop
-	table = frappe.qb.DocType("vir_csop")
-	query = frappe.qb.update(table).set(table.ev, toYear(table.datum))
-	query.run()
+	for doctype in ("vir_bolt", "vir_csop"):
+		table = frappe.qb.DocType(doctype)
+		Backfill(f"set_ev_field_with_data:{doctype}", doctype, {"ev": Extract(DatePart.year, table.datum)}).run()
@@ -1,4 +1,8 @@
 import frappe
+from pypika.enums import DatePart
+from pypika.functions import Extract
+
+from vir_conto.importer.backfill import Backfill
 
 
 def execute():
@@ -8,18 +12,10 @@ def execute():
 	SET ho_nap = concat(substring(datum,6,2), substring(datum,9,2));
 	"""
 
-	# vir_bolt
-	frappe.db.sql(
-		"""
-			UPDATE `tabvir_bolt`
-			SET ho_nap = concat(substring(datum,6,2), substring(datum,9,2));
-		"""
-	)
-
-	# vir_csop
-	frappe.db.sql(
-		"""
-			UPDATE `tabvir_csop`
-			SET ho_nap = concat(substring(datum,6,2), substring(datum,9,2));
-		"""
-	)
+	for doctype in ("vir_bolt", "vir_csop"):
+		table = frappe.qb.DocType(doctype)
+		Backfill(
+			f"set_ho_nap_field:{doctype}",
+			doctype,
+			{"ho_nap": Extract(DatePart.month, table.datum) * 100 + Extract(DatePart.day, table.datum)},
+		).run()
@@ -0,0 +1,71 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.backfill import Backfill
+
+TEST_KEY = "test_backfill"
+
+
+def insert_vir_bolt(rkod: str, datum: str):
+	frappe.get_doc(
+		{"doctype": "vir_bolt", "name": f"{rkod}/{datum}", "rkod": rkod, "datum": datum, "rnev": "old"}
+	).db_insert()
+
+
+class TestBackfill(unittest.TestCase):
+	"""Test suite for the chunked backfill of the patches."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def setUp(self):
+		"""Set up test data before each test."""
+		frappe.db.delete("vir_bolt", {"rkod": "T106"})
+		for day in range(1, 6):
+			insert_vir_bolt("T106", f"2025-03-0{day}")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def run_backfill(self, **kwargs) -> Backfill:
+		with patch("frappe.db.commit"):
+			backfill = Backfill(TEST_KEY, "vir_bolt", {"rnev": "new"}, chunk_size=2, sleep=0, column="datum", **kwargs)
+			backfill.run()
+		return backfill
+
+	def get_rnev(self) -> list[str]:
+		return frappe.get_all("vir_bolt", filters={"rkod": "T106"}, pluck="rnev", order_by="datum asc")
+
+	def test_updates_every_chunk(self):
+		"""Test the whole table is updated in chunks and the backfill is marked as done."""
+		frappe.db.set_global(f"vir_conto_backfill:{TEST_KEY}", None)
+		with patch("frappe.db.sql", wraps=frappe.db.sql) as mock_sql:
+			self.run_backfill()
+
+		updates = [args.args[0] for args in mock_sql.call_args_list if args.args[0].startswith("UPDATE")]
+		self.assertGreaterEqual(len(updates), 3)
+		self.assertEqual(self.get_rnev(), ["new"] * 5)
+		progress = json.loads(frappe.db.get_global(f"vir_conto_backfill:{TEST_KEY}"))
+		self.assertTrue(progress["done"])
+
+	def test_resumes_after_saved_value(self):
+		"""Test an interrupted backfill continues after the last committed chunk."""
+		frappe.db.set_global(
+			f"vir_conto_backfill:{TEST_KEY}", json.dumps({"last": "2025-03-03", "rows": 3, "done": False})
+		)
+		self.run_backfill()
+
+		self.assertEqual(self.get_rnev(), ["old", "old", "old", "new", "new"])
+
+	def test_finished_backfill_is_skipped(self):
+		"""Test a finished backfill does not touch the table again."""
+		frappe.db.set_global(f"vir_conto_backfill:{TEST_KEY}", json.dumps({"last": None, "rows": 5, "done": True}))
+		self.run_backfill()
+
+		self.assertEqual(self.get_rnev(), ["old"] * 5)
@@ -0,0 +1,69 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+
+import frappe
+
+from vir_conto.benchmark.generator import PacketSpec, generate_packet
+from vir_conto.benchmark.runner import append_result
+from vir_conto.importer.dbf_reader import DbfReader
+
+
+class TestBenchmark(unittest.TestCase):
+	"""Test suite for the synthetic packet generator and the benchmark results."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def test_generate_packet_scales_tables(self):
+		"""Test the record counts follow the spec and the tables can be read back."""
+		path = os.path.join(self.tmp_dir.name, "BENCH-0001.LZH")
+		spec = PacketSpec(stores=3, days=4, groups=2, deleted=5, start=datetime.date(2025, 1, 1))
+
+		counts = generate_packet(path, spec)
+
+		self.assertEqual(counts["raktnev"], 3)
+		self.assertEqual(counts["vir_bolt"], 12)
+		self.assertEqual(counts["vir_csop"], 48)
+		self.assertEqual(counts["torolt"], 5)
+
+		with zipfile.ZipFile(path) as zip_ref:
+			with zip_ref.open("vir_csop.dbf") as stream:
+				records = list(DbfReader(stream, "cp1250"))
+			with zip_ref.open("tfocsop.dbf") as stream:
+				groups = list(DbfReader(stream, "cp1250"))
+
+		self.assertEqual(len(records), 48)
+		self.assertEqual(records[0]["DATUM"], "2025.01.01")
+		self.assertEqual(len({(r["TIPUS"], r["CSOP"], r["RKOD"], r["DATUM"]) for r in records}), 48)
+		self.assertEqual(groups[0]["NEV"], "Húsok (nyers)")
+
+	def test_generate_packet_is_deterministic(self):
+		"""Test the same spec generates the same records."""
+		first = os.path.join(self.tmp_dir.name, "BENCH-0001.LZH")
+		second = os.path.join(self.tmp_dir.name, "BENCH-0002.LZH")
+		generate_packet(first, PacketSpec(stores=2, days=2))
+		generate_packet(second, PacketSpec(stores=2, days=2))
+
+		with zipfile.ZipFile(first) as a, zipfile.ZipFile(second) as b:
+			self.assertEqual(a.read("vir_bolt.dbf")[32:], b.read("vir_bolt.dbf")[32:])
+
+	def test_append_result(self):
+		"""Test results are collected in a JSON list."""
+		path = os.path.join(self.tmp_dir.name, "results.json")
+		append_result(path, {"commit": "a"})
+		append_result(path, {"commit": "b"})
+
+		with open(path, encoding="utf8") as file:
+			self.assertEqual([result["commit"] for result in json.load(file)], ["a", "b"])
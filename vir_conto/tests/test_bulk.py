@@ -0,0 +1,142 @@
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.bulk import STANDARD_FIELDS, BulkWriter, get_row_hash
+
+
+class TestBulkWriter(unittest.TestCase):
+	"""Test suite for the bulk write paths of the Data Packet import."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_flush_writes_valid_columns(self):
+		"""Test only doctype columns are written and numbers are converted."""
+		writer = BulkWriter("tcsop", ["kod", "nev", "rend", "valt"])
+
+		with patch("frappe.db.bulk_insert") as mock_insert:
+			writer.add("901", ("901", "GÖNGYÖLEG", None, ""))
+			writer.flush()
+
+			mock_insert.assert_called_once()
+			doctype, fields, values = mock_insert.call_args.args
+			self.assertEqual(doctype, "tcsop")
+			self.assertEqual(fields, STANDARD_FIELDS + ["kod", "nev", "rend"])
+			self.assertEqual(values[0][0], "901")
+			self.assertEqual(values[0][-3:], ["901", "GÖNGYÖLEG", 0])
+			self.assertEqual(writer.count, 1)
+
+	def test_duplicated_keys_are_collapsed(self):
+		"""Test the last record wins inside a batch."""
+		writer = BulkWriter("tfocsop", ["kod", "nev"])
+
+		with patch("frappe.db.bulk_insert") as mock_insert:
+			writer.add("100", ("100", "Régi"))
+			writer.add("100", ("100", "Új"))
+			writer.flush()
+
+			values = mock_insert.call_args.args[2]
+			self.assertEqual(len(values), 1)
+			self.assertEqual(values[0][-1], "Új")
+
+	def test_add_flushes_full_buffer(self):
+		"""Test the buffer is written when it reaches the chunk size."""
+		writer = BulkWriter("tfocsop", ["kod", "nev"], chunk_size=2)
+
+		with patch("frappe.db.bulk_insert") as mock_insert:
+			writer.add("100", ("100", "A"))
+			mock_insert.assert_not_called()
+			writer.add("200", ("200", "B"))
+			mock_insert.assert_called_once()
+			self.assertEqual(writer.buffer, {})
+
+	def test_flush_empty_buffer(self):
+		"""Test nothing is written without records."""
+		with patch("frappe.db.bulk_insert") as mock_insert:
+			BulkWriter("tfocsop", ["kod", "nev"]).flush()
+			mock_insert.assert_not_called()
+
+	def test_upsert_skips_date_fields(self):
+		"""Test `ev`, `ho`, `ho_nap` are not sent, the triggers of the table derive them from `datum`."""
+		with patch("vir_conto.importer.bulk._has_date_triggers", return_value=True):
+			writer = BulkWriter("vir_csop", ["rkod", "datum", "ho", "tipus", "csop", "nert"], upsert=True)
+
+		with patch("vir_conto.importer.bulk.BulkWriter._upsert") as mock_upsert:
+			writer.add("ERT/100/100/2025.03.22", ("100", "2025.03.22", "03", "ERT", "100", 10))
+			writer.flush()
+
+			fields, values = mock_upsert.call_args.args
+			record = dict(zip(fields, values[0], strict=True))
+			self.assertEqual(record["name"], "ERT/100/100/2025.03.22")
+			self.assertEqual(record["rkod"], "100")
+			self.assertFalse({"ev", "ho", "ho_nap"} & set(fields))
+
+	def test_upsert_sets_date_fields_without_triggers(self):
+		"""Test `ev`, `ho`, `ho_nap` are derived from `datum` like in `set_dates` if the table has no triggers."""
+		with patch("vir_conto.importer.bulk._has_date_triggers", return_value=False):
+			writer = BulkWriter("vir_csop", ["rkod", "datum", "ho", "tipus", "csop", "nert"], upsert=True)
+
+		with patch("vir_conto.importer.bulk.BulkWriter._upsert") as mock_upsert:
+			writer.add("ERT/100/100/2025.03.22", ("100", "2025.03.22", "03", "ERT", "100", 10))
+			writer.flush()
+
+			fields, values = mock_upsert.call_args.args
+			record = dict(zip(fields, values[0], strict=True))
+			self.assertEqual((record["ev"], record["ho"], record["ho_nap"]), (2025, 3, 322))
+
+	def test_upsert_overwrites_existing_record(self):
+		"""Test upsert updates the record with the same primary key."""
+		frappe.db.delete("vir_csop", {"name": "ERT/100/100/2025.03.22"})
+		columns = ["rkod", "datum", "tipus", "csop", "nert", "bert"]
+
+		writer = BulkWriter("vir_csop", columns, upsert=True)
+		writer.add("ERT/100/100/2025.03.22", ("100", "2025.03.22", "ERT", "100", 10, 12))
+		writer.flush()
+
+		writer.add("ERT/100/100/2025.03.22", ("100", "2025.03.22", "ERT", "100", 20, 12))
+		writer.flush()
+
+		self.assertEqual(frappe.db.count("vir_csop", {"name": "ERT/100/100/2025.03.22"}), 1)
+		self.assertEqual(frappe.db.get_value("vir_csop", "ERT/100/100/2025.03.22", "nert"), 20)
+		self.assertEqual(frappe.db.get_value("vir_csop", "ERT/100/100/2025.03.22", "ho_nap"), 322)
+
+	def test_unchanged_records_are_skipped(self):
+		"""Test only new or changed records are written when the doctype has fingerprints."""
+		columns = ["rkod", "datum", "tipus", "csop", "nert", "bert"]
+		unchanged = ("100", "2025.03.22", "ERT", "100", 10, 12)
+		changed = ("100", "2025.03.23", "ERT", "100", 20, 24)
+		stored = [
+			("ERT/100/100/2025.03.22", get_row_hash(unchanged)),
+			("ERT/100/100/2025.03.23", get_row_hash(("100", "2025.03.23", "ERT", "100", 10, 12))),
+		]
+
+		writer = BulkWriter("vir_csop", columns, upsert=True)
+		self.assertTrue(writer.fingerprint)
+
+		with (
+			patch("frappe.qb.from_") as mock_from,
+			patch("vir_conto.importer.bulk.BulkWriter._upsert") as mock_upsert,
+		):
+			mock_from.return_value.select.return_value.where.return_value.run.return_value = stored
+			writer.add("ERT/100/100/2025.03.22", unchanged)
+			writer.add("ERT/100/100/2025.03.23", changed)
+			writer.add("ERT/100/100/2025.03.24", ("100", "2025.03.24", "ERT", "100", 30, 36))
+			writer.flush()
+
+			fields, values = mock_upsert.call_args.args
+			self.assertEqual(fields[-1], "row_hash")
+			self.assertEqual([row[0] for row in values], ["ERT/100/100/2025.03.23", "ERT/100/100/2025.03.24"])
+			self.assertEqual(values[0][-1], get_row_hash(changed))
+			self.assertEqual((writer.inserted, writer.updated, writer.unchanged), (1, 1, 1))
+
+	def test_full_replace_has_no_fingerprint(self):
+		"""Test fingerprints are only compared in upsert mode."""
+		self.assertFalse(BulkWriter("vir_csop", ["rkod", "datum"]).fingerprint)
@@ -0,0 +1,49 @@
+import unittest
+
+import frappe
+
+from vir_conto.importer.cascades import cascade_store_names, get_renamed_stores
+
+
+def insert_vir_bolt(rkod: str, datum: str, rnev: str):
+	frappe.get_doc(
+		{"doctype": "vir_bolt", "name": f"{rkod}/{datum}", "rkod": rkod, "datum": datum, "rnev": rnev}
+	).db_insert()
+
+
+class TestCascades(unittest.TestCase):
+	"""Test suite for the store names copied from raktnev."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_renamed_stores(self):
+		"""Test new and renamed stores are detected, removed and unchanged ones are not."""
+		before = {"106": "Bolt 106", "107": "Bolt 107", "108": "Bolt 108"}
+		after = {"106": "Bolt 106", "107": "Uj bolt 107", "109": "Bolt 109"}
+
+		self.assertEqual(get_renamed_stores(before, after), ["107", "109"])
+
+	def test_cascade_updates_only_given_stores(self):
+		"""Test the name is copied into the records of the given stores only."""
+		frappe.db.delete("raktnev", {"rkod": ("in", ["T106", "T107"])})
+		frappe.db.delete("vir_bolt", {"rkod": ("in", ["T106", "T107"])})
+		for rkod in ("T106", "T107"):
+			frappe.get_doc({"doctype": "raktnev", "name": rkod, "rkod": rkod, "rnev": f"New {rkod}"}).db_insert()
+			insert_vir_bolt(rkod, "2025-03-01", f"Old {rkod}")
+			insert_vir_bolt(rkod, "2025-03-02", f"Old {rkod}")
+
+		cascade_store_names(["T106"])
+
+		self.assertEqual(
+			frappe.get_all("vir_bolt", filters={"rkod": "T106"}, pluck="rnev", distinct=True), ["New T106"]
+		)
+		self.assertEqual(
+			frappe.get_all("vir_bolt", filters={"rkod": "T107"}, pluck="rnev", distinct=True), ["Old T107"]
+		)
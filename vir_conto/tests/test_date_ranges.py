@@ -0,0 +1,96 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+import frappe
+
+from vir_conto.importer.date_ranges import (
+	DateRangeDeleter,
+	get_date_ranges,
+	merge_date_ranges,
+	supports_date_ranges,
+)
+
+
+class TestDateRanges(unittest.TestCase):
+	"""Test suite for the date range replace write mode of the daily tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_supports_date_ranges(self):
+		"""Test the mode needs the store and date fields."""
+		self.assertTrue(supports_date_ranges(["RKOD", "DATUM", "NERT_OSSZ"]))
+		self.assertFalse(supports_date_ranges(["KOD", "NEV"]))
+
+	def test_get_date_ranges_by_store(self):
+		"""Test the first and last date of every store is collected from the two fields."""
+		table = MagicMock(field_names=["RKOD", "RNEV", "DATUM"])
+		table.iter_batches.return_value = iter(
+			[[("106", "2025.03.22"), ("107", "2025.03.01")], [("106", "2025.02.28"), ("106", "")]]
+		)
+
+		ranges = get_date_ranges(table)
+
+		self.assertEqual(table.iter_batches.call_args.args[0], ["RKOD", "DATUM"])
+		self.assertEqual(
+			ranges,
+			{
+				"106": (datetime.date(2025, 2, 28), datetime.date(2025, 3, 22)),
+				"107": (datetime.date(2025, 3, 1), datetime.date(2025, 3, 1)),
+			},
+		)
+
+	def test_get_date_ranges_stops(self):
+		"""Test only the records before `stop` are read, e.g. the ones written before a checkpoint."""
+		table = MagicMock(field_names=["RKOD", "DATUM"])
+		table.iter_batches.return_value = iter([[("106", "2025.03.22")]])
+
+		get_date_ranges(table, stop=5000)
+
+		self.assertEqual(table.iter_batches.call_args.kwargs["stop"], 5000)
+
+	def test_merge_date_ranges(self):
+		"""Test the ranges of a chunk widen the ranges of the member."""
+		ranges = {"106": (datetime.date(2025, 3, 1), datetime.date(2025, 3, 22))}
+
+		merge_date_ranges(
+			ranges,
+			{
+				"106": (datetime.date(2025, 2, 28), datetime.date(2025, 3, 2)),
+				"107": (datetime.date(2025, 3, 1), datetime.date(2025, 3, 1)),
+			},
+		)
+
+		self.assertEqual(
+			ranges,
+			{
+				"106": (datetime.date(2025, 2, 28), datetime.date(2025, 3, 22)),
+				"107": (datetime.date(2025, 3, 1), datetime.date(2025, 3, 1)),
+			},
+		)
+
+	def test_deleter_removes_each_date_once(self):
+		"""Test every store is removed with range deletes and the dates of earlier chunks are kept."""
+		day = datetime.date
+
+		with patch("frappe.db.delete") as mock_delete:
+			deleter = DateRangeDeleter("vir_csop", {"106": (day(2025, 3, 10), day(2025, 3, 12))})
+			deleter.delete({"106": (day(2025, 3, 11), day(2025, 3, 12)), "107": (day(2025, 3, 1), day(2025, 3, 2))})
+			deleter.delete({"106": (day(2025, 3, 8), day(2025, 3, 14)), "107": (day(2025, 3, 2), day(2025, 3, 2))})
+
+			mock_delete.assert_has_calls(
+				[
+					call("vir_csop", {"rkod": "107", "datum": ("between", [day(2025, 3, 1), day(2025, 3, 2)])}),
+					call("vir_csop", {"rkod": "106", "datum": ("between", [day(2025, 3, 8), day(2025, 3, 9)])}),
+					call("vir_csop", {"rkod": "106", "datum": ("between", [day(2025, 3, 13), day(2025, 3, 14)])}),
+				]
+			)
+			self.assertEqual(mock_delete.call_count, 3)
+			self.assertEqual(deleter.deleted["106"], (day(2025, 3, 8), day(2025, 3, 14)))
@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import call, patch
+
+import frappe
+
+from vir_conto.importer.date_triggers import (
+	MARIADB_TRIGGER_BODY,
+	TRIGGER_SAVEPOINT,
+	create_date_triggers,
+	has_date_triggers,
+	sync_date_triggers,
+)
+
+
+class TestDateTriggers(unittest.TestCase):
+	"""Test suite for the database triggers of the daily tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_triggers_set_date_fields(self):
+		"""Test `ev`, `ho` and `ho_nap` are derived from `datum` on insert and on update."""
+		frappe.db.delete("vir_bolt", {"rkod": "T106"})
+		doc = frappe.get_doc({"doctype": "vir_bolt", "name": "T106/2025-03-22", "rkod": "T106", "datum": "2025-03-22"})
+		doc.db_insert()
+
+		self.assertEqual(frappe.db.get_value("vir_bolt", doc.name, ["ev", "ho", "ho_nap"]), (2025, 3, 322))
+
+		frappe.db.set_value("vir_bolt", doc.name, "datum", "2024-12-01", update_modified=False)
+		self.assertEqual(frappe.db.get_value("vir_bolt", doc.name, ["ev", "ho", "ho_nap"]), (2024, 12, 1201))
+
+	def test_outdated_trigger_is_detected(self):
+		"""Test a trigger with another definition is recreated."""
+		triggers = [
+			("vc_vir_bolt_dates_insert", MARIADB_TRIGGER_BODY),
+			("vc_vir_bolt_dates_update", "SET NEW.`ev` = YEAR(NEW.`datum`)"),
+		]
+		with patch.object(frappe.db, "db_type", "mariadb"), patch("frappe.db.sql", return_value=triggers):
+			self.assertFalse(has_date_triggers("vir_bolt"))
+
+		with patch.object(frappe.db, "db_type", "mariadb"), patch("frappe.db.sql", return_value=triggers[:1]):
+			self.assertFalse(has_date_triggers("vir_bolt"))
+
+		current = [triggers[0], ("vc_vir_bolt_dates_update", MARIADB_TRIGGER_BODY)]
+		with patch.object(frappe.db, "db_type", "mariadb"), patch("frappe.db.sql", return_value=current):
+			self.assertTrue(has_date_triggers("vir_bolt"))
+
+	def test_create_replaces_both_triggers(self):
+		"""Test the insert and update triggers are dropped and created again."""
+		with patch.object(frappe.db, "db_type", "mariadb"), patch("frappe.db.sql_ddl") as mock_ddl:
+			create_date_triggers("vir_csop")
+
+		mock_ddl.assert_has_calls(
+			[
+				call("DROP TRIGGER IF EXISTS `vc_vir_csop_dates_insert`"),
+				call(
+					"CREATE TRIGGER `vc_vir_csop_dates_insert` BEFORE INSERT ON `tabvir_csop` "
+					f"FOR EACH ROW {MARIADB_TRIGGER_BODY}"
+				),
+				call("DROP TRIGGER IF EXISTS `vc_vir_csop_dates_update`"),
+				call(
+					"CREATE TRIGGER `vc_vir_csop_dates_update` BEFORE UPDATE ON `tabvir_csop` "
+					f"FOR EACH ROW {MARIADB_TRIGGER_BODY}"
+				),
+			]
+		)
+
+	def test_sync_skips_current_triggers(self):
+		"""Test only the tables with missing or outdated triggers are changed."""
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch(
+				"vir_conto.importer.date_triggers.has_date_triggers", side_effect=lambda doctype: doctype == "vir_bolt"
+			),
+			patch("vir_conto.importer.date_triggers.create_date_triggers") as mock_create,
+		):
+			self.assertEqual(sync_date_triggers(), ["vir_csop"])
+			mock_create.assert_called_once_with("vir_csop")
+
+	def test_sync_continues_after_failed_trigger(self):
+		"""Test a table whose triggers can not be created is logged and the other tables are still synced."""
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch("vir_conto.importer.date_triggers.has_date_triggers", return_value=False),
+			patch(
+				"vir_conto.importer.date_triggers.create_date_triggers",
+				side_effect=[Exception("You do not have the SUPER privilege and binary logging is enabled"), None],
+			) as mock_create,
+		):
+			self.assertEqual(sync_date_triggers(), ["vir_csop"])
+			self.assertEqual(mock_create.call_count, 2)
+
+	def test_failed_postgres_trigger_is_rolled_back_to_savepoint(self):
+		"""Test the Postgres DDL runs inside the savepoint, so a failure does not abort the migrate."""
+		with (
+			patch.object(frappe.db, "db_type", "postgres"),
+			patch("frappe.db.table_exists", return_value=True),
+			patch("vir_conto.importer.date_triggers.has_date_triggers", return_value=False),
+			patch("frappe.db.savepoint") as mock_savepoint,
+			patch("frappe.db.rollback") as mock_rollback,
+			patch("frappe.db.sql", side_effect=Exception("permission denied for schema public")),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertEqual(sync_date_triggers(), [])
+
+		mock_savepoint.assert_called_with(TRIGGER_SAVEPOINT)
+		mock_rollback.assert_called_with(save_point=TRIGGER_SAVEPOINT)
+		self.assertEqual(mock_rollback.call_count, 2)
+		mock_ddl.assert_not_called()
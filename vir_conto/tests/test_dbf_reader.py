@@ -0,0 +1,79 @@
+import datetime
+import io
+import struct
+import unittest
+import zipfile
+
+import frappe
+
+from vir_conto.importer.dbf_reader import DbfError, DbfReader
+
+
+def open_test_table(name: str) -> DbfReader:
+	path = frappe.get_app_path("vir_conto", "vir_conto", "doctype", "data_packet", "TEST-0001.LZH")
+	with zipfile.ZipFile(path) as zip_ref:
+		data = zip_ref.read(name + ".dbf")
+	return DbfReader(io.BytesIO(data), "cp1250")
+
+
+class TestDbfReader(unittest.TestCase):
+	"""Test suite for reading C-Conto DBase tables from a stream."""
+
+	def test_reads_header(self):
+		"""Test fields and record count are read from the header."""
+		table = open_test_table("tcsop")
+
+		self.assertEqual(len(table), 21)
+		self.assertEqual(table.field_names, ["KOD", "NEV", "REND", "TARHELY", "FOCSOP"])
+
+	def test_decodes_records(self):
+		"""Test strings are decoded with the codepage and numbers are converted."""
+		records = list(open_test_table("vir_bolt"))
+
+		self.assertEqual(len(records), 174)
+		self.assertEqual(records[0]["RKOD"], "100")
+		self.assertEqual(records[0]["RNEV"], "Fő bolt")
+		self.assertEqual(records[0]["DATUM"], "2025.01.02")
+		self.assertEqual(records[0]["VEVOK"], 46)
+		self.assertEqual(records[0]["HKULCS"], 30.34)
+
+	def test_iter_batches_selects_fields(self):
+		"""Test batches hold tuples of the requested fields in the requested order."""
+		table = open_test_table("vir_bolt")
+		batches = list(table.iter_batches(["DATUM", "RKOD"], batch_size=100))
+
+		self.assertEqual([len(batch) for batch in batches], [100, 74])
+		self.assertEqual(batches[0][0], ("2025.01.02", "100"))
+
+	def test_iter_batches_skips_start(self):
+		"""Test records before `start` are not returned."""
+		records = [record for batch in open_test_table("vir_bolt").iter_batches() for record in batch]
+		resumed = [record for batch in open_test_table("vir_bolt").iter_batches(start=100) for record in batch]
+
+		self.assertEqual(resumed, records[100:])
+
+	def test_iter_batches_continues_after_stop(self):
+		"""Test a table read up to `stop` with some fields continues with the next records."""
+		records = [record for batch in open_test_table("vir_bolt").iter_batches(["RKOD"]) for record in batch]
+
+		table = open_test_table("vir_bolt")
+		head = [record for batch in table.iter_batches(["RKOD"], batch_size=30, stop=100) for record in batch]
+		tail = [record for batch in table.iter_batches(["RKOD"], start=100) for record in batch]
+
+		self.assertEqual(head, records[:100])
+		self.assertEqual(tail, records[100:])
+
+	def test_decodes_dates(self):
+		"""Test D fields are converted to dates."""
+		record = next(iter(open_test_table("torzs")))
+		self.assertEqual(record["SZERZIDO"], datetime.date(1999, 6, 15))
+
+	def test_empty_table(self):
+		"""Test a table without records yields nothing."""
+		self.assertEqual(list(open_test_table("torolt")), [])
+
+	def test_truncated_table_raises(self):
+		"""Test a stream which ends before the header does raises DbfError."""
+		header = struct.pack("<BBBBIHH", 3, 25, 1, 1, 1, 98, 26) + bytes(20)
+		with self.assertRaises(DbfError):
+			DbfReader(io.BytesIO(header), "cp1250")
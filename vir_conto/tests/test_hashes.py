@@ -0,0 +1,59 @@
+import hashlib
+import io
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.hashes import DbfHashStream, get_dbf_hash, get_stream_hash, reset_import_hashes
+
+
+class TestHashes(unittest.TestCase):
+	"""Test suite for the content hashes of Data Packets and their members."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_stream_is_hashed_in_chunks(self):
+		"""Test the hash of a stream read in chunks equals the hash of its content."""
+		content = b"dbase" * 1000
+		with patch("vir_conto.importer.hashes.HASH_CHUNK_SIZE", 7):
+			self.assertEqual(get_stream_hash(io.BytesIO(content)), hashlib.sha256(content).hexdigest())
+
+	def test_dbf_hash_ignores_update_date(self):
+		"""Test members which differ only in the date of the last update have the same hash."""
+		records = b"\x41\x00\x00\x00" + b" 106Bolt 106" * 100
+		monday = b"\x03\x7c\x03\x16" + records
+		tuesday = b"\x03\x7c\x03\x17" + records
+		changed = b"\x03\x7c\x03\x17" + records.replace(b"Bolt 106", b"Bolt 107", 1)
+
+		with patch("vir_conto.importer.hashes.HASH_CHUNK_SIZE", 7):
+			self.assertEqual(get_dbf_hash(io.BytesIO(monday)), get_dbf_hash(io.BytesIO(tuesday)))
+			self.assertNotEqual(get_dbf_hash(io.BytesIO(tuesday)), get_dbf_hash(io.BytesIO(changed)))
+		self.assertEqual(get_dbf_hash(io.BytesIO(monday)), hashlib.sha256(monday[:1] + monday[4:]).hexdigest())
+
+	def test_dbf_hash_stream_hashes_while_reading(self):
+		"""Test a member hashed during its read has the hash of `get_dbf_hash`, whatever the read sizes are."""
+		content = b"\x03\x7c\x03\x16" + b"\x41\x00\x00\x00" + b" 106Bolt 106" * 100 + b"\x1a"
+
+		for size in (1, 2, 5, 32, len(content)):
+			stream = DbfHashStream(io.BytesIO(content))
+			data = stream.read(size)
+			data += stream.read(size)
+			self.assertEqual(data, content[: 2 * size])
+			self.assertEqual(stream.hexdigest(), get_dbf_hash(io.BytesIO(content)))
+		self.assertEqual(get_dbf_hash(io.BytesIO(content)), hashlib.sha256(content[:1] + content[4:]).hexdigest())
+
+	def test_reset_import_hashes(self):
+		"""Test the last import hash is cleared by the doctype of the Primary Key."""
+		frappe.db.set_value("Primary Key", "tcsop", "last_import_hash", "abc")
+
+		reset_import_hashes({"tcsop"})
+
+		self.assertIsNone(frappe.db.get_value("Primary Key", "tcsop", "last_import_hash"))
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.indexes import (
+	_get_index_statistics,
+	get_declared_indexes,
+	get_index_usage,
+	sync_indexes,
+	sync_table_indexes,
+)
+
+INDEXES = {
+	"tabvir_bolt": [
+		frappe._dict(Key_name="PRIMARY", Column_name="name"),
+		frappe._dict(Key_name="rkod", Column_name="rkod"),
+		frappe._dict(Key_name="vc_rkod_datum", Column_name="rkod"),
+		frappe._dict(Key_name="vc_rkod_datum", Column_name="datum"),
+		frappe._dict(Key_name="vc_ev_rkod", Column_name="ev"),
+		frappe._dict(Key_name="vc_ev_rkod", Column_name="rkod"),
+		frappe._dict(Key_name="vc_unused", Column_name="ho"),
+	],
+}
+
+
+class TestIndexes(unittest.TestCase):
+	"""Test suite for the composite indexes of the Conto doctypes."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_declared_indexes_from_hooks(self):
+		"""Test the default declarations cover the daily tables."""
+		declared = get_declared_indexes()
+
+		self.assertEqual(declared["vir_bolt"]["rkod_datum"], ["rkod", "datum"])
+		self.assertEqual(declared["vir_csop"]["tipus_csop_datum"], ["tipus", "csop", "datum"])
+
+	def test_sync_reconciles_in_one_online_alter(self):
+		"""Test changed and undeclared managed indexes are dropped and the rest is added in one statement."""
+		declared = {"rkod_datum": ["rkod", "datum"], "ev_rkod": ["ev", "ho", "rkod"], "rkod_tipus": ["rkod"]}
+
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("frappe.db.table_exists", return_value=True),
+			patch("frappe.db.has_column", return_value=True),
+			patch("frappe.db.sql", side_effect=lambda query, **kwargs: INDEXES[query.split("`")[1]]),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			changes = sync_table_indexes("vir_bolt", declared)
+
+		mock_ddl.assert_called_once_with(
+			"ALTER TABLE `tabvir_bolt` DROP INDEX `vc_ev_rkod`, DROP INDEX `vc_unused`, "
+			"ADD INDEX `vc_ev_rkod` (`ev`, `ho`, `rkod`), ADD INDEX `vc_rkod_tipus` (`rkod`), "
+			"ALGORITHM=INPLACE, LOCK=NONE"
+		)
+		self.assertEqual(changes, ["-vc_ev_rkod", "-vc_unused", "+vc_ev_rkod", "+vc_rkod_tipus"])
+
+	def test_sync_skips_unknown_columns(self):
+		"""Test an index with a missing column is not created and unchanged tables are left alone."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("frappe.db.table_exists", return_value=True),
+			patch("frappe.db.has_column", side_effect=lambda doctype, column: column != "missing"),
+			patch("frappe.db.sql", return_value=INDEXES["tabvir_bolt"][:6]),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			changes = sync_table_indexes(
+				"vir_bolt",
+				{"rkod_datum": ["rkod", "datum"], "ev_rkod": ["ev", "rkod"], "broken": ["rkod", "missing"]},
+			)
+
+		mock_ddl.assert_not_called()
+		self.assertEqual(changes, [])
+
+	def test_sync_checks_module_doctypes(self):
+		"""Test doctypes of the module without declarations are reconciled too."""
+		with (
+			patch("frappe.get_all", return_value=["vir_bolt", "tcsop"]),
+			patch(
+				"vir_conto.importer.indexes.sync_table_indexes",
+				side_effect=lambda doctype, indexes: ["-vc_old"] if doctype == "tcsop" else [],
+			) as mock_sync,
+		):
+			changes = sync_indexes({"vir_bolt": {"rkod_datum": ["rkod", "datum"]}})
+
+		mock_sync.assert_any_call("tcsop", {})
+		mock_sync.assert_any_call("vir_bolt", {"rkod_datum": ["rkod", "datum"]})
+		self.assertEqual(changes, {"tcsop": ["-vc_old"]})
+
+	def test_index_usage(self):
+		"""Test the usage report marks the managed indexes and counts unused ones as zero reads."""
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch(
+				"vir_conto.importer.indexes.get_table_indexes",
+				return_value={"PRIMARY": ["name"], "vc_rkod_datum": ["rkod", "datum"]},
+			),
+			patch(
+				"vir_conto.importer.indexes._get_index_statistics",
+				return_value={"PRIMARY": (16384, 120), "vc_rkod_datum": (8192, 0)},
+			),
+		):
+			usage = get_index_usage(["vir_bolt"])
+
+		self.assertEqual([row.index for row in usage], ["PRIMARY", "vc_rkod_datum"])
+		self.assertEqual([row.managed for row in usage], [False, True])
+		self.assertEqual(usage[1].reads, 0)
+
+	def test_index_statistics_without_privileges(self):
+		"""Test the sizes are left empty when the database user can not read `mysql.innodb_index_stats`."""
+
+		def sql(query, *args, **kwargs):
+			if "innodb_index_stats" in query:
+				raise Exception("SELECT command denied to user for table `mysql`.`innodb_index_stats`")
+			if "@@userstat" in query:
+				return ((1,),)
+			return (("vc_rkod_datum", 42),)
+
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("frappe.db.sql", side_effect=sql),
+			patch(
+				"vir_conto.importer.indexes.get_table_indexes",
+				return_value={"PRIMARY": ["name"], "vc_rkod_datum": ["rkod", "datum"]},
+			),
+		):
+			statistics = _get_index_statistics("vir_bolt")
+
+		self.assertEqual(statistics, {"PRIMARY": (None, 0), "vc_rkod_datum": (None, 42)})
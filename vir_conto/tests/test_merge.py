@@ -0,0 +1,40 @@
+import os
+import unittest
+
+import frappe
+
+from vir_conto.importer.merge import MergeStore
+
+
+class TestMergeStore(unittest.TestCase):
+	"""Test suite for merging the records of several Data Packets."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def test_last_record_wins(self):
+		"""Test a record replaces the earlier one with the same primary key."""
+		with MergeStore() as store:
+			store.add([("106/2025.03.22", {"nert_ossz": 1}), ("107/2025.03.22", {"nert_ossz": 2})])
+			store.add([("106/2025.03.22", {"nert_ossz": 3})])
+
+			self.assertEqual(len(store), 2)
+			records = dict(record for batch in store.iter_batches() for record in batch)
+			self.assertEqual(records, {"106/2025.03.22": {"nert_ossz": 3}, "107/2025.03.22": {"nert_ossz": 2}})
+
+	def test_batches_are_bounded(self):
+		"""Test the merged records are read back in batches."""
+		with MergeStore() as store:
+			store.add([(str(i), {"kod": str(i)}) for i in range(5)])
+
+			self.assertEqual([len(batch) for batch in store.iter_batches(batch_size=2)], [2, 2, 1])
+
+	def test_file_is_removed(self):
+		"""Test the temporary file is removed when the store is closed."""
+		with MergeStore() as store:
+			path = store.path
+			self.assertTrue(os.path.exists(path))
+
+		self.assertFalse(os.path.exists(path))
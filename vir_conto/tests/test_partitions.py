@@ -0,0 +1,106 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.partitions import add_next_partitions, partition_table, remove_partition
+
+
+def partitions(*years):
+	rows = [frappe._dict(name=f"p{year}", year=year, records=0) for year in years]
+	rows.append(frappe._dict(name="pfuture", year=None, records=0))
+	return rows
+
+
+class TestPartitions(unittest.TestCase):
+	"""Test suite for the yearly partitions of the daily tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_partition_table_from_first_year_to_next_year(self):
+		"""Test the table gets a partition for every year of its records and the next year."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("vir_conto.importer.partitions.get_partitions", return_value=[]),
+			patch(
+				"vir_conto.importer.partitions.getdate",
+				side_effect=lambda value=None: value or datetime.date(2025, 3, 22),
+			),
+			patch("frappe.db.sql", return_value=[[datetime.date(2023, 5, 1)]]),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertTrue(partition_table("vir_bolt"))
+
+		mock_ddl.assert_called_once_with(
+			"ALTER TABLE `tabvir_bolt` DROP PRIMARY KEY, ADD PRIMARY KEY (`name`, `datum`) "
+			"PARTITION BY RANGE (YEAR(`datum`)) ("
+			"PARTITION `p2023` VALUES LESS THAN (2024), PARTITION `p2024` VALUES LESS THAN (2025), "
+			"PARTITION `p2025` VALUES LESS THAN (2026), PARTITION `p2026` VALUES LESS THAN (2027), "
+			"PARTITION `pfuture` VALUES LESS THAN MAXVALUE)"
+		)
+
+	def test_partition_table_skips_partitioned_table(self):
+		"""Test a partitioned table is not rebuilt."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("vir_conto.importer.partitions.get_partitions", return_value=partitions(2025)),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertFalse(partition_table("vir_csop"))
+			mock_ddl.assert_not_called()
+
+	def test_add_next_partitions_splits_catch_all(self):
+		"""Test the missing years are split from the catch-all partition and complete tables are skipped."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch(
+				"vir_conto.importer.partitions.get_partitions",
+				side_effect=lambda doctype: partitions(2024, 2025) if doctype == "vir_bolt" else partitions(2026),
+			),
+			patch("vir_conto.importer.partitions.getdate", return_value=datetime.date(2025, 12, 1)),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			add_next_partitions()
+
+		mock_ddl.assert_called_once_with(
+			"ALTER TABLE `tabvir_bolt` REORGANIZE PARTITION `pfuture` INTO ("
+			"PARTITION `p2026` VALUES LESS THAN (2027), PARTITION `pfuture` VALUES LESS THAN MAXVALUE)"
+		)
+
+	def test_remove_partition_archives_by_exchange(self):
+		"""Test an archived year is exchanged into its own table before the partition is dropped."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("vir_conto.importer.partitions.get_partitions", return_value=partitions(2019, 2020)),
+			patch("vir_conto.importer.partitions.getdate", return_value=datetime.date(2025, 3, 22)),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertEqual(remove_partition("vir_bolt", 2019, archive=True), "tabvir_bolt__2019")
+
+		self.assertEqual(
+			[args.args[0] for args in mock_ddl.call_args_list],
+			[
+				"CREATE TABLE `tabvir_bolt__2019` LIKE `tabvir_bolt`",
+				"ALTER TABLE `tabvir_bolt__2019` REMOVE PARTITIONING",
+				"ALTER TABLE `tabvir_bolt` EXCHANGE PARTITION `p2019` WITH TABLE `tabvir_bolt__2019`",
+				"ALTER TABLE `tabvir_bolt` DROP PARTITION `p2019`",
+			],
+		)
+
+	def test_remove_partition_keeps_recent_years(self):
+		"""Test the years of the default charts can't be removed."""
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("vir_conto.importer.partitions.getdate", return_value=datetime.date(2025, 3, 22)),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertRaises(frappe.ValidationError, remove_partition, "vir_bolt", 2024)
+			mock_ddl.assert_not_called()
@@ -0,0 +1,135 @@
+import datetime
+import unittest
+
+import frappe
+
+from vir_conto.importer.rollups import ROLLUPS, get_month_buckets
+
+
+def insert_vir_bolt(rkod: str, datum: str, nert_ossz: float, vevok: int):
+	doc = frappe.get_doc(
+		{
+			"doctype": "vir_bolt",
+			"name": f"{rkod}/{datum}",
+			"rkod": rkod,
+			"datum": datum,
+			"nert_ossz": nert_ossz,
+			"vevok": vevok,
+		}
+	)
+	doc.db_insert()
+
+
+class TestRollups(unittest.TestCase):
+	"""Test suite for the monthly rollups of the daily tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_month_buckets_of_date_ranges(self):
+		"""Test every month between the first and last date of a store is a bucket."""
+		ranges = {"106": (datetime.date(2024, 11, 30), datetime.date(2025, 1, 2))}
+
+		self.assertEqual(get_month_buckets(ranges), {("106", 2024, 11), ("106", 2024, 12), ("106", 2025, 1)})
+
+	def test_refresh_recomputes_touched_buckets(self):
+		"""Test only the touched buckets are recomputed from the daily records."""
+		frappe.db.delete("vir_bolt", {"rkod": ("in", ["T106", "T107"])})
+		frappe.db.delete("vir_bolt_havi", {"rkod": ("in", ["T106", "T107"])})
+		insert_vir_bolt("T106", "2025-03-01", 100, 10)
+		insert_vir_bolt("T106", "2025-03-02", 50, 5)
+		insert_vir_bolt("T106", "2025-04-01", 70, 7)
+		insert_vir_bolt("T107", "2025-03-01", 30, 3)
+
+		rollup = ROLLUPS["vir_bolt"]
+		rollup.refresh({("T106", 2025, 3)})
+
+		rows = frappe.get_all(
+			"vir_bolt_havi", filters={"rkod": ("in", ["T106", "T107"])}, fields=["*"], order_by="name asc"
+		)
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0].name, "T106/2025/3")
+		self.assertEqual(rows[0].datum, datetime.date(2025, 3, 1))
+		self.assertEqual((rows[0].nert_ossz, rows[0].vevok, rows[0].record_count), (150, 15, 2))
+
+		frappe.db.delete("vir_bolt", {"name": "T106/2025-03-02"})
+		rollup.refresh({("T106", 2025, 3)})
+		self.assertEqual(frappe.db.get_value("vir_bolt_havi", "T106/2025/3", "record_count"), 1)
+
+	def test_group_and_store_names(self):
+		"""Test the names of the group, main group and store are written with the buckets and refreshed."""
+		frappe.db.delete("vir_csop", {"rkod": "T106"})
+		frappe.db.delete("vir_csop_havi", {"rkod": "T106"})
+		frappe.db.delete("raktnev", {"rkod": "T106"})
+		frappe.db.delete("tcsop", {"kod": "T10"})
+		frappe.db.delete("tfocsop", {"kod": ("in", ["T1", "T2"])})
+		frappe.get_doc({"doctype": "raktnev", "name": "T106", "rkod": "T106", "rnev": "Bolt 106"}).db_insert()
+		frappe.get_doc({"doctype": "tfocsop", "name": "T1", "kod": "T1", "nev": "Italok"}).db_insert()
+		frappe.get_doc({"doctype": "tfocsop", "name": "T2", "kod": "T2", "nev": "Edessegek"}).db_insert()
+		frappe.get_doc({"doctype": "tcsop", "name": "T10", "kod": "T10", "nev": "Sorok", "focsop": "T1"}).db_insert()
+		# a group of tcsop and a main group directly
+		for csop in ("T10", "T2"):
+			frappe.get_doc(
+				{
+					"doctype": "vir_csop",
+					"name": f"ERT/{csop}/T106/2025-03-01",
+					"tipus": "ERT",
+					"csop": csop,
+					"rkod": "T106",
+					"datum": "2025-03-01",
+					"nert": 10,
+				}
+			).db_insert()
+
+		rollup = ROLLUPS["vir_csop"]
+		rollup.refresh({("T106", 2025, 3)})
+
+		fields = ["csop_nev", "focsop", "focsop_nev", "rnev"]
+		self.assertEqual(
+			frappe.db.get_value("vir_csop_havi", "ERT/T10/T106/2025/3", fields),
+			("Sorok", "T1", "Italok", "Bolt 106"),
+		)
+		self.assertEqual(
+			frappe.db.get_value("vir_csop_havi", "ERT/T2/T106/2025/3", fields),
+			("Edessegek", "T2", "Edessegek", "Bolt 106"),
+		)
+
+		frappe.db.set_value("tfocsop", "T1", "nev", "Uditok", update_modified=False)
+		rollup.refresh_attributes()
+		self.assertEqual(frappe.db.get_value("vir_csop_havi", "ERT/T10/T106/2025/3", "focsop_nev"), "Uditok")
+
+	def test_main_group_code_also_in_tcsop(self):
+		"""Test a code of both tfocsop and tcsop is its own main group, not the parent of the tcsop group."""
+		frappe.db.delete("vir_csop", {"rkod": "T106"})
+		frappe.db.delete("vir_csop_havi", {"rkod": "T106"})
+		frappe.db.delete("tcsop", {"kod": "T105"})
+		frappe.db.delete("tfocsop", {"kod": ("in", ["T100", "T105"])})
+		frappe.get_doc({"doctype": "tfocsop", "name": "T100", "kod": "T100", "nev": "Husok (nyers)"}).db_insert()
+		frappe.get_doc({"doctype": "tfocsop", "name": "T105", "kod": "T105", "nev": "Husok (feldolgozott)"}).db_insert()
+		frappe.get_doc(
+			{"doctype": "tcsop", "name": "T105", "kod": "T105", "nev": "Sonkak", "focsop": "T100"}
+		).db_insert()
+		frappe.get_doc(
+			{
+				"doctype": "vir_csop",
+				"name": "ERT/T105/T106/2025-03-01",
+				"tipus": "ERT",
+				"csop": "T105",
+				"rkod": "T106",
+				"datum": "2025-03-01",
+				"nert": 10,
+			}
+		).db_insert()
+
+		ROLLUPS["vir_csop"].refresh({("T106", 2025, 3)})
+
+		self.assertEqual(
+			frappe.db.get_value("vir_csop_havi", "ERT/T105/T106/2025/3", ["csop_nev", "focsop", "focsop_nev"]),
+			("Husok (feldolgozott)", "T105", "Husok (feldolgozott)"),
+		)
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from vir_conto.importer.plan import ImportPlan
+from vir_conto.importer.scheduler import ImportScheduler, group_by_level
+
+TEST_METHOD = "vir_conto.vir_conto.doctype.data_packet.data_packet.import_table"
+
+
+class TestImportScheduler(unittest.TestCase):
+	"""Test suite for the level by level import of the Conto tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def test_group_by_level(self):
+		"""Test tables are grouped by import order and the levels are sorted."""
+		plan = ImportPlan(
+			[
+				{"name": "vir_csop", "conto_primary_key": "csop", "enabled": 1, "import_order": 10},
+				{"name": "tfocsop", "conto_primary_key": "kod", "enabled": 1, "import_order": 3},
+				{"name": "vir_bolt", "conto_primary_key": "rkod", "enabled": 1, "import_order": 10},
+				{"name": "torzs", "conto_primary_key": "f_kod", "enabled": 1, "import_order": 1},
+			]
+		)
+
+		levels = [[doctype.name for doctype in level] for level in group_by_level(plan.get_enabled())]
+		self.assertEqual(levels, [["torzs"], ["tfocsop"], ["vir_csop", "vir_bolt"]])
+
+	def test_single_table_runs_inline(self):
+		"""Test a level with one table doesn't start the process pool."""
+		with (
+			patch("frappe.get_attr") as mock_get_attr,
+			patch("vir_conto.importer.scheduler.ProcessPoolExecutor") as mock_pool,
+		):
+			with ImportScheduler(TEST_METHOD, workers=2) as scheduler:
+				scheduler.run_level(["torzs"], "packet.zip", "cp1250")
+
+			mock_get_attr.return_value.assert_called_once_with("torzs", "packet.zip", "cp1250")
+			mock_pool.assert_not_called()
+
+	def test_level_runs_in_pool(self):
+		"""Test the tables of a level are submitted to the pool and waited for."""
+		future = MagicMock()
+		with (
+			patch("frappe.get_attr") as mock_get_attr,
+			patch("vir_conto.importer.scheduler.ProcessPoolExecutor") as mock_pool,
+		):
+			mock_pool.return_value.submit.return_value = future
+
+			with ImportScheduler(TEST_METHOD, workers=2) as scheduler:
+				scheduler.run_level(["vir_bolt", "vir_csop"], "packet.zip", "cp1250")
+				scheduler.run_level(["vir_bolt", "vir_csop"], "packet.zip", "cp1250")
+
+			mock_pool.assert_called_once()
+			self.assertEqual(mock_pool.return_value.submit.call_count, 4)
+			self.assertEqual(future.result.call_count, 4)
+			mock_pool.return_value.shutdown.assert_called_once()
+			mock_get_attr.return_value.assert_not_called()
+
+	def test_web_request_runs_inline(self):
+		"""Test a web worker imports the tables of a level in its own process."""
+		with (
+			patch("frappe.get_attr") as mock_get_attr,
+			patch("vir_conto.importer.scheduler.ProcessPoolExecutor") as mock_pool,
+			patch("vir_conto.importer.scheduler.in_web_request", return_value=True),
+		):
+			with ImportScheduler(TEST_METHOD, workers=2) as scheduler:
+				scheduler.run_level(["vir_bolt", "vir_csop"], "packet.zip", "cp1250")
+
+			self.assertEqual(mock_get_attr.return_value.call_count, 2)
+			mock_pool.assert_not_called()
+
+	def test_single_worker_runs_inline(self):
+		"""Test the pool is not used when only one worker is configured."""
+		with (
+			patch("frappe.get_attr") as mock_get_attr,
+			patch("vir_conto.importer.scheduler.ProcessPoolExecutor") as mock_pool,
+		):
+			with ImportScheduler(TEST_METHOD, workers=1) as scheduler:
+				scheduler.run_level(["vir_bolt", "vir_csop"], "packet.zip", "cp1250")
+
+			self.assertEqual(mock_get_attr.return_value.call_count, 2)
+			mock_pool.assert_not_called()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import call, patch
+
+import frappe
+
+from vir_conto.importer.staging import StagingTable
+
+INDEXES = {
+	"tabtcsop": [
+		frappe._dict(Key_name="PRIMARY", Non_unique=0, Column_name="name", Sub_part=None, Index_type="BTREE"),
+		frappe._dict(Key_name="focsop", Non_unique=1, Column_name="focsop", Sub_part=None, Index_type="BTREE"),
+		frappe._dict(Key_name="nev_kod", Non_unique=1, Column_name="nev", Sub_part=40, Index_type="BTREE"),
+		frappe._dict(Key_name="nev_kod", Non_unique=1, Column_name="kod", Sub_part=None, Index_type="BTREE"),
+	],
+	"tabtcsop__staging": [
+		frappe._dict(Key_name="PRIMARY", Non_unique=0, Column_name="name", Sub_part=None, Index_type="BTREE"),
+	],
+}
+
+
+class TestStagingTable(unittest.TestCase):
+	"""Test suite for the shadow tables of the full-replace doctypes."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_prepare_drops_secondary_indexes(self):
+		"""Test the shadow table is created without its non-unique indexes."""
+		staging = StagingTable("tcsop")
+
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+			patch("frappe.db.sql", return_value=INDEXES["tabtcsop"]),
+		):
+			self.assertFalse(staging.prepare())
+
+			mock_ddl.assert_has_calls(
+				[
+					call("DROP TABLE IF EXISTS `tabtcsop__staging`"),
+					call("CREATE TABLE `tabtcsop__staging` LIKE `tabtcsop`"),
+					call("ALTER TABLE `tabtcsop__staging` DROP INDEX `focsop`, DROP INDEX `nev_kod`"),
+				]
+			)
+
+	def test_prepare_keeps_interrupted_table(self):
+		"""Test the shadow table of an interrupted import is resumed."""
+		staging = StagingTable("tcsop")
+
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+		):
+			self.assertTrue(staging.prepare(resume=True))
+			mock_ddl.assert_not_called()
+
+	def test_swap_builds_indexes_and_renames_atomically(self):
+		"""Test the indexes are added in one statement and both tables are renamed together."""
+		staging = StagingTable("tcsop")
+
+		with (
+			patch.object(frappe.db, "db_type", "mariadb"),
+			patch("frappe.db.sql_ddl") as mock_ddl,
+			patch("frappe.db.sql", side_effect=lambda query, **kwargs: INDEXES[query.split("`")[1]]),
+			patch("frappe.db.commit"),
+		):
+			staging.swap()
+
+			self.assertEqual(
+				[args.args[0] for args in mock_ddl.call_args_list],
+				[
+					"ALTER TABLE `tabtcsop__staging` ADD INDEX `focsop` (`focsop`), "
+					"ADD INDEX `nev_kod` (`nev`(40), `kod`)",
+					"RENAME TABLE `tabtcsop` TO `tabtcsop__old`, `tabtcsop__staging` TO `tabtcsop`",
+					"DROP TABLE IF EXISTS `tabtcsop__old`",
+				],
+			)
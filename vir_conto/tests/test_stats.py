@@ -0,0 +1,54 @@
+import io
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.importer.stats import STAGES, ImportStats
+
+
+class TestImportStats(unittest.TestCase):
+	"""Test suite for the Import Run statistics of the Data Packet import."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_nested_stage_is_not_counted_in_outer(self):
+		"""Test the time of an inner stage is excluded from the outer stage."""
+		stats = ImportStats("TEST-0001.LZH", "vir_csop")
+
+		with patch("time.perf_counter", side_effect=[0.0, 1.0, 3.0, 4.0]):
+			with stats.measure("decode"):
+				with stats.measure("unzip"):
+					pass
+
+		self.assertEqual(stats.timings["unzip"], 2.0)
+		self.assertEqual(stats.timings["decode"], 2.0)
+
+	def test_wrapped_stream_measures_unzip(self):
+		"""Test reads of the wrapped archive member are counted as `unzip`."""
+		stats = ImportStats("TEST-0001.LZH", "vir_csop")
+		stream = stats.wrap_stream(io.BytesIO(b"dbase"))
+
+		self.assertEqual(stream.read(2), b"db")
+		self.assertEqual(stream.read(), b"ase")
+		self.assertGreater(stats.timings["unzip"], 0)
+
+	def test_save_inserts_import_run(self):
+		"""Test the statistics are saved as an Import Run."""
+		stats = ImportStats("TEST-0001.LZH", "vir_csop")
+		stats.rows = 927
+		stats.save()
+
+		run = frappe.get_last_doc("Import Run", filters={"data_packet": "TEST-0001.LZH"})
+		self.assertEqual(run.table_name, "vir_csop")
+		self.assertEqual(run.rows, 927)
+		self.assertGreater(run.peak_rss_mb, 0)
+		for stage in STAGES:
+			self.assertIn(f"{stage}_time", run.as_dict())
@@ -7,10 +7,11 @@ import frappe
 
 from vir_conto.overrides.insights_workbook import CustomInsightsWorkbook
 from vir_conto.util import (
+	CHART_HASHES_KEY,
 	WorkbookInfo,
-	_clean_existing_records,
 	_create_new_workbooks,
 	_create_workbook_lookup,
+	_get_chart_file_hashes,
 	_import_charts,
 	_remove_old_workbooks,
 	load_documents_from_json,
@@ -86,6 +87,42 @@ class TestSyncDefaultCharts(unittest.TestCase):
 			mock_lookup.assert_called_once()
 			mock_commit.assert_not_called()
 
+	def test_sync_default_charts_unchanged_files(self):
+		"""Test sync function does nothing when the files and workbooks match the last sync."""
+		base_path = os.path.join(frappe.get_app_path("vir_conto"), "tests", "test_imports")
+
+		with (
+			patch("vir_conto.util._get_synced_chart_hashes", return_value=_get_chart_file_hashes(base_path)),
+			patch("vir_conto.util._has_default_workbooks", return_value=True),
+			patch("vir_conto.util._remove_old_workbooks") as mock_remove,
+			patch("vir_conto.util._import_charts") as mock_import,
+			patch("frappe.db.commit") as mock_commit,
+		):
+			sync_default_charts(base_path=base_path)
+
+			mock_remove.assert_not_called()
+			mock_import.assert_not_called()
+			mock_commit.assert_not_called()
+
+	def test_sync_default_charts_stores_file_hashes(self):
+		"""Test the file hashes are stored only when every document was synced."""
+		base_path = os.path.join(frappe.get_app_path("vir_conto"), "tests", "test_imports")
+
+		with (
+			patch("vir_conto.util._get_synced_chart_hashes", return_value=None),
+			patch("vir_conto.util._remove_old_workbooks"),
+			patch("vir_conto.util._create_new_workbooks"),
+			patch("vir_conto.util._create_workbook_lookup", return_value={9998: {"new_id": "1"}}),
+			patch("vir_conto.util._import_charts", side_effect=[False, True]),
+			patch("frappe.db.set_global") as mock_set_global,
+			patch("frappe.db.commit"),
+		):
+			sync_default_charts(base_path=base_path)
+			mock_set_global.assert_not_called()
+
+			sync_default_charts(base_path=base_path)
+			mock_set_global.assert_called_once_with(CHART_HASHES_KEY, json.dumps(_get_chart_file_hashes(base_path)))
+
 	def test_sync_default_charts_exception_handling(self):
 		"""Test sync function handles exceptions properly."""
 		with (
@@ -234,7 +271,11 @@ class TestSyncDefaultCharts(unittest.TestCase):
 		mock_logger = MagicMock()
 		import_workbooks = [CustomInsightsWorkbook(wb) for wb in self.sample_workbook_data]
 
-		with patch("frappe.db.exists", return_value=False), patch("frappe.get_doc") as mock_get_doc:
+		with (
+			patch("frappe.db.exists", return_value=False),
+			patch("frappe.get_doc") as mock_get_doc,
+			patch("vir_conto.util._configure_workbook_access") as mock_configure,
+		):
 			mock_doc = MagicMock()
 			mock_get_doc.return_value = mock_doc
 
@@ -243,6 +284,8 @@ class TestSyncDefaultCharts(unittest.TestCase):
 			# Should be called twice for each workbook
 			self.assertEqual(mock_get_doc.call_count, 2)
 			self.assertEqual(mock_doc.insert.call_count, 2)
+			# Only the new workbooks are shared
+			self.assertEqual(mock_configure.call_count, 2)
 
 	def test_create_new_workbooks_already_exists(self):
 		"""Test creation when workbooks already exist."""
@@ -313,7 +356,7 @@ class TestSyncDefaultCharts(unittest.TestCase):
 			self.assertEqual(len(results), 2)
 			self.assertEqual(results.get(9998)["new_id"], "1")
 			self.assertEqual(results.get(9999)["new_id"], "2")
-			self.assertEqual(mock_configure.call_count, 2)
+			mock_configure.assert_not_called()
 
 	def test_create_workbook_lookup_exception(self):
 		"""Test workbook lookup creation with exception."""
@@ -326,51 +369,59 @@ class TestSyncDefaultCharts(unittest.TestCase):
 			self.assertIsNone(result)
 			mock_logger.exception.assert_called_once()
 
-	def test_clean_existing_records(self):
-		"""Test cleaning of existing records."""
-		mock_logger = MagicMock()
-		workbooks = ["wb-1", "wb-2"]
-		# "Insights Query v3", "Insights Chart v3", "Insights Dashboard v3"
-
-		with patch("frappe.db.delete") as mock_delete:
-			_clean_existing_records(workbooks, mock_logger)
-
-			# Should be called for each doctype
-			self.assertEqual(mock_delete.call_count, 3)
-			mock_delete.assert_any_call("Insights Query v3", filters={"workbook": ["in", workbooks]})
-			mock_delete.assert_any_call("Insights Chart v3", filters={"workbook": ["in", workbooks]})
-			mock_delete.assert_any_call("Insights Dashboard v3", filters={"workbook": ["in", workbooks]})
-
-	def test_clean_existing_records_exception(self):
-		"""Test cleaning records with database exception."""
-		mock_logger = MagicMock()
-		workbooks = ["wb-1"]
-
-		with patch("frappe.db.delete", side_effect=Exception("Delete failed")):
-			_clean_existing_records(workbooks, mock_logger)
-
-			mock_logger.error.assert_called_once()
-
 	def test_import_charts_success(self):
 		"""Test successful import of charts."""
 		mock_logger = MagicMock()
 		workbook_lookup = {3: WorkbookInfo({"new_id": "1", "vir_id": "vir-test-workbook-1"})}
 		doctypes = ["Insights Query v3"]
 
-		with patch("vir_conto.util.load_documents_from_json") as mock_load:
+		with (
+			patch("vir_conto.util.load_documents_from_json") as mock_load,
+			patch("vir_conto.util._get_existing_hashes", return_value={}),
+			patch("vir_conto.util._get_document_hash", return_value="hash-1"),
+		):
 			mock_doc = MagicMock()
 			mock_doc.doctype = "Insights Query v3"
 			mock_doc.workbook = 3
 			mock_doc.name = "test-query-1"
 			mock_load.return_value = [mock_doc]
 
-			_import_charts(workbook_lookup, os.path.join("vir_conto", "tests"), doctypes, mock_logger)
+			result = _import_charts(workbook_lookup, os.path.join("vir_conto", "tests"), doctypes, mock_logger)
 
+			self.assertTrue(result)
 			mock_load.assert_called_once_with(
 				os.path.join("vir_conto", "tests", "insights_query_v3.json"), "Insights Query v3", mock_logger
 			)
 			mock_doc.insert.assert_called_once_with(ignore_links=True, set_name="test-query-1")
 			self.assertEqual(mock_doc.workbook, "1")
+			self.assertEqual(mock_doc.vir_hash, "hash-1")
+
+	def test_import_charts_diff(self):
+		"""Test only changed documents are replaced and removed ones are deleted."""
+		mock_logger = MagicMock()
+		workbook_lookup = {3: WorkbookInfo({"new_id": "1", "vir_id": "vir-test-workbook-1"})}
+		doctypes = ["Insights Query v3"]
+
+		unchanged_doc, changed_doc = MagicMock(), MagicMock()
+		unchanged_doc.workbook = changed_doc.workbook = 3
+		unchanged_doc.name = "test-query-1"
+		changed_doc.name = "test-query-2"
+		existing_hashes = {"test-query-1": "hash-1", "test-query-2": "hash-old", "test-query-3": "hash-3"}
+
+		with (
+			patch("vir_conto.util.load_documents_from_json", return_value=[unchanged_doc, changed_doc]),
+			patch("vir_conto.util._get_existing_hashes", return_value=existing_hashes),
+			patch("vir_conto.util._get_document_hash", side_effect=["hash-1", "hash-2"]),
+			patch("frappe.db.delete") as mock_delete,
+		):
+			_import_charts(workbook_lookup, os.path.join("vir_conto", "tests"), doctypes, mock_logger)
+
+			unchanged_doc.insert.assert_not_called()
+			changed_doc.insert.assert_called_once_with(ignore_links=True, set_name="test-query-2")
+			self.assertEqual(changed_doc.vir_hash, "hash-2")
+			self.assertEqual(mock_delete.call_count, 2)
+			mock_delete.assert_any_call("Insights Query v3", {"name": "test-query-2"})
+			mock_delete.assert_any_call("Insights Query v3", {"name": ["in", ["test-query-3"]]})
 
 	def test_import_charts_no_workbook_mapping(self):
 		"""Test import charts when no workbook mapping found."""
@@ -388,9 +439,10 @@ class TestSyncDefaultCharts(unittest.TestCase):
 			mock_doc.name = "test-query-1"
 			mock_load.return_value = [mock_doc]
 
-			_import_charts(workbook_lookup, base_path, doctypes, mock_logger)
+			result = _import_charts(workbook_lookup, base_path, doctypes, mock_logger)
 
 			# Should log warning and not insert
+			self.assertFalse(result)
 			mock_logger.warning.assert_called_once()
 			mock_doc.insert.assert_not_called()
 
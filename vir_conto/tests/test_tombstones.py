@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from vir_conto.importer.plan import ImportPlan
+from vir_conto.importer.tombstones import TombstoneWriter
+
+TEST_PRIMARY_KEYS = [
+	{"name": "torolt", "frappe_name": "torolt", "conto_primary_key": "kod", "enabled": 1, "updateable": 1},
+	{
+		"name": "termek",
+		"frappe_name": "termek",
+		"conto_primary_key": "kod",
+		"enabled": 1,
+		"type": "TERM",
+		"archive_deleted": 0,
+	},
+	{
+		"name": "partner",
+		"frappe_name": "partner",
+		"conto_primary_key": "kod",
+		"enabled": 1,
+		"type": "PARTN",
+		"archive_deleted": 1,
+	},
+	{"name": "telep", "frappe_name": "telep", "conto_primary_key": "kod", "enabled": 0, "type": "TELEP"},
+]
+
+
+class TestTombstoneWriter(unittest.TestCase):
+	"""Test suite for applying the deleted records of the `torolt` table."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def setUp(self):
+		self.plan = ImportPlan(TEST_PRIMARY_KEYS)
+		self.plan.get("torolt").bind(["TIP", "KOD"])
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_records_are_grouped_by_type(self):
+		"""Test the records are deleted with one statement per doctype and unknown types are ignored."""
+		writer = TombstoneWriter(self.plan)
+
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch("frappe.get_meta", return_value=MagicMock(get_table_fields=MagicMock(return_value=[]))),
+			patch("frappe.get_all", side_effect=lambda doctype, filters, **kwargs: sorted(filters["name"][1])),
+			patch("frappe.db.delete") as mock_delete,
+		):
+			writer.add(("TERM", "10100008"))
+			writer.add(("ARAK", "1"))
+			writer.add(("TERM", "10100009"))
+			writer.flush()
+
+			mock_delete.assert_called_once_with("termek", {"name": ("in", ["10100008", "10100009"])})
+			self.assertEqual(writer.deleted, 2)
+			self.assertEqual(writer.buffer, {})
+
+	def test_disabled_doctype_is_ignored(self):
+		"""Test the records of a TIPUS whose Primary Key is disabled are not deleted."""
+		writer = TombstoneWriter(self.plan)
+
+		with patch.object(writer, "_delete") as mock_delete:
+			writer.add(("TELEP", "1"))
+			writer.flush()
+
+			mock_delete.assert_not_called()
+		self.assertNotIn("telep", self.plan.archived_doctypes)
+
+	def test_full_chunk_is_deleted(self):
+		"""Test the records of a doctype are deleted when the chunk is full."""
+		writer = TombstoneWriter(self.plan, chunk_size=2)
+
+		with patch.object(writer, "_delete") as mock_delete:
+			writer.add(("TERM", "1"))
+			mock_delete.assert_not_called()
+			writer.add(("TERM", "2"))
+			mock_delete.assert_called_once()
+			self.assertEqual(sorted(mock_delete.call_args.args[1]), ["1", "2"])
+
+	def test_missing_doctype_is_skipped(self):
+		"""Test nothing is deleted if the doctype of the TIPUS is not installed."""
+		writer = TombstoneWriter(self.plan)
+
+		with (
+			patch("frappe.db.table_exists", return_value=False) as mock_exists,
+			patch("frappe.db.delete") as mock_delete,
+			patch("frappe.logger"),
+		):
+			writer.add(("TERM", "1"))
+			writer.flush()
+			writer.add(("TERM", "2"))
+			writer.flush()
+
+			mock_delete.assert_not_called()
+			mock_exists.assert_called_once_with("termek")
+
+	def test_archived_records_are_kept_as_deleted_documents(self):
+		"""Test a Deleted Document is inserted if `archive_deleted` is enabled."""
+		writer = TombstoneWriter(self.plan)
+		record = frappe._dict(name="P1", nev="Partner")
+
+		with (
+			patch("frappe.db.table_exists", return_value=True),
+			patch("frappe.get_meta", return_value=MagicMock(get_table_fields=MagicMock(return_value=[]))),
+			patch("frappe.get_all", return_value=[record]),
+			patch("frappe.db.bulk_insert") as mock_insert,
+			patch("frappe.db.delete") as mock_delete,
+		):
+			writer.add(("PARTN", "P1"))
+			writer.add(("PARTN", "P2"))
+			writer.flush()
+
+			doctype, fields, values = mock_insert.call_args.args
+			self.assertEqual(doctype, "Deleted Document")
+			row = dict(zip(fields, values[0], strict=True))
+			self.assertEqual((row["deleted_doctype"], row["deleted_name"]), ("partner", "P1"))
+			self.assertEqual(frappe.parse_json(row["data"]).nev, "Partner")
+			mock_delete.assert_called_once_with("partner", {"name": ("in", ["P1"])})
+			self.assertEqual(writer.deleted, 1)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 from logging import Logger
 from typing import TypedDict
@@ -6,8 +8,15 @@ import frappe
 from frappe.model.document import Document
 from frappe.modules.import_file import read_doc_from_file
 
+from vir_conto.importer.hashes import get_file_hash
 from vir_conto.overrides.insights_workbook import CustomInsightsWorkbook
 
+# Insights doctypes imported into the default workbooks, in the order of their dependencies
+CHART_DOCTYPES = ["Insights Query v3", "Insights Chart v3", "Insights Dashboard v3", "Insights Folder"]
+
+# Global default holding the hash of every import file of the last complete sync
+CHART_HASHES_KEY = "vir_conto_chart_hashes"
+
 
 class WorkbookInfo(TypedDict):
 	new_id: str
@@ -54,13 +63,16 @@ def sync_default_charts(base_path="") -> None:
 
 	This function uses JSON files from the 'charts' directory to perform the following:
 
+	- **Unchanged files**:
+	  - Nothing is done if the hash of every file matches the last complete sync and the default workbooks exist.
 	- **Workbooks**:
 	  - Imports workbooks from `insights_workbook.json`.
 	  - Removes default workbooks and their contents if they are no longer in the import file.
-	  - Creates new workbooks as needed.
+	  - Creates new workbooks as needed and shares them with everyone.
 	- **Charts, Queries, and Dashboards**:
-	  - Clears existing default records to prevent outdated data.
-	  - Imports and links `Insights Query v3`, `Insights Chart v3`, and `Insights Dashboard v3` documents to their respective workbooks.
+	  - Compares the content hash of every document with the one stored in its `vir_hash` field.
+	  - Inserts new and replaces changed `Insights Query v3`, `Insights Chart v3`, and `Insights Dashboard v3`
+	    documents linked to their respective workbooks, removes the ones no longer in the import files.
 	"""
 
 	logger: Logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
@@ -79,27 +91,30 @@ def sync_default_charts(base_path="") -> None:
 			logger.error("No workbooks found to import, aborting synchronization.")
 			return
 
-		doctypes_to_clean = ["Insights Query v3", "Insights Chart v3", "Insights Dashboard v3", "Insights Folder"]
+		# Step 2: Skip the sync if no file changed since the last complete one
+		chart_hashes = _get_chart_file_hashes(base_path)
+		if chart_hashes == _get_synced_chart_hashes() and _has_default_workbooks(import_workbooks):
+			logger.info("Default charts are unchanged, skipping synchronization.")
+			return
 
-		# Step 2: Remove unwanted workbooks
+		# Step 3: Remove unwanted workbooks
 		_remove_old_workbooks(import_workbooks, logger)
 
-		# Step 3: Create new workbooks if not exist already
+		# Step 4: Create new workbooks if not exist already
 		_create_new_workbooks(import_workbooks, logger)
 
-		# Step 4: Get existing workbooks and create lookup table
+		# Step 5: Get existing workbooks and create lookup table
 		workbook_lookup = _create_workbook_lookup(import_workbooks, logger)
 		if not workbook_lookup:
 			logger.error("Failed to create workbook lookup table, aborting synchronization.")
 			return
 
-		# Step 5: Remove all queries, charts, dashboards from the workbooks that we keep
-		# in order to sync the content of the default workbooks
-		default_wb = [wb["new_id"] for wb in workbook_lookup.values()]
-		_clean_existing_records(default_wb, logger)
-
-		# Step 6: Import queries, charts, dashboards for each workbook
-		_import_charts(workbook_lookup, base_path, doctypes_to_clean, logger)
+		# Step 6: Import the changed queries, charts, dashboards for each workbook
+		# the file hashes are kept only if every document is synced, otherwise the next sync retries
+		if _import_charts(workbook_lookup, base_path, CHART_DOCTYPES, logger):
+			frappe.db.set_global(CHART_HASHES_KEY, json.dumps(chart_hashes))
+		else:
+			logger.warning("Some default charts were not synced, they are retried by the next synchronization.")
 
 	except Exception as e:
 		logger.exception(f"Failed to sync default charts: {e}")
@@ -108,6 +123,33 @@ def sync_default_charts(base_path="") -> None:
 	frappe.db.commit()  # nosemgrep
 
 
+def _get_chart_file_hashes(base_path: str) -> dict[str, str | None]:
+	"""Hash of the workbook and chart import files by path, None for missing files."""
+	hashes = {}
+	for doctype in ["Insights Workbook", *CHART_DOCTYPES]:
+		path = os.path.join(base_path, frappe.scrub(doctype) + ".json")
+		hashes[path] = get_file_hash(path) if os.path.exists(path) else None
+	return hashes
+
+
+def _get_synced_chart_hashes() -> dict[str, str | None] | None:
+	hashes = frappe.db.get_global(CHART_HASHES_KEY)
+	return json.loads(hashes) if hashes else None
+
+
+def _has_default_workbooks(import_workbooks: list[CustomInsightsWorkbook]) -> bool:
+	"""Checks that the default workbooks of the site are the ones in the import file."""
+	vir_ids = frappe.get_all("Insights Workbook", filters={"is_default": 1}, pluck="vir_id")
+	return set(vir_ids) == {wb.vir_id for wb in import_workbooks}
+
+
+def _get_document_hash(doc: Document) -> str:
+	"""SHA-256 of the imported content of a document, after its workbook is mapped."""
+	content = doc.as_dict(convert_dates_to_str=True)
+	content.pop("vir_hash", None)
+	return hashlib.sha256(frappe.as_json(content, indent=None).encode()).hexdigest()
+
+
 def _remove_old_workbooks(import_workbooks: list[CustomInsightsWorkbook], logger: Logger) -> None:
 	"""Remove default workbooks that are no longer in the import file."""
 	old_workbooks: list[CustomInsightsWorkbook] = frappe.db.get_all(
@@ -127,13 +169,14 @@ def _remove_old_workbooks(import_workbooks: list[CustomInsightsWorkbook], logger
 
 
 def _create_new_workbooks(import_workbooks: list[CustomInsightsWorkbook], logger: Logger) -> None:
-	"""Create new workbooks from the import file if they don't exist."""
+	"""Create new workbooks from the import file if they don't exist and share them with everyone."""
 	for import_workbook in import_workbooks:
 		if not frappe.db.exists("Insights Workbook", {"vir_id": import_workbook.vir_id}):
 			try:
 				wb: CustomInsightsWorkbook = frappe.get_doc(import_workbook.as_dict())
 				wb.set("is_default", 1)
 				wb.insert()
+				_configure_workbook_access(wb, logger)
 				logger.info(f"Created new workbook: {wb.title}")
 			except Exception as e:
 				logger.error(f"Failed to create new workbook {import_workbook.title}: {e}")
@@ -153,7 +196,6 @@ def _create_workbook_lookup(
 		workbook_lookup: dict[int, WorkbookInfo] = {}
 
 		for new_workbook in new_workbooks:
-			_configure_workbook_access(new_workbook, logger)
 			import_workbook = import_workbook_map.get(new_workbook.vir_id)
 			if import_workbook:
 				workbook_lookup[import_workbook.name] = {
@@ -186,19 +228,27 @@ def _configure_workbook_access(workbook: CustomInsightsWorkbook, logger: Logger)
 		logger.error(f"Failed to configure access for workbook '{workbook.get('title', 'Unknown')}': {e}")
 
 
-def _clean_existing_records(workbook_names: list[str], logger: Logger) -> None:
-	"""This ensures that removed default charts won't remain in client database."""
-	try:
-		frappe.db.delete("Insights Query v3", filters={"workbook": ["in", workbook_names]})
-		frappe.db.delete("Insights Chart v3", filters={"workbook": ["in", workbook_names]})
-		frappe.db.delete("Insights Dashboard v3", filters={"workbook": ["in", workbook_names]})
-	except Exception as e:
-		logger.error(f"Failed to clean existing records\n{e}")
+def _get_existing_hashes(doctype: str, workbook_names: list[str]) -> dict[str, str | None]:
+	"""Content hash of the documents in the default workbooks by name."""
+	return dict(
+		frappe.get_all(doctype, filters={"workbook": ["in", workbook_names]}, fields=["name", "vir_hash"], as_list=True)
+	)
 
 
 def _import_charts(
 	workbook_lookup: dict[int, WorkbookInfo], base_path: str, doctypes: list[str], logger: Logger
-) -> None:
+) -> bool:
+	"""Inserts, replaces or removes the documents of the default workbooks which differ from the import files.
+
+	Documents whose `vir_hash` matches their imported content are not touched. A doctype whose
+	file is missing or empty is skipped, so a failed load never removes the existing documents.
+
+	Returns:
+	        bool: True if every document of the import files was synced.
+	"""
+	synced = True
+	workbook_names = [wb["new_id"] for wb in workbook_lookup.values()]
+
 	for doctype in doctypes:
 		dt = frappe.scrub(doctype)
 		path = os.path.join(base_path, dt + ".json")
@@ -208,18 +258,40 @@ def _import_charts(
 			logger.warning(f"No {doctype} found, skipping")
 			continue
 
+		existing_hashes = _get_existing_hashes(doctype, workbook_names)
+		imported_names = set()
+
 		for doc in docs:
 			try:
-				old_doc = doc
-				workbook_id = old_doc.workbook
+				name = str(doc.name)
+				workbook_id = doc.workbook
 				lookup = workbook_lookup.get(int(workbook_id))
 
 				if not lookup:
 					logger.warning(f"No workbook mapping found for workbook_id: {workbook_id} in {doctype} {doc.name}")
+					synced = False
 					continue
 
-				old_doc.workbook = lookup["new_id"]
-				old_doc.insert(ignore_links=True, set_name=old_doc.name)
+				doc.workbook = lookup["new_id"]
+				doc_hash = _get_document_hash(doc)
+				imported_names.add(name)
+
+				if name in existing_hashes:
+					if existing_hashes[name] == doc_hash:
+						continue
+					frappe.db.delete(doctype, {"name": name})
+
+				doc.vir_hash = doc_hash
+				doc.insert(ignore_links=True, set_name=doc.name)
 			except Exception as e:
 				logger.error(f"Failed to process {doctype} document {doc.name}: {e}")
+				synced = False
 				continue
+
+		# This ensures that removed default charts won't remain in client database
+		removed_names = [name for name in existing_hashes if name not in imported_names]
+		if removed_names:
+			frappe.db.delete(doctype, {"name": ["in", removed_names]})
+			logger.info(f"Removed {len(removed_names)} {doctype} no longer in the import file")
+
+	return synced
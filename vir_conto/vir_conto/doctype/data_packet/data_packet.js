@@ -4,14 +4,10 @@ frappe.ui.form.on("Data Packet", {
       frappe.call({
         // Call as a *document method*:
         doc: frm.doc,
-        method: "import_packet",
-        args: { verbose: "web" },
-        // freeze: true,
-        // freeze_message: __("Importing data..."),
+        method: "enqueue_import",
         callback: (r) => {
           if (!r.exc) {
-            if (cur_dialog) cur_dialog.hide();
-            frappe.msgprint(__("Import completed successfully."));
+            frappe.msgprint(__("Import queued, the packet is imported in the background."));
             frm.reload_doc();
           }
         },
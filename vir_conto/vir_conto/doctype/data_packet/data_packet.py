@@ -4,12 +4,42 @@
 import os
 import shutil
 import zipfile
-from typing import Literal
+from contextlib import nullcontext
+from datetime import date
+from typing import IO, Literal
 
-import dbf
 import frappe
 import frappe.utils
 from frappe.model.document import Document
+from frappe.utils import cint
+
+from vir_conto.importer.bulk import BULK_CHUNK_SIZE, DATE_FIELD_DOCTYPES, BulkWriter
+from vir_conto.importer.cascades import STORE_DOCTYPE, cascade_store_names, get_renamed_stores, get_store_names
+from vir_conto.importer.checkpoint import Checkpoint, clear_checkpoints
+from vir_conto.importer.date_ranges import (
+	DATE_FIELD,
+	STORE_FIELD,
+	WRITE_MODE_DATE_RANGE,
+	DateRangeDeleter,
+	extend_date_range,
+	get_date_ranges,
+	merge_date_ranges,
+	supports_date_ranges,
+)
+from vir_conto.importer.dbf_reader import DbfError, DbfReader
+from vir_conto.importer.hashes import DbfHashStream, get_file_hash, reset_import_hashes, set_last_import_hash
+from vir_conto.importer.merge import MergeStore
+from vir_conto.importer.plan import TOMBSTONE_TABLE, DoctypePlan, ImportPlan
+from vir_conto.importer.rollups import ROLLUPS, get_month_buckets, refresh_rollup_attributes
+from vir_conto.importer.scheduler import ImportScheduler, group_by_level
+from vir_conto.importer.staging import StagingTable
+from vir_conto.importer.stats import ImportStats
+from vir_conto.importer.tombstones import TombstoneWriter
+
+# Job id of the packet import, at most one is queued or running per site
+PACKET_IMPORT_JOB = "vir_conto_import_packets"
+# The job imports every pending packet, after an outage a store may upload many at once
+PACKET_IMPORT_TIMEOUT = 4 * 3600
 
 
 class DataPacket(Document):
@@ -21,7 +51,15 @@ class DataPacket(Document):
 	if TYPE_CHECKING:
 		from frappe.types import DF
 
+		from vir_conto.vir_conto.doctype.data_packet_checkpoint.data_packet_checkpoint import (
+			DataPacketCheckpoint,
+		)
+
+		checkpoints: DF.Table[DataPacketCheckpoint]
+		content_hash: DF.Data | None
+		duplicate_of: DF.Link | None
 		file_name: DF.Data | None
+		force_import: DF.Check
 		processed: DF.Check
 	# end: auto-generated types
 
@@ -29,8 +67,13 @@ class DataPacket(Document):
 		return frappe.get_site_path("private", "files", self.file_name)
 
 	def get_extraction_dir(self) -> str:
+		"""Directory of extracted contents, only used by packets imported by older versions."""
 		return frappe.get_site_path("private", "files", "storage", self.file_name)
 
+	def before_insert(self) -> None:
+		if os.path.exists(self.get_file_path()):
+			self.set_content_hash()
+
 	def after_insert(self) -> None:
 		fname = frappe.db.get_value("File", {"file_name": self.file_name}, ["name"])
 		if fname and isinstance(fname, str):
@@ -38,200 +81,620 @@ class DataPacket(Document):
 			file.attached_to_doctype = "Data Packet"
 			file.attached_to_name = self.name
 			file.save()
-		frappe.enqueue_doc("Data Packet", self.name, method="import_packet", timeout=3600)
+		if self.duplicate_of:
+			logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+			logger.info(f"Data Packet {self.name} is a duplicate of {self.duplicate_of}, it is not imported")
+			return
+		enqueue_packet_import()
+
+	def set_content_hash(self) -> None:
+		"""Hashes the archive, a packet uploaded again under a new file name is marked processed."""
+		self.content_hash = get_file_hash(self.get_file_path())
+		self.duplicate_of = frappe.db.get_value(
+			"Data Packet",
+			{"content_hash": self.content_hash, "file_name": ("!=", self.file_name)},
+			"name",
+			order_by="creation asc",
+		)
+		if self.duplicate_of:
+			self.processed = True
 
 	@frappe.whitelist()
-	def import_packet(self, verbose: Literal["console", "web"] | None = None):
-		"""Import logic for Conto export files. It extracts than processes the DBase files.
+	def enqueue_import(self) -> None:
+		"""Queues the packet for the packet import job, used by the Import Data button.
 
-		Args:
-				verbose (Literal[&quot;console&quot;, &quot;web&quot;] | None): Show progress on console or web. Defaults to None.
+		Manual imports go through the same job as the uploaded packets, so they never run
+		concurrently with `import_pending_packets` on the same tables.
+		A processed packet is imported again from the beginning, including its unchanged tables.
 		"""
-		extraction_dir = self.get_extraction_dir()
+		self.check_permission("write")
+		if self.processed:
+			clear_checkpoints(self.name)
+			self.db_set({"processed": 0, "force_import": 1})
+		enqueue_packet_import()
 
-		# Create the extraction directory if Trueit doesn't exist
-		if not os.path.exists(extraction_dir):
-			os.makedirs(extraction_dir)
+	def import_packet(self, verbose: Literal["console", "web"] | None = None):
+		"""Import logic for Conto export files. It streams the DBase files out of the archive and processes them.
 
-		# Open the zip file
-		with zipfile.ZipFile(self.get_file_path(), "r") as zip_ref:
-			# Extract all the contents into the specified directory
-			zip_ref.extractall(extraction_dir)
+		Only the members of enabled Primary Keys are read, nothing is extracted to disk.
+		The tables of the same `import_order` are imported concurrently.
+		An interrupted import continues from the checkpoints of the packet.
+		Members which are identical to the last imported member of their table are marked unchanged
+		and refresh nothing, unless the packet is imported again on purpose.
 
-		# Process dbf files
+		Args:
+				verbose (Literal[&quot;console&quot;, &quot;web&quot;] | None): Show progress on console or web. Defaults to None.
+		"""
 		encoding = "cp1250"
-		doctypes = frappe.db.get_list(
-			"Primary Key",
-			fields=["name", "updateable", "import_order"],
-			filters={"enabled": True},
-			order_by="import_order",
-		)
+		plan = ImportPlan.load()
 
 		logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
 		logger.setLevel("INFO")
 		logger.info(f"Beginning to import Data Packet: {self.name}")
 
-		for idx, doctype in enumerate(doctypes):
-			if verbose == "console":
-				frappe.utils.update_progress_bar(f"Importing {doctype.name} doctype", idx, len(doctypes))
-			if verbose == "web":
-				frappe.publish_progress(
-					(idx / len(doctypes)) * 100, title="Importing", description=f"Processing {doctype.name} doctype"
-				)
-
-			dbf_file = os.path.join(extraction_dir, doctype.name + ".dbf")
-			if not doctype.updateable:
-				# clean all entries because the whole dataset is sent
-				frappe.db.delete(doctype.name)
-			process_dbf(dbf_file, doctype.name, encoding)
+		force = bool(self.processed or self.force_import)
+		if self.processed:
+			# imported again on purpose, start from the beginning
+			clear_checkpoints(self.name)
+			frappe.db.commit()  # nosemgrep
+		elif not self.content_hash and os.path.exists(self.get_file_path()):
+			# inserted without its archive
+			self.set_content_hash()
+			self.db_update()
 			frappe.db.commit()  # nosemgrep
 
+		if self.duplicate_of and not force:
+			logger.info(f"Data Packet {self.name} is a duplicate of {self.duplicate_of}, it is not imported")
+			return
+
+		levels = group_by_level(plan.get_enabled())
+		with ImportScheduler("vir_conto.vir_conto.doctype.data_packet.data_packet.import_table") as scheduler:
+			for idx, level in enumerate(levels):
+				names = [doctype.name for doctype in level]
+				if verbose == "console":
+					frappe.utils.update_progress_bar(f"Importing {', '.join(names)} doctype", idx, len(levels))
+				if verbose == "web":
+					frappe.publish_progress(
+						(idx / len(levels)) * 100,
+						title="Importing",
+						description=f"Processing {', '.join(names)} doctype",
+					)
+
+				scheduler.run_level(names, self.name, encoding, force)
+
 		self.reload()
 		self.processed = True
+		self.force_import = False
 		self.save()
 		logger.info(f"Finished importing Data Packet: {self.name}")
 
 
-def process_dbf(dbf_file: str, doctype: str, encoding: str) -> None:
-	"""Method for processing a DBase file.
+def import_table(doctype: str, packet: str, encoding: str, force: bool = False) -> None:
+	"""Imports one Conto table of a packet archive and commits it.
+
+	Runs in the import workers as well, so it only depends on its arguments.
+	Completed tables of the packet are skipped, interrupted ones continue from their checkpoint.
+	Full-replace tables are swapped in when every record is loaded, readers never see a partial table.
+	Every member is read once, it is hashed and its date ranges are collected while it is written.
+	A member whose content hash equals the last imported member of the table is marked unchanged,
+	its shadow table is dropped instead of swapped in and nothing is refreshed after it.
+	A table which is not imported completely raises, so its packet is not marked processed.
+	The monthly rollup of a daily table is refreshed for the stores and months of the member.
+	New or renamed stores of raktnev are copied into the tables which keep the store name,
+	the names of groups and stores in the rollups are refreshed after their dimension table.
 
 	Args:
-			dbf_file: Source path of debase file.
-			doctype: What doctype it needs to create.
+			doctype: Name of the Conto table (Primary Key) to import.
+			packet: Name of the Data Packet.
 			encoding: Debase file encoded in.
+			force: Treat the member as changed even if it equals the last imported one. Defaults to False.
 	"""
-	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
-	logger.setLevel("INFO")
-
-	try:
-		table = dbf.Table(dbf_file, codepage=encoding, on_disk=True)
-		table.open()
-
-		logger.info(f"Importing {len(table):n} records from {dbf_file}")
-
-		fields = table.field_names
-		field_infos = {field_name: table.field_info(field_name) for field_name in fields}
-		for record in table:
-			row = {}
-
-			for field in fields:
-				# Trim strings
-				if field_infos[field].py_type is str:
-					value = str(record[field]).strip()
-				else:
-					value = record[field]
-				row[field.lower()] = value
-
-			row["doctype"] = doctype
+	plan = ImportPlan.load()
+	doctype_plan = plan.get(doctype)
+
+	# the whole dataset of full-replace tables is sent, it is loaded into a shadow table and swapped in,
+	# except for the daily tables, a shadow table would not have their date triggers
+	staging = None
+	if not doctype_plan.updateable and doctype != TOMBSTONE_TABLE and doctype_plan.doctype not in DATE_FIELD_DOCTYPES:
+		staging = StagingTable(doctype_plan.doctype)
+
+	# the store names are compared before and after the load
+	store_names = get_store_names() if doctype_plan.doctype == STORE_DOCTYPE else None
+
+	checkpoint = Checkpoint(packet, doctype, BULK_CHUNK_SIZE)
+	if checkpoint.completed:
+		if staging and staging.exists():
+			# interrupted between finishing the shadow table and swapping it in
+			staging.swap()
+			if store_names is not None:
+				cascade_store_names(get_renamed_stores(store_names, get_store_names()))
+			refresh_rollup_attributes(doctype_plan.doctype)
+			frappe.db.commit()  # nosemgrep
+		return
+	stats = ImportStats(packet, doctype)
 
-			if doctype == "torolt":
-				remove_from_db(row)
+	file_path: str = frappe.get_doc("Data Packet", packet).get_file_path()
+	with zipfile.ZipFile(file_path, "r") as zip_ref:
+		logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+		member = get_dbf_members(zip_ref).get(doctype.lower())
+		if not member:
+			logger.warning(f"{doctype}.dbf not found in Data Packet: {packet}")
+			return
+
+		if staging:
+			with stats.measure("write"):
+				if not staging.prepare(resume=bool(checkpoint.offset)):
+					checkpoint.offset = 0
+		resumed = bool(checkpoint.offset)
+
+		rollup = ROLLUPS.get(doctype_plan.doctype)
+		ranges = {} if rollup else None
+		member_hash = None
+		with zip_ref.open(member) as stream:
+			hashed = DbfHashStream(stream)
+			completed = process_dbf(
+				hashed,
+				plan,
+				doctype,
+				encoding,
+				checkpoint,
+				stats,
+				table_name=staging.name if staging else None,
+				ranges=ranges,
+			)
+			if completed:
+				with stats.measure("unzip"):
+					member_hash = hashed.hexdigest()
+
+		unchanged = completed and not force and not resumed and member_hash == doctype_plan.last_import_hash
+		if completed:
+			checkpoint.set_member_hash(member_hash)
+		if unchanged:
+			checkpoint.save(checkpoint.offset, "Unchanged")
+			logger.info(f"{doctype}.dbf is unchanged since the last import")
+		elif completed and rollup:
+			with stats.measure("write"):
+				rollup.refresh(get_month_buckets(ranges))
+
+	with stats.measure("commit"):
+		frappe.db.commit()  # nosemgrep
+	if staging and completed:
+		with stats.measure("write"):
+			if unchanged:
+				staging.drop()
 			else:
-				insert_into_db(row)
-
-	except dbf.exceptions.DbfError as e:
-		logger.exception(e.message)
-	except Exception as e:
-		logger.exception(str(e))
+				staging.swap()
+	if completed and not unchanged:
+		with stats.measure("write"):
+			if store_names is not None:
+				cascade_store_names(get_renamed_stores(store_names, get_store_names()))
+			refresh_rollup_attributes(doctype_plan.doctype)
+		set_last_import_hash(doctype, member_hash)
+	stats.save()
+	frappe.db.commit()  # nosemgrep
+
+	if not completed:
+		# the packet stays unprocessed, the next import continues from the checkpoint
+		frappe.throw(frappe._("{0} of Data Packet {1} was not imported completely").format(doctype, packet))
+
+
+def get_dbf_members(zip_ref: zipfile.ZipFile) -> dict[str, zipfile.ZipInfo]:
+	"""Maps the lowercase table names to the DBase members of a packet archive."""
+	members = {}
+	for info in zip_ref.infolist():
+		table_name, extension = os.path.splitext(os.path.basename(info.filename))
+		if extension.lower() == ".dbf":
+			members[table_name.lower()] = info
+	return members
+
+
+def process_dbf(
+	stream: IO[bytes],
+	plan: ImportPlan,
+	doctype: str,
+	encoding: str,
+	checkpoint: Checkpoint | None = None,
+	stats: ImportStats | None = None,
+	table_name: str | None = None,
+	ranges: dict[str, tuple[date, date]] | None = None,
+) -> bool:
+	"""Method for processing a DBase file.
 
+	Records are decoded in batches of tuples and written in bulk instead of inserting documents one by one.
+	Non-updateable doctypes are loaded into a shadow table by `import_table`, updateable ones
+	are upserted by their primary key. The records of `torolt` are deleted in chunks grouped by TIPUS.
 
-def remove_from_db(row):
-	"""Method for removing an Item from Vir-Conto.
+	The file is read once. In the `Date Range Replace` write mode the date range of every store
+	is deleted chunk by chunk, right before the records of the chunk are inserted.
 
-	Args:
-			row (_type_): A DBase record, that contains the TIPUS field
-	"""
-	# Get the doctype, that is associated with the TIPUS parameter from C-Conto
-	doctype = frappe.db.get_value("Primary Key", {"type": row["tipus"]}, "frappe_name", cache=True)
-	frappe.delete_doc_if_exists(doctype, get_name(row))
-
-	# 	 if tip='TERM' then
-	#     if findkij(dmf.tblTermek,kod) then abl_term.termek_torol(True);
-	#    if tip='PARTN' then
-	#     if findkij(dmf.tblPartner,kod) then db_muv('D',dmf.tblPartner);
-	#    if tip='TELEP' then
-	#     if findkij(dmf.tblTelep,kod) then db_muv('D',dmf.tblTelep);
-	#    if tip='GVKOD' then
-	#     if findkij(dmf.tblGyujtvk,kod) then db_muv('D',dmf.tblGyujtvk);
-	#    if tip='ARAK' then
-
-
-def get_name(row: dict) -> str:
-	"""
-	Method for creating / accessing a primary key for Conto doctypes.
+	With a checkpoint every chunk is committed together with its offset, and the
+	records before the offset of the checkpoint are skipped without decoding them.
 
 	Args:
-			row: Data row must contain a 'doctype' field in order to create the key.
+			stream: Binary stream of the debase file.
+			plan: Import plan of the Data Packet.
+			doctype: Name of the Conto table (Primary Key) to import.
+			encoding: Debase file encoded in.
+			checkpoint: Progress of the table in the Data Packet. Defaults to None.
+			stats: Timings and row counts of the import stages. Defaults to None.
+			table_name: Doctype style name of the table written to. Defaults to the doctype.
+			ranges: Collects the first and last date of every store of a daily table. Defaults to None.
 
 	Returns:
-			str: The correct primary key as a string.
-	"""
-	# Selects the primary key for the correct doctype
-	primary_keys = frappe.db.get_value(
-		"Primary Key", filters={"name": row["doctype"]}, fieldname="conto_primary_key", cache=True
-	)
-	field_list = primary_keys.split(",")
-	result = ""
-
-	# Handling composite (multiple field) key creation
-	if isinstance(field_list, list) and len(field_list) > 1:
-		for key in field_list:
-			result += row[key] + "/"
-		result = result.rstrip("/")
-	else:
-		result = row[primary_keys]
-
-	return result
-
-
-def insert_into_db(row: dict) -> None:
+			bool: True if every record of the file was processed.
 	"""
-	Inserts a row into Frappe DB.
+	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+	logger.setLevel("INFO")
 
-	Args
-			row: Data row must contain a 'doctype' field in order to create a new Frappe document.
-	"""
-	docname = get_name(row)
-	doctype = row["doctype"]
+	measure = stats.measure if stats else lambda stage: nullcontext()
+	if stats:
+		stream = stats.wrap_stream(stream)
 
-	if not frappe.db.exists(doctype, docname):
-		# create new
-		new_doc = frappe.get_doc(row)
-		new_doc.insert()
+	try:
+		doctype_plan = plan.get(doctype)
+		with measure("decode"):
+			table = DbfReader(stream, encoding)
+
+		logger.info(f"Importing {len(table):n} records from {doctype}.dbf")
+
+		doctype_plan.bind(table.field_names)
+		offset = checkpoint.offset if checkpoint else 0
+		if offset:
+			logger.info(f"Resuming {doctype}.dbf after record {offset:n}")
+
+		dated = doctype != TOMBSTONE_TABLE and supports_date_ranges(doctype_plan.columns)
+		replace_ranges = doctype_plan.updateable and doctype_plan.write_mode == WRITE_MODE_DATE_RANGE and dated
+		collect_ranges = dated and (replace_ranges or ranges is not None)
+		member_ranges: dict[str, tuple[date, date]] = {}
+		if collect_ranges and offset:
+			with measure("decode"):
+				# the chunks before the checkpoint are written already, only their store and date are decoded
+				member_ranges = get_date_ranges(table, stop=offset)
+		deleter = DateRangeDeleter(doctype_plan.doctype, member_ranges) if replace_ranges else None
+		if collect_ranges:
+			store_index = doctype_plan.columns.index(STORE_FIELD)
+			date_index = doctype_plan.columns.index(DATE_FIELD)
+
+		writer = None
+		tombstones = None
+		if doctype == TOMBSTONE_TABLE:
+			tombstones = TombstoneWriter(plan, stats=stats)
+		else:
+			writer = BulkWriter(
+				doctype_plan.doctype,
+				doctype_plan.columns,
+				upsert=doctype_plan.updateable and not replace_ranges,
+				stats=stats,
+				table=table_name,
+			)
+		get_name = doctype_plan.get_record_name
+
+		batches = table.iter_batches(doctype_plan.fields, batch_size=BULK_CHUNK_SIZE, start=offset)
+		while True:
+			with measure("decode"):
+				batch = next(batches, None)
+			if batch is None:
+				break
+
+			if collect_ranges:
+				with measure("transform"):
+					batch_ranges: dict[str, tuple[date, date]] = {}
+					for values in batch:
+						extend_date_range(batch_ranges, values[store_index], values[date_index])
+					merge_date_ranges(member_ranges, batch_ranges)
+				if deleter:
+					with measure("write"):
+						# committed with the chunk
+						deleter.delete(batch_ranges)
+
+			with measure("transform"):
+				if writer:
+					for values in batch:
+						writer.add(get_name(values), values)
+					writer.flush()
+				else:
+					for values in batch:
+						tombstones.add(values)
+					tombstones.flush()
+					# the next member of a doctype with deleted records must not be skipped as unchanged
+					reset_import_hashes(tombstones.changed_doctypes)
+			if stats:
+				stats.rows += len(batch)
+
+			offset = min(offset + BULK_CHUNK_SIZE, len(table))
+			if checkpoint:
+				checkpoint.save(offset)
+				with measure("commit"):
+					frappe.db.commit()  # nosemgrep
+
+		if checkpoint:
+			checkpoint.save(len(table), "Completed")
+		if ranges is not None:
+			ranges.update(member_ranges)
+		if deleter:
+			logger.info(f"Replaced the records of {len(deleter.deleted):n} stores in {doctype}")
+
+		if writer and writer.fingerprint:
+			logger.info(
+				f"Imported {doctype} records: {writer.inserted:n} inserted, "
+				f"{writer.updated:n} updated, {writer.unchanged:n} unchanged"
+			)
+		elif writer:
+			logger.info(f"Bulk wrote {writer.count:n} {doctype} records")
+		else:
+			logger.info(f"Deleted {tombstones.deleted:n} records")
+
+	except DbfError as e:
+		logger.exception(f"Failed to read {doctype}.dbf: {e}")
+	except Exception as e:
+		logger.exception(str(e))
 	else:
-		# update
-		old_doc = frappe.get_doc(doctype, docname)
-		old_doc.update(row)
-		old_doc.save()
+		return True
+	return False
 
 
 def import_new_packets() -> int:
 	"""Job to import new packets.
 
 	Returns:
-			int: The number of packages imported.
+			int: The number of packages queued for import.
 	"""
 
 	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
 	logger.setLevel("INFO")
-	packets: list[str] = frappe.db.get_list(
-		"Data Packet", filters={"processed": False}, order_by="creation", pluck="name"
-	)
+	packets = get_pending_packets()
 
 	if len(packets) < 1:
 		return 0
 
 	logger.info("Beginning to import new packets")
 	try:
-		for p in packets:
-			frappe.enqueue_doc("Data Packet", name=p, method="import_packet", timeout=3600)
+		enqueue_packet_import()
 	except Exception as e:
 		logger.error(e)
 
-	logger.info(f"{len(packets)} packet(s) imported")
+	logger.info(f"{len(packets)} packet(s) queued for import")
 	return len(packets)
 
 
+def get_pending_packets() -> list[str]:
+	"""Names of the unprocessed Data Packets, oldest first."""
+	return frappe.db.get_list("Data Packet", filters={"processed": False}, order_by="creation", pluck="name")
+
+
+def enqueue_packet_import() -> None:
+	"""Queues `import_pending_packets`, unless it is already queued or running on the site."""
+	frappe.enqueue(
+		"vir_conto.vir_conto.doctype.data_packet.data_packet.import_pending_packets",
+		queue="long",
+		timeout=PACKET_IMPORT_TIMEOUT,
+		job_id=PACKET_IMPORT_JOB,
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def import_pending_packets() -> int:
+	"""Job which imports the pending Data Packets one after the other, in `creation` order.
+
+	Full-replace tables are only imported from the newest packet which contains them,
+	they are marked superseded in the older packets. If several packets are pending,
+	their updateable tables are merged and written once, see `merge_packets`.
+	Packets uploaded while the job runs are picked up before it finishes.
+
+	Returns:
+			int: The number of packets imported.
+	"""
+	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+	logger.setLevel("INFO")
+
+	imported = 0
+	failed: set[str] = set()
+	while packets := [packet for packet in get_pending_packets() if packet not in failed]:
+		plan = ImportPlan.load()
+		supersede_snapshots(packets, plan)
+		# merging can be turned off with `vir_conto_merge_packets: 0` in site_config.json
+		if len(packets) > 1 and cint(frappe.conf.get("vir_conto_merge_packets", 1)):
+			merge_packets(packets, plan, "cp1250")
+		for packet in packets:
+			try:
+				frappe.get_doc("Data Packet", packet).import_packet()
+				imported += 1
+			except Exception as e:
+				failed.add(packet)
+				frappe.db.rollback()
+				logger.exception(f"Failed to import Data Packet {packet}: {e}")
+
+	return imported
+
+
+def merge_packets(packets: list[str], plan: ImportPlan, encoding: str) -> None:
+	"""Imports the updateable tables of several pending packets with a single write pass per table.
+
+	The records of every packet are collected in a `MergeStore`, oldest packet first,
+	so the newest record of every primary key wins. The merged records are upserted
+	once and the table is marked completed in every merged packet. The other tables
+	are imported by `import_packet` as usual.
+
+	A table which fails to merge is left to the import of the single packets. So is a table
+	with records in a pending `torolt` table, the deletions of an older packet are applied
+	after the merged write and could remove a record written by a newer packet.
+
+	Args:
+			packets: Pending Data Packets, oldest first.
+			plan: Import plan of the packets.
+			encoding: Debase file encoded in.
+	"""
+	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+	logger.setLevel("INFO")
+	file_paths = {packet: frappe.get_doc("Data Packet", packet).get_file_path() for packet in packets}
+	tombstoned = _get_tombstoned_doctypes(packets, file_paths, plan, encoding)
+
+	for doctype_plan in plan.get_enabled():
+		if not doctype_plan.updateable or doctype_plan.name == TOMBSTONE_TABLE:
+			continue
+		if doctype_plan.doctype in tombstoned:
+			logger.info(f"{doctype_plan.name} has deleted records in the packets, it is imported packet by packet")
+			continue
+		if doctype_plan.write_mode == WRITE_MODE_DATE_RANGE:
+			# records removed inside a window are only deleted when the packets are imported one by one
+			continue
+
+		checkpoints = [Checkpoint(packet, doctype_plan.name, BULK_CHUNK_SIZE) for packet in packets]
+		# records of packets before a completed one are older than the stored ones
+		completed = [idx for idx, checkpoint in enumerate(checkpoints) if checkpoint.completed]
+		if completed:
+			checkpoints = checkpoints[completed[-1] + 1 :]
+		if len(checkpoints) < 2:
+			continue
+
+		stats = ImportStats(checkpoints[-1].packet, doctype_plan.name)
+		try:
+			with MergeStore() as store:
+				columns, counts = _read_into_store(store, checkpoints, file_paths, doctype_plan, encoding, stats)
+				if not columns:
+					continue
+
+				writer = BulkWriter(doctype_plan.doctype, columns, upsert=True, stats=stats)
+				rollup = ROLLUPS.get(doctype_plan.doctype)
+				ranges: dict = {}
+				for batch in store.iter_batches():
+					with stats.measure("transform"):
+						for name, row in batch:
+							writer.add(name, tuple(row.get(column) for column in columns))
+							if rollup:
+								extend_date_range(ranges, row.get("rkod"), row.get("datum"))
+						writer.flush()
+					stats.rows += len(batch)
+
+			if rollup:
+				with stats.measure("write"):
+					rollup.refresh(get_month_buckets(ranges))
+
+			for checkpoint in checkpoints:
+				checkpoint.save(counts.get(checkpoint.packet, 0), "Completed")
+			# the table holds records of several members now
+			set_last_import_hash(doctype_plan.name, None)
+			with stats.measure("commit"):
+				frappe.db.commit()  # nosemgrep
+			stats.save()
+			frappe.db.commit()  # nosemgrep
+			logger.info(
+				f"Merged {doctype_plan.name} of {len(checkpoints)} packets into {stats.rows:n} records: "
+				f"{writer.inserted:n} inserted, {writer.updated:n} updated, {writer.unchanged:n} unchanged"
+			)
+		except Exception as e:
+			frappe.db.rollback()
+			logger.exception(f"Failed to merge {doctype_plan.name}: {e}")
+
+
+def _get_tombstoned_doctypes(
+	packets: list[str], file_paths: dict[str, str], plan: ImportPlan, encoding: str
+) -> set[str]:
+	"""Doctypes with records in the `torolt` tables of the packets which are not imported yet."""
+	tombstone_plan = plan.doctypes.get(TOMBSTONE_TABLE)
+	if not tombstone_plan:
+		return set()
+
+	doctypes: set[str] = set()
+	for packet in packets:
+		if Checkpoint(packet, TOMBSTONE_TABLE, BULK_CHUNK_SIZE).completed:
+			continue
+		with zipfile.ZipFile(file_paths[packet], "r") as zip_ref:
+			member = get_dbf_members(zip_ref).get(TOMBSTONE_TABLE)
+			if not member:
+				continue
+
+			with zip_ref.open(member) as stream:
+				table = DbfReader(stream, encoding)
+				tombstone_plan.bind(table.field_names)
+				columns = tombstone_plan.columns
+				# older exports name the field TIPUS, newer ones TIP
+				type_index = columns.index("tipus") if "tipus" in columns else columns.index("tip")
+				for batch in table.iter_batches(tombstone_plan.fields, batch_size=BULK_CHUNK_SIZE):
+					doctypes.update(
+						plan.type_map[values[type_index]] for values in batch if values[type_index] in plan.type_map
+					)
+	return doctypes
+
+
+def _read_into_store(
+	store: MergeStore,
+	checkpoints: list[Checkpoint],
+	file_paths: dict[str, str],
+	doctype_plan: DoctypePlan,
+	encoding: str,
+	stats: ImportStats,
+) -> tuple[list[str], dict[str, int]]:
+	"""Reads a Conto table of the packets into the merge store, oldest first.
+
+	Returns:
+			tuple: Columns of the newest layout of the table and the number of records by packet.
+	"""
+	columns: list[str] = []
+	counts: dict[str, int] = {}
+	for checkpoint in checkpoints:
+		with zipfile.ZipFile(file_paths[checkpoint.packet], "r") as zip_ref:
+			member = get_dbf_members(zip_ref).get(doctype_plan.name.lower())
+			if not member:
+				continue
+
+			with zip_ref.open(member) as stream:
+				stream = stats.wrap_stream(stream)
+				with stats.measure("decode"):
+					table = DbfReader(stream, encoding)
+				doctype_plan.bind(table.field_names)
+				get_name = doctype_plan.get_record_name
+
+				batches = table.iter_batches(doctype_plan.fields, batch_size=BULK_CHUNK_SIZE)
+				while True:
+					with stats.measure("decode"):
+						batch = next(batches, None)
+					if batch is None:
+						break
+					with stats.measure("transform"):
+						store.add([(get_name(values), doctype_plan.make_row(values)) for values in batch])
+
+		columns = doctype_plan.columns
+		counts[checkpoint.packet] = len(table)
+	return columns, counts
+
+
+def supersede_snapshots(packets: list[str], plan: ImportPlan) -> None:
+	"""Marks the full-replace tables of the older packets superseded if a newer packet contains them.
+
+	Args:
+			packets: Pending Data Packets, oldest first.
+			plan: Import plan of the packets.
+	"""
+	full_replace = [
+		doctype.name for doctype in plan.get_enabled() if not doctype.updateable and doctype.name != TOMBSTONE_TABLE
+	]
+	if not full_replace:
+		return
+
+	logger = frappe.logger("import", allow_site=True, file_count=5, max_size=250000)
+	newest: dict[str, str] = {}
+	for packet in reversed(packets):
+		try:
+			with zipfile.ZipFile(frappe.get_doc("Data Packet", packet).get_file_path(), "r") as zip_ref:
+				members = get_dbf_members(zip_ref)
+		except (OSError, zipfile.BadZipFile):
+			# reported when the packet is imported
+			continue
+
+		for name in full_replace:
+			if name in newest:
+				checkpoint = Checkpoint(packet, name, BULK_CHUNK_SIZE)
+				if not checkpoint.completed:
+					checkpoint.save(0, "Superseded")
+					logger.info(f"{name} of Data Packet {packet} is superseded by {newest[name]}")
+			elif name.lower() in members:
+				newest[name] = packet
+
+	frappe.db.commit()  # nosemgrep
+
+
 def clear_old_packets() -> None:
 	"""
 	Clearing older than a month (>30 day) packets and files.
@@ -263,7 +726,7 @@ def clear_old_packets() -> None:
 
 		for p in old_packets:
 			packet: DataPacket = frappe.get_doc("Data Packet", p)
-			shutil.rmtree(packet.get_extraction_dir())  # extracted contents
+			shutil.rmtree(packet.get_extraction_dir(), ignore_errors=True)  # extracted contents of older versions
 			os.remove(packet.get_file_path())  # archive file
 			packet.delete()
 
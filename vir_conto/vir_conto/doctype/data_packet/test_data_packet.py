@@ -1,25 +1,41 @@
 # Copyright (c) 2025, Alex Nagy and Contributors
 # See license.txt
 
+import datetime
 import os.path
 import shutil
 import unittest
+import zipfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import frappe
 import frappe.utils
 
+from vir_conto.importer.checkpoint import Checkpoint, clear_checkpoints
+from vir_conto.importer.dbf_reader import DbfError
+from vir_conto.importer.plan import ImportPlan
 from vir_conto.vir_conto.doctype.data_packet.data_packet import (
+	PACKET_IMPORT_JOB,
 	DataPacket,
 	clear_old_packets,
-	get_name,
+	enqueue_packet_import,
+	get_dbf_members,
 	import_new_packets,
-	insert_into_db,
+	import_pending_packets,
+	import_table,
+	merge_packets,
 	process_dbf,
-	remove_from_db,
+	supersede_snapshots,
 )
 
+TEST_PRIMARY_KEYS = [
+	{"name": "tcsop", "frappe_name": "tcsop", "conto_primary_key": "kod", "enabled": 1, "updateable": 0},
+	{"name": "tfocsop", "frappe_name": "tfocsop", "conto_primary_key": "kod", "enabled": 1, "updateable": 1},
+	{"name": "torolt", "frappe_name": "torolt", "conto_primary_key": "kod", "enabled": 1, "updateable": 1},
+	{"name": "termek", "frappe_name": "termek", "conto_primary_key": "kod", "enabled": 0, "type": "TERM"},
+]
+
 
 def create_datapacket(file_name: str):
 	doc = frappe.get_doc(
@@ -62,14 +78,16 @@ class TestDataPacket(unittest.TestCase):
 	def setUp(self) -> None:
 		"""Set up before each test"""
 		self.dbf_table_mock = MagicMock()
-		self.dbf_table_mock.field_names = ["id", "name"]
-		self.dbf_table_mock.__iter__.return_value = [
-			{"id": 1, "name": "Alice "},
-			{"id": 2, "name": " Bob"},
+		self.dbf_table_mock.field_names = ["KOD", "NEV", "REND"]
+		records = [
+			{"KOD": "100", "NEV": "Alice", "REND": 1},
+			{"KOD": "200", "NEV": "Bob", "REND": 2},
 		]
-		self.dbf_table_mock.field_info.side_effect = lambda name: (
-			MagicMock(py_type=int) if name == "id" else MagicMock(py_type=str)
+		self.dbf_table_mock.__len__.return_value = len(records)
+		self.dbf_table_mock.iter_batches.side_effect = lambda fields, **kwargs: iter(
+			[[tuple(record[field] for field in fields) for record in records]]
 		)
+		self.plan = ImportPlan(TEST_PRIMARY_KEYS)
 
 	def tearDown(self):
 		"""Clean up after each test."""
@@ -95,6 +113,8 @@ class TestDataPacket(unittest.TestCase):
 
 		Name is generated from Primary Key doctype.
 		"""
+		plan = ImportPlan.load()
+
 		# Check with simple key
 		test_row = {
 			"kod": "901",
@@ -104,7 +124,7 @@ class TestDataPacket(unittest.TestCase):
 			"focsop": "200",
 			"doctype": "tcsop",
 		}
-		self.assertEqual("901", get_name(test_row))
+		self.assertEqual("901", plan.get("tcsop").get_name(test_row))
 
 		# Check with composite key
 		test_composite_row = {
@@ -131,100 +151,239 @@ class TestDataPacket(unittest.TestCase):
 			"bselejt": 0.0,
 			"doctype": "vir_bolt",
 		}
-		self.assertEqual("106/2025.03.22", get_name(test_composite_row))
-
-	def test_import_insert_db(self):
-		mock_data = {
-			"kod": "901",
-			"nev": "GÖNGYÖLEG",
-			"rend": 0,
-			"tarhely": "",
-			"focsop": "200",
-			"doctype": "tcsop",
-		}
-		mock_doc = MagicMock()
+		self.assertEqual("106/2025.03.22", plan.get("vir_bolt").get_name(test_composite_row))
 
+	def test_process_dbf_upserts_records(self):
+		"""Test upsert with BulkWriter, if doctype is updateable."""
 		with (
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.get_name"),
-			patch("frappe.db.exists", return_value=False),
-			patch("frappe.get_doc", return_value=mock_doc),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", return_value=self.dbf_table_mock),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.TombstoneWriter") as mock_tombstones,
+			patch("frappe.logger") as _mock_logger,
 		):
 			# Execute function
-			insert_into_db(mock_data)
-			mock_doc.insert.assert_called_once()
+			process_dbf(MagicMock(), self.plan, doctype="tfocsop", encoding="cp1250")
 
-	def test_import_update_db(self):
-		mock_data = {
-			"kod": "901",
-			"nev": "GÖNGYÖLEG",
-			"rend": 0,
-			"tarhely": "",
-			"focsop": "200",
-			"doctype": "tcsop",
-		}
-		mock_doc = MagicMock()
+			mock_writer.assert_called_once_with("tfocsop", ["kod", "nev"], upsert=True, stats=None, table=None)
+			mock_writer.return_value.add.assert_any_call("100", ("100", "Alice"))
+			mock_writer.return_value.add.assert_any_call("200", ("200", "Bob"))
+			mock_writer.return_value.flush.assert_called_once()
+			mock_tombstones.assert_not_called()
 
+	def test_process_dbf_removes_records(self):
+		"""Test use TombstoneWriter, if doctype == 'torolt'."""
 		with (
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.get_name"),
-			patch("frappe.db.exists", return_value=True),
-			patch("frappe.get_doc", return_value=mock_doc),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", return_value=self.dbf_table_mock),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.TombstoneWriter") as mock_tombstones,
+			patch("frappe.logger"),
 		):
-			# Execute function
-			insert_into_db(mock_data)
-			mock_doc.update.assert_called_once()
-			mock_doc.save.assert_called_once()
+			mock_tombstones.return_value.changed_doctypes = set()
+			process_dbf(MagicMock(), self.plan, doctype="torolt", encoding="utf-8")
+
+			mock_tombstones.assert_called_once_with(self.plan, stats=None)
+			mock_tombstones.return_value.add.assert_any_call(("100", "Alice", 1))
+			mock_tombstones.return_value.add.assert_any_call(("200", "Bob", 2))
+			mock_tombstones.return_value.flush.assert_called_once()
+			mock_writer.assert_not_called()
 
-	def test_process_dbf_inserts_records(self):
-		"""Test call insert_into_db, if doctype != 'torolt'."""
+	def test_process_dbf_bulk_inserts_records(self):
+		"""Test use BulkWriter without upsert, if doctype is not updateable."""
 		with (
-			patch("dbf.Table", return_value=self.dbf_table_mock),
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.insert_into_db") as mock_insert,
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.remove_from_db") as mock_remove,
-			patch("frappe.logger") as _mock_logger,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", return_value=self.dbf_table_mock),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("frappe.logger"),
 		):
 			# Execute function
-			process_dbf("dummy.dbf", doctype="partner", encoding="cp1250")
+			self.assertTrue(process_dbf(MagicMock(), self.plan, doctype="tcsop", encoding="cp1250"))
+
+			mock_writer.assert_called_once_with("tcsop", ["kod", "nev", "rend"], upsert=False, stats=None, table=None)
+			mock_writer.return_value.add.assert_any_call("100", ("100", "Alice", 1))
+			mock_writer.return_value.add.assert_any_call("200", ("200", "Bob", 2))
+			mock_writer.return_value.flush.assert_called_once()
+
+	def test_process_dbf_replaces_date_ranges(self):
+		"""Test the date range of every store is deleted and the records are inserted, if the write mode is set."""
+		plan = ImportPlan(
+			[
+				{
+					"name": "vir_bolt",
+					"frappe_name": "vir_bolt",
+					"conto_primary_key": "rkod,datum",
+					"enabled": 1,
+					"updateable": 1,
+					"write_mode": "Date Range Replace",
+				}
+			]
+		)
+		records = [
+			{"RKOD": "106", "DATUM": "2025.03.22", "NERT_OSSZ": 10.0},
+			{"RKOD": "106", "DATUM": "2025.03.21", "NERT_OSSZ": 20.0},
+			{"RKOD": "107", "DATUM": "2025.03.22", "NERT_OSSZ": 30.0},
+		]
+		table = MagicMock(field_names=["RKOD", "DATUM", "NERT_OSSZ"])
+		table.__len__.return_value = len(records)
+		table.iter_batches.side_effect = lambda fields, **kwargs: iter(
+			[[tuple(record[field] for field in fields) for record in records]]
+		)
+
+		ranges = {}
+		with (
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", return_value=table),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DateRangeDeleter") as mock_deleter,
+			patch("frappe.logger"),
+		):
+			self.assertTrue(process_dbf(MagicMock(), plan, doctype="vir_bolt", encoding="cp1250", ranges=ranges))
+
+			expected = {
+				"106": (datetime.date(2025, 3, 21), datetime.date(2025, 3, 22)),
+				"107": (datetime.date(2025, 3, 22), datetime.date(2025, 3, 22)),
+			}
+			# the file is read once, the ranges of the chunk are deleted before it is written
+			table.iter_batches.assert_called_once()
+			mock_deleter.assert_called_once_with("vir_bolt", {})
+			mock_deleter.return_value.delete.assert_called_once_with(expected)
+			self.assertEqual(ranges, expected)
+			self.assertFalse(mock_writer.call_args.kwargs["upsert"])
+			mock_writer.return_value.add.assert_any_call("106/2025.03.21", ("106", "2025.03.21", 20.0))
+
+	def test_process_dbf_resumes_from_checkpoint(self):
+		"""Test records before the checkpoint are skipped and the table is marked completed."""
+		checkpoint = MagicMock(offset=1)
+		with (
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", return_value=self.dbf_table_mock),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter"),
+			patch("frappe.db.commit"),
+			patch("frappe.logger"),
+		):
+			process_dbf(MagicMock(), self.plan, doctype="tfocsop", encoding="cp1250", checkpoint=checkpoint)
 
-			self.dbf_table_mock.open.assert_called_once()
-			mock_insert.assert_any_call({"id": 1, "name": "Alice", "doctype": "partner"})
-			mock_insert.assert_any_call({"id": 2, "name": "Bob", "doctype": "partner"})
-			mock_remove.assert_not_called()
+			self.assertEqual(self.dbf_table_mock.iter_batches.call_args.kwargs["start"], 1)
+			checkpoint.save.assert_any_call(2)
+			checkpoint.save.assert_called_with(2, "Completed")
+
+	def test_checkpoint_is_stored_on_packet(self):
+		"""Test the progress of a table is kept in the checkpoints of the Data Packet."""
+		file_name = "TEST-0001.LZH"
+		create_datapacket(file_name)
+
+		checkpoint = Checkpoint(file_name, "vir_csop", 5000)
+		self.assertEqual((checkpoint.status, checkpoint.offset), ("Pending", 0))
+		checkpoint.save(5000)
+
+		checkpoint = Checkpoint(file_name, "vir_csop", 5000)
+		self.assertEqual((checkpoint.status, checkpoint.offset), ("In Progress", 5000))
+		self.assertFalse(checkpoint.completed)
+
+		data_packet: DataPacket = frappe.get_doc("Data Packet", file_name)
+		self.assertEqual([row.table_name for row in data_packet.checkpoints], ["vir_csop"])
+
+		clear_checkpoints(file_name)
+		self.assertEqual(Checkpoint(file_name, "vir_csop", 5000).offset, 0)
+
+	def test_import_table_marks_unchanged_member(self):
+		"""Test a member identical to the last imported one is read once and refreshes nothing, unless forced."""
+		file_name = "TEST-0001.LZH"
+		create_datapacket(file_name)
+		self.plan.get("tfocsop").last_import_hash = "abc"
+
+		with (
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.ImportPlan.load", return_value=self.plan),
+			patch("zipfile.ZipFile"),
+			patch(
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.get_dbf_members",
+				return_value={"tfocsop": MagicMock()},
+			),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfHashStream") as mock_hash,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.process_dbf", return_value=True) as mock_process,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.refresh_rollup_attributes") as mock_refresh,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.set_last_import_hash") as mock_set_hash,
+			patch("frappe.db.commit"),
+			patch("frappe.logger"),
+		):
+			mock_hash.return_value.hexdigest.return_value = "abc"
+			import_table("tfocsop", file_name, "cp1250")
+
+			mock_process.assert_called_once()
+			self.assertIs(mock_process.call_args.args[0], mock_hash.return_value)
+			checkpoint = Checkpoint(file_name, "tfocsop", 5000)
+			self.assertEqual(checkpoint.status, "Unchanged")
+			self.assertTrue(checkpoint.completed)
+			mock_refresh.assert_not_called()
+			mock_set_hash.assert_not_called()
+
+			clear_checkpoints(file_name)
+			import_table("tfocsop", file_name, "cp1250", force=True)
+			self.assertEqual(mock_process.call_count, 2)
+			mock_refresh.assert_called_once_with("tfocsop")
+			mock_set_hash.assert_called_once_with("tfocsop", "abc")
+
+	def test_import_table_raises_when_incomplete(self):
+		"""Test a table which failed part-way is not marked imported, so its packet stays unprocessed."""
+		file_name = "TEST-0001.LZH"
+		create_datapacket(file_name)
 
-	def test_process_dbf_removes_records(self):
-		"""Test call remove_from_db, if doctype == 'torolt'."""
 		with (
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.dbf.Table", return_value=self.dbf_table_mock),
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.insert_into_db") as mock_insert,
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.remove_from_db") as mock_remove,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.ImportPlan.load", return_value=self.plan),
+			patch("zipfile.ZipFile"),
+			patch(
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.get_dbf_members",
+				return_value={"tfocsop": MagicMock()},
+			),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfHashStream"),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.process_dbf", return_value=False),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.set_last_import_hash") as mock_set_hash,
+			patch("frappe.db.commit"),
 			patch("frappe.logger"),
 		):
-			process_dbf("dummy.dbf", doctype="torolt", encoding="utf-8")
+			self.assertRaises(frappe.ValidationError, import_table, "tfocsop", file_name, "cp1250")
+			mock_set_hash.assert_not_called()
+
+	def test_duplicate_packet_is_marked_processed(self):
+		"""Test an archive uploaded again under a new file name is not imported."""
+		create_datapacket("TEST-0001.LZH")
+		frappe.db.set_value("Data Packet", "TEST-0001.LZH", "content_hash", "abc")
 
-			mock_remove.assert_any_call({"id": 1, "name": "Alice", "doctype": "torolt"})
-			mock_remove.assert_any_call({"id": 2, "name": "Bob", "doctype": "torolt"})
-			mock_insert.assert_not_called()
+		duplicate: DataPacket = frappe.get_doc({"doctype": "Data Packet", "file_name": "TEST-0002.LZH"})
+		with patch("vir_conto.vir_conto.doctype.data_packet.data_packet.get_file_hash", return_value="abc"):
+			duplicate.set_content_hash()
+
+		self.assertEqual(duplicate.duplicate_of, "TEST-0001.LZH")
+		self.assertTrue(duplicate.processed)
+
+	def test_import_button_queues_the_packet(self):
+		"""Test a manual import goes through the packet import job and a processed packet is forced."""
+		create_datapacket("TEST-0001.LZH")
+		data_packet: DataPacket = frappe.get_doc("Data Packet", "TEST-0001.LZH")
+
+		with patch("vir_conto.vir_conto.doctype.data_packet.data_packet.enqueue_packet_import") as mock_enqueue:
+			data_packet.enqueue_import()
+
+		mock_enqueue.assert_called_once()
+		data_packet.reload()
+		self.assertFalse(data_packet.processed)
+		self.assertTrue(data_packet.force_import)
 
 	def test_process_dbf_handles_dbferror(self):
 		"""Test if exception in opening Dbase file, logs error"""
-		import dbf
-
 		with (
 			patch(
-				"vir_conto.vir_conto.doctype.data_packet.data_packet.dbf.Table",
-				side_effect=dbf.exceptions.DbfError("Dbf Error"),
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader",
+				side_effect=DbfError("Dbf Error"),
 			),
 			patch("frappe.logger") as mock_logger,
 		):
-			process_dbf("broken.dbf", "partner", "utf-8")
+			process_dbf(MagicMock(), self.plan, "tcsop", "utf-8")
 			mock_logger.return_value.exception.assert_called()
 
 	def test_process_dbf_handles_any_error(self):
 		"""Test if exception in opening Dbase file, logs error"""
 		with (
-			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.dbf.Table", side_effect=Exception("Error")),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", side_effect=Exception("Error")),
 			patch("frappe.logger") as mock_logger,
 		):
-			process_dbf("broken.dbf", "partner", "utf-8")
+			self.assertFalse(process_dbf(MagicMock(), self.plan, "tcsop", "utf-8"))
 			mock_logger.return_value.exception.assert_called()
 
 	def test_integration_import_data_packet(self):
@@ -266,7 +425,7 @@ class TestDataPacket(unittest.TestCase):
 		self.assertEqual(174, frappe.db.count("vir_bolt"))
 		self.assertEqual(927, frappe.db.count("vir_csop"))
 
-	def test_import_data_creates_extraction_dir(self):
+	def test_import_data_does_not_extract_archive(self):
 		mock_zip = MagicMock()
 
 		# Create mock Data Packet
@@ -275,14 +434,24 @@ class TestDataPacket(unittest.TestCase):
 		data_packet: DataPacket = frappe.get_doc("Data Packet", file_name)
 
 		with (
-			patch("os.path.exists", return_value=False),
 			patch("os.makedirs") as mock_makedirs,
 			patch("zipfile.ZipFile", return_value=mock_zip),
-			patch("frappe.db.get_list", return_value=[]),
+			patch("frappe.get_all", return_value=[]),
 		):
 			# Execute function
 			data_packet.import_packet()
-			mock_makedirs.assert_called_once_with(data_packet.get_extraction_dir())
+			mock_makedirs.assert_not_called()
+			mock_zip.__enter__.return_value.extractall.assert_not_called()
+
+	def test_get_dbf_members_maps_table_names(self):
+		"""Test DBase members are found case-insensitively and other members are skipped."""
+		path = frappe.get_app_path("vir_conto", "vir_conto", "doctype", "data_packet", "TEST-0001.LZH")
+		with zipfile.ZipFile(path) as zip_ref:
+			members = get_dbf_members(zip_ref)
+
+		self.assertEqual(members["kods"].filename, "KODS.dbf")
+		self.assertEqual(members["vir_csop"].filename, "vir_csop.dbf")
+		self.assertNotIn("termek.fpt", [info.filename for info in members.values()])
 
 	def test_import_queues_datapackets_correctly(self):
 		mock_packets = ["TEST-0001.LZH", "TEST-0002.LZH"]
@@ -290,22 +459,21 @@ class TestDataPacket(unittest.TestCase):
 		with (
 			patch("frappe.utils.nowtime", return_value="12:30:00"),
 			patch("frappe.logger"),
-			patch("frappe.enqueue_doc") as mock_enqueue,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.enqueue_packet_import") as mock_enqueue,
 			patch("frappe.db.get_list", return_value=mock_packets),
 		):
 			# Execute function
 			result = import_new_packets()
 
 			self.assertEqual(result, 2)
-			mock_enqueue.assert_any_call("Data Packet", name="TEST-0001.LZH", method="import_packet", timeout=3600)
-			mock_enqueue.assert_any_call("Data Packet", name="TEST-0002.LZH", method="import_packet", timeout=3600)
+			mock_enqueue.assert_called_once_with()
 
 	def test_import_returns_zero_when_no_packets(self):
 		""""""
 		with (
 			patch("frappe.utils.nowtime", return_value="12:30:00"),
 			patch("frappe.logger") as mock_logger,
-			patch("frappe.enqueue_doc") as mock_enqueue,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.enqueue_packet_import") as mock_enqueue,
 			patch("frappe.db.get_list", return_value=[]),
 		):
 			# Execute function
@@ -316,21 +484,158 @@ class TestDataPacket(unittest.TestCase):
 		mock_logger.return_value.info.assert_not_called()
 
 	def test_import_logs_error_if_enqueue_fails(self):
-		"""Ha enqueue_doc exception-t dob, logger.error hívódik."""
+		"""Ha enqueue exception-t dob, logger.error hívódik."""
 		mock_logger = MagicMock()
 		mock_packets = ["TEST-0001.LZH", "TEST-0002.LZH"]
 
 		with (
 			patch("frappe.logger", return_value=mock_logger),
 			patch("frappe.utils.nowtime", return_value="12:30:00"),
-			patch("frappe.get_list", return_value=mock_packets),
-			patch("frappe.enqueue_doc", side_effect=Exception("Error")),
+			patch("frappe.db.get_list", return_value=mock_packets),
+			patch("frappe.enqueue", side_effect=Exception("Error")),
 		):
 			# Execute function
 			import_new_packets()
 			mock_logger.error.assert_called_once()
 			mock_logger.info.assert_any_call("Beginning to import new packets")
 
+	def test_enqueue_packet_import_is_deduplicated(self):
+		"""Test at most one packet import job is queued per site."""
+		with patch("frappe.enqueue") as mock_enqueue:
+			enqueue_packet_import()
+
+			self.assertEqual(mock_enqueue.call_args.kwargs["job_id"], PACKET_IMPORT_JOB)
+			self.assertTrue(mock_enqueue.call_args.kwargs["deduplicate"])
+
+	def test_import_pending_packets_in_creation_order(self):
+		"""Test the pending packets are imported one after the other, including the ones uploaded meanwhile."""
+		mock_doc = MagicMock()
+
+		with (
+			patch("frappe.logger"),
+			patch("frappe.db.get_list", side_effect=[["TEST-0001.LZH", "TEST-0002.LZH"], ["TEST-0003.LZH"], []]),
+			patch("frappe.get_doc", return_value=mock_doc) as mock_get_doc,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.supersede_snapshots"),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.merge_packets") as mock_merge,
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.ImportPlan"),
+		):
+			self.assertEqual(import_pending_packets(), 3)
+
+			self.assertEqual(
+				[args.args[1] for args in mock_get_doc.call_args_list],
+				["TEST-0001.LZH", "TEST-0002.LZH", "TEST-0003.LZH"],
+			)
+			self.assertEqual(mock_doc.import_packet.call_count, 3)
+			# a single pending packet is imported without merging
+			mock_merge.assert_called_once()
+
+	def test_import_pending_packets_skips_failed_packet(self):
+		"""Test a failing packet is not retried by the same job."""
+		mock_doc = MagicMock()
+		mock_doc.import_packet.side_effect = Exception("Error")
+
+		with (
+			patch("frappe.logger") as mock_logger,
+			patch("frappe.db.get_list", return_value=["TEST-0001.LZH"]),
+			patch("frappe.get_doc", return_value=mock_doc),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.supersede_snapshots"),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.ImportPlan"),
+		):
+			self.assertEqual(import_pending_packets(), 0)
+			mock_doc.import_packet.assert_called_once()
+			mock_logger.return_value.exception.assert_called_once()
+
+	def test_merge_packets_writes_newest_records_once(self):
+		"""Test the updateable tables of several packets are upserted once with the newest records."""
+		create_datapacket("TEST-0001.LZH")
+		create_datapacket("TEST-0002.LZH")
+
+		older = MagicMock(field_names=["KOD", "NEV"])
+		older.__len__.return_value = 2
+		older.iter_batches.return_value = iter([[("100", "Régi"), ("200", "Bob")]])
+		newer = MagicMock(field_names=["KOD", "NEV"])
+		newer.__len__.return_value = 1
+		newer.iter_batches.return_value = iter([[("100", "Új")]])
+
+		with (
+			patch("zipfile.ZipFile"),
+			patch(
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.get_dbf_members",
+				return_value={"tfocsop": MagicMock()},
+			),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", side_effect=[older, newer]),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("frappe.db.commit"),
+			patch("frappe.logger"),
+		):
+			mock_writer.return_value.configure_mock(inserted=1, updated=1, unchanged=0)
+			merge_packets(["TEST-0001.LZH", "TEST-0002.LZH"], self.plan, "cp1250")
+
+			mock_writer.assert_called_once()
+			added = {args.args[0]: args.args[1] for args in mock_writer.return_value.add.call_args_list}
+			self.assertEqual(added, {"100": ("100", "Új"), "200": ("200", "Bob")})
+
+		self.assertTrue(Checkpoint("TEST-0001.LZH", "tfocsop", 5000).completed)
+		self.assertTrue(Checkpoint("TEST-0002.LZH", "tfocsop", 5000).completed)
+		# full-replace tables are left to the import of the newest packet
+		self.assertFalse(Checkpoint("TEST-0002.LZH", "tcsop", 5000).completed)
+
+	def test_merge_packets_skips_tables_with_deleted_records(self):
+		"""Test a table with records in a pending `torolt` is left to the import of the single packets."""
+		create_datapacket("TEST-0001.LZH")
+		create_datapacket("TEST-0002.LZH")
+		plan = ImportPlan(
+			[
+				{**primary_key, "type": "FOCS"} if primary_key["name"] == "tfocsop" else primary_key
+				for primary_key in TEST_PRIMARY_KEYS
+			]
+		)
+
+		deleted = MagicMock(field_names=["TIP", "KOD"])
+		deleted.iter_batches.return_value = iter([[("FOCS", "100")]])
+		empty = MagicMock(field_names=["TIP", "KOD"])
+		empty.iter_batches.return_value = iter([])
+
+		with (
+			patch("zipfile.ZipFile"),
+			patch(
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.get_dbf_members",
+				return_value={"torolt": MagicMock(), "tfocsop": MagicMock()},
+			),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.DbfReader", side_effect=[deleted, empty]),
+			patch("vir_conto.vir_conto.doctype.data_packet.data_packet.BulkWriter") as mock_writer,
+			patch("frappe.db.commit"),
+			patch("frappe.logger"),
+		):
+			merge_packets(["TEST-0001.LZH", "TEST-0002.LZH"], plan, "cp1250")
+
+			mock_writer.assert_not_called()
+
+		self.assertFalse(Checkpoint("TEST-0001.LZH", "tfocsop", 5000).completed)
+		self.assertFalse(Checkpoint("TEST-0002.LZH", "tfocsop", 5000).completed)
+
+	def test_supersede_snapshots_of_older_packets(self):
+		"""Test full-replace tables are only imported from the newest packet."""
+		create_datapacket("TEST-0001.LZH")
+		create_datapacket("TEST-0002.LZH")
+
+		with (
+			patch("zipfile.ZipFile"),
+			patch(
+				"vir_conto.vir_conto.doctype.data_packet.data_packet.get_dbf_members",
+				return_value={"tcsop": MagicMock(), "tfocsop": MagicMock()},
+			),
+			patch("frappe.logger"),
+			patch("frappe.db.commit"),
+		):
+			supersede_snapshots(["TEST-0001.LZH", "TEST-0002.LZH"], self.plan)
+
+		self.assertEqual(Checkpoint("TEST-0001.LZH", "tcsop", 5000).status, "Superseded")
+		self.assertTrue(Checkpoint("TEST-0001.LZH", "tcsop", 5000).completed)
+		self.assertEqual(Checkpoint("TEST-0002.LZH", "tcsop", 5000).status, "Pending")
+		# updateable tables are imported from every packet
+		self.assertEqual(Checkpoint("TEST-0001.LZH", "tfocsop", 5000).status, "Pending")
+
 	def test_integration_clear_old_packets(self):
 		# Create mock DataPacket
 		file_name = "TEST-0001.ZIP"
@@ -0,0 +1,27 @@
+# Copyright (c) 2026, Alex Nagy and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class DataPacketCheckpoint(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		chunk_size: DF.Int
+		member_hash: DF.Data | None
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		record_offset: DF.Int
+		status: DF.Literal["Pending", "In Progress", "Completed", "Superseded", "Unchanged"]
+		table_name: DF.Data
+	# end: auto-generated types
+
+	pass
@@ -0,0 +1,31 @@
+# Copyright (c) 2026, Alex Nagy and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ImportRun(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		commit_time: DF.Float
+		data_packet: DF.Data | None
+		decode_time: DF.Float
+		peak_rss_mb: DF.Float
+		rows: DF.Int
+		rows_per_sec: DF.Float
+		started: DF.Datetime | None
+		table_name: DF.Data | None
+		total_time: DF.Float
+		transform_time: DF.Float
+		unzip_time: DF.Float
+		write_time: DF.Float
+	# end: auto-generated types
+
+	pass
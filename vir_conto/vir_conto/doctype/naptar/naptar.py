@@ -0,0 +1,130 @@
+# Copyright (c) 2026, Alex Nagy and contributors
+# For license information, please see license.txt
+
+from datetime import date, timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import getdate, now
+
+from vir_conto.importer.bulk import BULK_CHUNK_SIZE, DATE_FIELD_DOCTYPES, STANDARD_FIELDS
+from vir_conto.importer.dates import get_date_fields
+
+# Years kept before the current one, even if the daily tables have no records from them
+CALENDAR_PAST_YEARS = 1
+
+CALENDAR_FIELDS = [
+	"datum",
+	"ev",
+	"ho",
+	"ho_nap",
+	"het_ev",
+	"het",
+	"het_nap",
+	"tavalyi_datum",
+	"eltelt_nap",
+	"akt_ev",
+	"elozo_ev",
+	"ytd",
+	"lytd",
+	"tavalyi_nap",
+]
+
+
+class naptar(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		akt_ev: DF.Check
+		datum: DF.Date
+		elozo_ev: DF.Check
+		eltelt_nap: DF.Int
+		ev: DF.Int
+		het: DF.Int
+		het_ev: DF.Int
+		het_nap: DF.Int
+		ho: DF.Int
+		ho_nap: DF.Int
+		lytd: DF.Check
+		tavalyi_datum: DF.Date | None
+		tavalyi_nap: DF.Check
+		ytd: DF.Check
+	# end: auto-generated types
+
+	pass
+
+
+def refresh_calendar(today: date | None = None) -> None:
+	"""Rebuilds the calendar from the first year of the daily tables to the end of the current year.
+
+	The relative period flags depend on the current date, so it runs as a daily scheduler event.
+	The period comparison queries of the default charts join it on `datum` and filter on its flags.
+	The table only has a few thousand records, it is replaced in one transaction and committed.
+	"""
+	today = getdate(today)
+	first = date(min(get_first_year(), today.year - CALENDAR_PAST_YEARS), 1, 1)
+	last = date(today.year, 12, 31)
+
+	timestamp = now()
+	user = frappe.session.user
+	values = []
+	day = first
+	while day <= last:
+		row = get_calendar_row(day, today)
+		values.append([str(day), user, timestamp, timestamp, user, 0, 0, *(row[field] for field in CALENDAR_FIELDS)])
+		day += timedelta(days=1)
+
+	frappe.db.delete("naptar")
+	frappe.db.bulk_insert("naptar", [*STANDARD_FIELDS, *CALENDAR_FIELDS], values, chunk_size=BULK_CHUNK_SIZE)
+	frappe.db.commit()  # nosemgrep
+
+
+def get_calendar_row(day: date, today: date) -> dict:
+	"""Calendar fields of a day, the relative period flags are computed from `today`.
+
+	Args:
+			day: Date of the calendar record.
+			today: Current date.
+
+	Returns:
+			dict: Values of the calendar fields.
+	"""
+	iso_year, iso_week, iso_weekday = day.isocalendar()
+	same_day_last_year = get_same_day_last_year(today)
+	return {
+		"datum": day,
+		**get_date_fields(day),
+		"het_ev": iso_year,
+		"het": iso_week,
+		"het_nap": iso_weekday,
+		"tavalyi_datum": get_same_day_last_year(day),
+		"eltelt_nap": (today - day).days,
+		"akt_ev": int(day.year == today.year),
+		"elozo_ev": int(day.year == today.year - 1),
+		"ytd": int(day.year == today.year and day <= today),
+		"lytd": int(day.year == today.year - 1 and day <= same_day_last_year),
+		"tavalyi_nap": int(day == same_day_last_year),
+	}
+
+
+def get_same_day_last_year(day: date) -> date:
+	"""Same month and day in the previous year, 29 February falls back to 28 February."""
+	try:
+		return day.replace(year=day.year - 1)
+	except ValueError:
+		return day.replace(year=day.year - 1, day=28)
+
+
+def get_first_year() -> int:
+	"""Year of the oldest record in the daily tables, the current year if they are empty."""
+	years = [getdate().year]
+	for doctype in sorted(DATE_FIELD_DOCTYPES):
+		first = frappe.db.sql(f"SELECT MIN(`datum`) FROM `tab{doctype}`")[0][0]
+		if first:
+			years.append(getdate(first).year)
+	return min(years)
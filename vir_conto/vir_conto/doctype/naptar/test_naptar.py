@@ -0,0 +1,66 @@
+# Copyright (c) 2026, Alex Nagy and Contributors
+# See license.txt
+
+import datetime
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from vir_conto.vir_conto.doctype.naptar.naptar import get_calendar_row, get_same_day_last_year, refresh_calendar
+
+
+class Testnaptar(unittest.TestCase):
+	"""Test suite for the calendar dimension of the daily tables."""
+
+	@classmethod
+	def setUpClass(cls):
+		"""Set up test class with required test records."""
+		frappe.set_user("Administrator")
+
+	def tearDown(self):
+		"""Clean up after each test."""
+		frappe.db.rollback()
+
+	def test_calendar_row_fields(self):
+		"""Test the date parts and the ISO week of a day."""
+		row = get_calendar_row(datetime.date(2025, 1, 1), datetime.date(2025, 3, 22))
+
+		self.assertEqual((row["ev"], row["ho"], row["ho_nap"]), (2025, 1, 101))
+		# 1 January 2025 is a Wednesday in the first ISO week of 2025
+		self.assertEqual((row["het_ev"], row["het"], row["het_nap"]), (2025, 1, 3))
+		self.assertEqual(row["tavalyi_datum"], datetime.date(2024, 1, 1))
+		self.assertEqual(row["eltelt_nap"], 80)
+
+	def test_relative_period_flags(self):
+		"""Test the current year, previous year, YTD and LYTD flags."""
+		today = datetime.date(2025, 3, 22)
+
+		def flags(day):
+			row = get_calendar_row(day, today)
+			return [row[field] for field in ("akt_ev", "elozo_ev", "ytd", "lytd", "tavalyi_nap")]
+
+		self.assertEqual(flags(datetime.date(2025, 3, 22)), [1, 0, 1, 0, 0])
+		self.assertEqual(flags(datetime.date(2025, 3, 23)), [1, 0, 0, 0, 0])
+		self.assertEqual(flags(datetime.date(2024, 3, 22)), [0, 1, 0, 1, 1])
+		self.assertEqual(flags(datetime.date(2024, 3, 23)), [0, 1, 0, 0, 0])
+		self.assertEqual(flags(datetime.date(2023, 3, 22)), [0, 0, 0, 0, 0])
+
+	def test_same_day_last_year_of_leap_day(self):
+		"""Test 29 February falls back to 28 February of the previous year."""
+		self.assertEqual(get_same_day_last_year(datetime.date(2024, 2, 29)), datetime.date(2023, 2, 28))
+		self.assertEqual(get_same_day_last_year(datetime.date(2025, 3, 1)), datetime.date(2024, 3, 1))
+
+	def test_refresh_covers_daily_tables(self):
+		"""Test the calendar starts with the year of the oldest daily record and ends with the current year."""
+		with (
+			patch("vir_conto.vir_conto.doctype.naptar.naptar.get_first_year", return_value=2022),
+			patch("frappe.db.commit"),
+		):
+			refresh_calendar(datetime.date(2025, 3, 22))
+
+		self.assertEqual(frappe.db.count("naptar"), 365 * 3 + 366)
+		first, last = frappe.db.sql("SELECT MIN(`datum`), MAX(`datum`) FROM `tabnaptar`")[0]
+		self.assertEqual((str(first), str(last)), ("2022-01-01", "2025-12-31"))
+		self.assertEqual(frappe.db.get_value("naptar", {"tavalyi_nap": 1}, "datum"), datetime.date(2024, 3, 22))
+		self.assertEqual(frappe.db.count("naptar", {"ytd": 1}), 81)
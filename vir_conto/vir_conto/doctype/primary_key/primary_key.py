@@ -14,11 +14,14 @@ class PrimaryKey(Document):
 	if TYPE_CHECKING:
 		from frappe.types import DF
 
+		archive_deleted: DF.Check
 		conto_name: DF.Data
 		conto_primary_key: DF.Data
 		enabled: DF.Check
 		frappe_name: DF.Data
 		import_order: DF.Int
+		last_import_hash: DF.Data | None
 		type: DF.Data | None
 		updateable: DF.Check
+		write_mode: DF.Literal["Upsert", "Date Range Replace"]
 	# end: auto-generated types
@@ -5,6 +5,8 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+from vir_conto.importer.cascades import cascade_store_names
+
 
 class raktnev(Document):
 	# begin: auto-generated types
@@ -37,11 +39,9 @@ class raktnev(Document):
 		"""
 		Updates raktnev in vir_bolt based on the current rnev in raktnev table
 
-		update vir_bolt vb set rnev=(select rnev from raktnev rn where rn.rkod=vb.rkod)
-		--where rkod='200'
+		The import does it for every new or renamed store, this repairs a single store by hand.
 		"""
 
-		vir_bolt = frappe.qb.DocType("vir_bolt")
-		frappe.qb.update(vir_bolt).set(vir_bolt.rnev, self.rnev).where(vir_bolt.rkod == self.rkod).run()
+		cascade_store_names([self.rkod])
 		frappe.db.commit()
 		return _("Finished")
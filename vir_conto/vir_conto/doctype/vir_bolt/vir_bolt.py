@@ -1,9 +1,9 @@
 # Copyright (c) 2025, Alex Nagy and contributors
 # For license information, please see license.txt
 
-import frappe
 from frappe.model.document import Document
-from frappe.utils import cast
+
+from vir_conto.importer.dates import get_date_fields
 
 
 class vir_bolt(Document):
@@ -37,6 +37,7 @@ class vir_bolt(Document):
 		nszallrend: DF.Currency
 		rkod: DF.Link
 		rnev: DF.Data
+		row_hash: DF.Data | None
 		vevok: DF.Int
 	# end: auto-generated types
 
@@ -44,7 +45,5 @@ class vir_bolt(Document):
 		self.set_dates()
 
 	def set_dates(self):
-		date = cast("Date", self.datum)
-		self.ev = date.year
-		self.ho = date.month
-		self.ho_nap = self.datum[5:7] + self.datum[8:10]
+		# the triggers of the table set the same values, this covers sites where they could not be created
+		self.update(get_date_fields(self.datum))
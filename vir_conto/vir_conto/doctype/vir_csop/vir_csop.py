@@ -1,9 +1,9 @@
 # Copyright (c) 2025, Alex Nagy and contributors
 # For license information, please see license.txt
 
-import frappe
 from frappe.model.document import Document
-from frappe.utils import cast
+
+from vir_conto.importer.dates import get_date_fields
 
 
 class vir_csop(Document):
@@ -23,6 +23,7 @@ class vir_csop(Document):
 		ho_nap: DF.Int
 		nert: DF.Currency
 		rkod: DF.Link
+		row_hash: DF.Data | None
 		tipus: DF.Data
 	# end: auto-generated types
 
@@ -30,7 +31,5 @@ class vir_csop(Document):
 		self.set_dates()
 
 	def set_dates(self):
-		date = cast("Date", self.datum)
-		self.ev = date.year
-		self.ho = date.month
-		self.ho_nap = self.datum[5:7] + self.datum[8:10]
+		# the triggers of the table set the same values, this covers sites where they could not be created
+		self.update(get_date_fields(self.datum))
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Alex Nagy and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("vir_csop_havi", {
+// 	refresh(frm) {
+
+// 	},
+// });
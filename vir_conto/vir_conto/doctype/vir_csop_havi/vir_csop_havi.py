@@ -0,0 +1,32 @@
+# Copyright (c) 2026, Alex Nagy and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class vir_csop_havi(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		bert: DF.Currency
+		csop: DF.Link | None
+		csop_nev: DF.Data | None
+		datum: DF.Date | None
+		ev: DF.Int
+		focsop: DF.Link | None
+		focsop_nev: DF.Data | None
+		ho: DF.Int
+		nert: DF.Currency
+		record_count: DF.Int
+		rkod: DF.Link
+		rnev: DF.Data | None
+		tipus: DF.Data
+	# end: auto-generated types
+
+	pass